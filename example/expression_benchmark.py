@@ -0,0 +1,134 @@
+# Copyright (c) 2020 Science and Technology Facilities Council
+
+# All rights reserved.
+
+# Modifications made as part of the fparser project are distributed
+# under the following license:
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''A benchmark of the parsing (and printing) of long expressions, such as
+those in generated code, with the iterative expression parser (see
+fparser/two/expression.py) and, optionally, the recursive expression
+rules. For example::
+
+    python expression_benchmark.py --terms 10000 --recursive
+
+'''
+from __future__ import print_function
+import sys
+import threading
+import time
+from optparse import OptionParser
+from fparser.two.parser import ParserFactory
+from fparser.two import expression
+from fparser.two.Fortran2003 import Expr
+
+
+def make_expression(terms):
+    '''
+    :param int terms: the number of terms.
+
+    :returns: an expression with the given number of terms.
+    :rtype: str
+    '''
+    parts = ['c(0)*x']
+    for index in range(1, terms):
+        parts.append(' - ' if index % 3 == 0 else ' + ')
+        parts.append('c(%d)*x**%d' % (index, index % 7 + 1))
+    return ''.join(parts)
+
+
+def time_parse(string, enabled):
+    '''
+    :param str string: the expression.
+    :param bool enabled: whether to use the iterative parser.
+
+    :returns: the times taken to parse the expression and to print \
+              the result in seconds.
+    :rtype: (float, float)
+    '''
+    expression.ENABLED = enabled
+    start = time.time()
+    tree = Expr(string)
+    parsed = time.time()
+    text = str(tree)
+    printed = time.time()
+    assert len(text) >= len(string.replace(' ', ''))
+    return parsed - start, printed - parsed
+
+
+def time_recursive(string):
+    '''
+    :param str string: the expression.
+
+    :returns: the times taken to parse the expression with the \
+              recursive rules and to print the result in seconds. \
+              The rules recurse once per operator so this runs in a \
+              thread with a large stack and a raised recursion limit.
+    :rtype: (float, float)
+    '''
+    result = []
+    limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(max(limit, 100 * len(string)))
+    threading.stack_size(1024 * 1024 * 1024)
+    thread = threading.Thread(
+        target=lambda: result.append(time_parse(string, False)))
+    thread.start()
+    thread.join()
+    threading.stack_size(0)
+    sys.setrecursionlimit(limit)
+    return result[0]
+
+
+def main():
+    '''Runs the benchmark.'''
+    parser = OptionParser()
+    parser.add_option('--terms', type='int', default=10000,
+                      help='the largest number of terms (default 10000)')
+    parser.add_option('--recursive', action='store_true', default=False,
+                      help='also time the recursive expression rules')
+    options, _ = parser.parse_args()
+    ParserFactory().create(std='f2003')
+    terms = 1000
+    while True:
+        terms = min(terms, options.terms)
+        string = make_expression(terms)
+        line = '{0:6d} terms: iterative {1:7.2f}s (print {2:5.2f}s)'.format(
+            terms, *time_parse(string, True))
+        if options.recursive:
+            line += ', recursive {0:7.2f}s (print {1:5.2f}s)'.format(
+                *time_recursive(string))
+        print(line)
+        if terms == options.terms:
+            break
+        terms *= 2
+
+
+if __name__ == '__main__':
+    main()
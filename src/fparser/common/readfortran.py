@@ -110,13 +110,13 @@ methods and attributes::
     >>> item.line
         'if (da .eq. 0.0d0) return'
     >>> item.strline
-        'if (F2PY_EXPR_TUPLE_5) return'
+        'if (F2PY_EXPR_TUPLE_1) return'
     >>> item.strlinemap
-        {'F2PY_EXPR_TUPLE_5': 'da .eq. 0.0d0'}
+        {'F2PY_EXPR_TUPLE_1': 'da .eq. 0.0d0'}
     >>> item.span
         (12, 12)
     >>> item.get_line()
-        'if (F2PY_EXPR_TUPLE_5) return'
+        'if (F2PY_EXPR_TUPLE_1) return'
 
 To read a Fortran code from a string, use `FortranStringReader` class::
 
@@ -141,20 +141,30 @@ To read a Fortran code from a string, use `FortranStringReader` class::
 
 from __future__ import print_function
 
+import array
+import collections
+import hashlib
+import json
 import logging
 import io
+import mmap
 import os
 import re
 import sys
+import tempfile
+import threading
 import traceback
 import six
 import fparser.common.sourceinfo
-from fparser.common.splitline import String, string_replace_map, splitquote
+from fparser.common.splitline import String, string_replace_map, \
+    string_replace_dict, splitquote
 
 
 __all__ = ['FortranFileReader',
            'FortranStringReader',
+           'FortranBytesReader',
            'FortranReaderError',
+           'ItemCache',
            'Line',
            'SyntaxErrorLine',
            'Comment',
@@ -162,9 +172,15 @@ __all__ = ['FortranFileReader',
            'SyntaxErrorMultiLine']
 
 _SPACEDIGITS = ' 0123456789'
+# Number of items a reader's item log may hold before it is trimmed.
+_ITEM_LOG_SIZE = 1000
+_NEWLINE_SEARCH = re.compile(b'\n').search
 _CF2PY_RE = re.compile(r'(?P<indent>\s*)!f2py(?P<rest>.*)', re.I)
 _LABEL_RE = re.compile(r'\s*(?P<label>\d+)\s*(\b|(?=&)|\Z)', re.I)
 _CONSTRUCT_NAME_RE = re.compile(r'\s*(?P<name>\w+)\s*:\s*(\b|(?=&)|\Z)', re.I)
+# Matches the code at the start of a free-format line, up to any comment
+# or character constant that is not terminated on the line.
+_FREE_CODE_MATCH = re.compile(r'(?:[^\'"!]+|\'[^\']*\'|"[^"]*")*').match
 _IS_INCLUDE_LINE = re.compile(r'\s*include\s*("[^"]+"'
                               + r'|\'[^\']+\')\s*\Z', re.I).match
 
@@ -173,6 +189,43 @@ def _is_fix_cont(line):
     return line and len(line) > 5 and line[5] != ' ' and line[:5] == 5 * ' '
 
 
+# Kinds of fixed-format line (see _classify_fix_line).
+_FIX_INITIAL = 0
+_FIX_CONTINUATION = 1
+_FIX_COMMENT = 2
+# Matches the start of a fixed-format continuation or comment line,
+# indexed by whether the format is strict.
+_FIX_CONT_OR_COMMENT_MATCH = {
+    True: re.compile(r'(?P<cont> {5}[^ ])|[*cC!]').match,
+    False: re.compile(r'(?P<cont> {5}[^ ])|[*cC!]|(?!\s{5}!)\s*!').match}
+# Matches a label field holding only spaces and digits.
+_FIX_LABEL_FIELD_MATCH = re.compile(r'[ 0-9]{0,5}').match
+_F2PY_SEARCH = re.compile(r'f2py', re.I).search
+
+
+def _classify_fix_line(line, isstrict):
+    '''
+    Classifies a line of fixed-format source with a single match of a
+    regular expression. This is equivalent to, but quicker than, using
+    both _is_fix_comment() and _is_fix_cont().
+
+    :param str line: the line (which must not be None).
+    :param bool isstrict: whether the format is strict.
+
+    :returns: the kind of line, i.e. _FIX_COMMENT, _FIX_CONTINUATION or \
+              _FIX_INITIAL.
+    :rtype: int
+    '''
+    if not line:
+        return _FIX_COMMENT
+    match = _FIX_CONT_OR_COMMENT_MATCH[isstrict](line)
+    if match is None:
+        return _FIX_INITIAL
+    if match.group('cont') is None:
+        return _FIX_COMMENT
+    return _FIX_CONTINUATION
+
+
 def _is_fix_comment(line, isstrict):
     """
     Check whether line is a comment line in fixed format Fortran source.
@@ -205,6 +258,39 @@ def _is_fix_comment(line, isstrict):
     return False
 
 
+def _normalise_source_line(line):
+    '''
+    Prepares a raw line of source for processing by the reader: tabs
+    are expanded, special symbols replaced and any trailing white
+    space (including new line characters) is removed.
+
+    :param line: the raw source line.
+    :type line: str or unicode (py2)
+
+    :returns: the normalised line.
+    :rtype: str or unicode (py2)
+    '''
+    if six.PY2 and not isinstance(line, six.text_type):
+        # Ensure we always have a unicode object in Python 2.
+        line = unicode(line, 'UTF-8')
+
+    # expand tabs, replace special symbols, get rid of nl characters
+    line = line.expandtabs().replace(u'\xa0', u' ').rstrip()
+
+    if six.PY2:
+        # Cast the unicode to str if we can do so safely. This
+        # maximises compatibility with the existing Python 2 tests
+        # and avoids the need to proliferate the use of unicode
+        # literals (e.g. u"") in the parse tree repr.
+        try:
+            line = line.encode('ascii', errors='strict')
+        except UnicodeEncodeError:
+            # Can't cast to str as there are non-ascii characters
+            # in the line.
+            pass
+    return line
+
+
 _HOLLERITH_START_SEARCH = re.compile(r'(?P<pre>\A|,\s*)'
                                      + r'(?P<num>\d+)h', re.I).search
 _IS_CALL_STMT = re.compile(r'call\b', re.I).match
@@ -471,6 +557,148 @@ class SyntaxErrorMultiLine(MultiLine, FortranReaderError):
         FortranReaderError.__init__(self, message)
 
 
+##############################################################################
+
+class SourceBuffer(object):
+    '''
+    Provides line-by-line access to Fortran source held in a buffer of
+    encoded bytes, e.g. a memory-mapped file. Lines are only decoded as
+    they are requested and, rather than keeping a copy of each line
+    that has been consumed, only the offsets at which lines start are
+    stored (in a compact array). The consumed lines are available,
+    decoded on demand, through the `lines` attribute which may be used
+    in place of the `source_lines` list of a reader.
+
+    Invalid characters in the input are removed (and a warning is
+    logged) in the same way as is done when reading a file with
+    :py:func:`fparser.common.utils.read_source_file`.
+
+    :param buffer: the encoded source.
+    :type buffer: bytes, memoryview, :py:class:`mmap.mmap` or any \
+                  object supporting `find` and slicing in the same way.
+    :param str encoding: the encoding of the source.
+    '''
+    def __init__(self, buffer, encoding='utf8'):
+        if isinstance(buffer, memoryview):
+            if six.PY2:
+                buffer = buffer.tobytes()
+            else:
+                # Lines are located by byte offset.
+                buffer = buffer.cast('B')
+        self._buffer = buffer
+        # A memoryview does not provide find() but the regular
+        # expression module accepts any object supporting the buffer
+        # protocol.
+        self._find_newline = getattr(buffer, 'find', None)
+        self._encoding = encoding
+        #: the size of the buffer in bytes.
+        self.size = len(buffer)
+        # Offset of the start of each consumed line plus the offset at
+        # which the next line starts.
+        self._offsets = array.array('L', [0])
+        self.lines = SourceLines(self)
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        start = self._offsets[-1]
+        if start >= self.size:
+            raise StopIteration
+        if self._find_newline is not None:
+            end = self._find_newline(b'\n', start)
+        else:
+            match = _NEWLINE_SEARCH(self._buffer, start)
+            end = match.start() if match else -1
+        if end == -1:
+            end = self.size
+        else:
+            end += 1
+        self._offsets.append(end)
+        return self.decode(start, end)
+
+    # Python 2 iterator protocol.
+    next = __next__
+
+    def __len__(self):
+        '''
+        :returns: the number of lines that have been consumed.
+        :rtype: int
+        '''
+        return len(self._offsets) - 1
+
+    def decode(self, start, end):
+        '''
+        Decodes part of the buffer.
+
+        :param int start: offset of the first byte to decode.
+        :param int end: offset following the last byte to decode.
+
+        :returns: the decoded text.
+        :rtype: str or unicode (py2)
+        '''
+        raw_line = self._buffer[start:end]
+        if isinstance(raw_line, memoryview):
+            raw_line = raw_line.tobytes()
+        try:
+            return raw_line.decode(self._encoding)
+        except UnicodeDecodeError as excinfo:
+            logging.getLogger(__name__).warning(
+                "Skipped bad character in input file. Error returned was "
+                "%s.", str(excinfo))
+            return raw_line.decode(self._encoding, 'ignore')
+
+    def get_line(self, index):
+        '''
+        :param int index: the (0-based) index of a consumed line.
+
+        :returns: the normalised content of the line.
+        :rtype: str or unicode (py2)
+        '''
+        return _normalise_source_line(
+            self.decode(self._offsets[index], self._offsets[index + 1]))
+
+    def close(self):
+        ''' Closes the underlying buffer if it supports it. '''
+        if hasattr(self._buffer, 'close'):
+            self._buffer.close()
+
+
+class SourceLines(object):
+    '''
+    A read-only, list-like view of the lines consumed from a
+    :py:class:`SourceBuffer`. Each access decodes the line from the
+    buffer so that no copy of the source is retained. Appending to the
+    view is accepted (for compatibility with the list normally used
+    by the reader) but has no effect as the buffer itself records the
+    lines it has provided.
+
+    :param source: the buffer holding the lines.
+    :type source: :py:class:`fparser.common.readfortran.SourceBuffer`
+    '''
+    def __init__(self, source):
+        self._source = source
+
+    def __len__(self):
+        return len(self._source)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[idx] for idx in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("source line index out of range")
+        return self._source.get_line(index)
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self._source.get_line(index)
+
+    def append(self, _):
+        ''' The buffer has already recorded the line so do nothing. '''
+
+
 ##############################################################################
 
 class FortranReaderBase(object):
@@ -510,8 +738,24 @@ class FortranReaderBase(object):
         self.fifo_item = []
         self.source_lines = []  # source lines cache
 
+        # Log of the items returned by next(). Items are replayed from
+        # the log after a call to put_item() or rewind() so that
+        # backtracking does not require items to be re-inserted at the
+        # front of a list. The log is trimmed when there are no
+        # outstanding checkpoints (see checkpoint()).
+        self._item_log = []
+        self._item_index = 0  # index of the next item in _item_log
+        self._item_log_base = 0  # number of items trimmed from the log
+        self._checkpoints = 0  # number of outstanding checkpoints
+
         self.f2py_comment_lines = []  # line numbers of f2py directives
 
+        # Persistent item cache (see enable_item_cache()).
+        self._item_cache = None
+        self._item_cache_digest = None
+        self._item_records = None  # records being replayed from the cache
+        self._recorded_items = None  # records to be stored in the cache
+
         self.reader = None
         self.include_dirs = ['.']
 
@@ -519,6 +763,12 @@ class FortranReaderBase(object):
 
         self.exit_on_error = True
         self.restore_cache = []
+        # Whether to use the fast path for free-format statements (see
+        # _scan_free_statement()).
+        self.free_form_fast_path = True
+        # Whether to use the fast path for fixed-format statements (see
+        # _scan_fix_statement()).
+        self.fixed_form_fast_path = True
 
         return
 
@@ -619,12 +869,9 @@ class FortranReaderBase(object):
         if ignore_comments is None:
             ignore_comments = self._ignore_comments
 
-        try:
-            line = self.filo_line.pop()
+        if self.filo_line:
             self.linecount += 1
-            return line
-        except IndexError:
-            pass
+            return self.filo_line.pop()
         if self.isclosed:
             return None
         try:
@@ -635,24 +882,7 @@ class FortranReaderBase(object):
             return None
         self.linecount += 1
 
-        if six.PY2 and not isinstance(line, six.text_type):
-            # Ensure we always have a unicode object in Python 2.
-            line = unicode(line, 'UTF-8')
-
-        # expand tabs, replace special symbols, get rid of nl characters
-        line = line.expandtabs().replace(u'\xa0', u' ').rstrip()
-
-        if six.PY2:
-            # Cast the unicode to str if we can do so safely. This
-            # maximises compatibility with the existing Python 2 tests
-            # and avoids the need to proliferate the use of unicode
-            # literals (e.g. u"") in the parse tree repr.
-            try:
-                line = line.encode('ascii', errors='strict')
-            except UnicodeEncodeError:
-                # Can't cast to str as there are non-ascii characters
-                # in the line.
-                pass
+        line = _normalise_source_line(line)
 
         self.source_lines.append(line)
 
@@ -701,11 +931,73 @@ class FortranReaderBase(object):
         return item
 
     def put_item(self, item):
-        """ Insert item to FIFO item buffer.
+        """ Push back an item so that it is the next one to be returned.
+
+        If the item is the one most recently returned (the usual case
+        when backtracking) this is done by stepping back in the item
+        log, otherwise the item is inserted into the log.
         """
-        self.fifo_item.insert(0, item)
+        item_log = self._item_log
+        index = self._item_index - 1
+        # Allow for comments that were skipped when replaying the log.
+        while index >= 0 and item_log[index] is not item and \
+                isinstance(item_log[index], Comment):
+            index -= 1
+        if index >= 0 and item_log[index] is item:
+            self._item_index = index
+        else:
+            item_log.insert(self._item_index, item)
         return
 
+    def checkpoint(self):
+        '''
+        Records the current position in the stream of items so that
+        the reader can subsequently be returned to it by `rewind`. Every
+        checkpoint must be passed to either `rewind` or `release` once
+        it is no longer required.
+
+        :returns: an opaque checkpoint value.
+        :rtype: int
+        '''
+        self._checkpoints += 1
+        return self._item_log_base + self._item_index
+
+    def rewind(self, checkpoint):
+        '''
+        Returns the reader to the position recorded by `checkpoint` so
+        that all items read since then will be returned again. This is
+        O(1) regardless of the number of items to be re-read.
+
+        :param int checkpoint: a value returned by `checkpoint`.
+
+        :raises FortranReaderError: if the checkpoint is not valid.
+        '''
+        index = checkpoint - self._item_log_base
+        if not 0 <= index <= len(self._item_log):
+            raise FortranReaderError(
+                "Invalid reader checkpoint '{0}'.".format(checkpoint))
+        self._item_index = index
+        self.release(checkpoint)
+
+    def release(self, checkpoint):
+        '''
+        Indicates that `checkpoint` is no longer required (i.e. the
+        items read since it was taken have been accepted).
+
+        :param int checkpoint: a value returned by `checkpoint`.
+        '''
+        # pylint: disable=unused-argument
+        self._checkpoints = max(0, self._checkpoints - 1)
+
+    @property
+    def pending_items(self):
+        '''
+        :returns: the items that have been read and subsequently put \
+                  back (or rewound) and not yet read again.
+        :rtype: list
+        '''
+        return self._item_log[self._item_index:] + self.fifo_item
+
     # Iterator methods:
 
     def __iter__(self):
@@ -735,6 +1027,38 @@ class FortranReaderBase(object):
         '''
         if ignore_comments is None:
             ignore_comments = self._ignore_comments
+        item_log = self._item_log
+        while self._item_index < len(item_log):
+            # Replay an item that has been put back.
+            item = item_log[self._item_index]
+            self._item_index += 1
+            if not item.isempty(ignore_comments):
+                return item
+        item = self._read_item(ignore_comments)
+        if not self._checkpoints and self._item_index > _ITEM_LOG_SIZE:
+            # No item before the most recent one can be required again.
+            del item_log[:self._item_index - 1]
+            self._item_log_base += self._item_index - 1
+            self._item_index = 1
+        item_log.append(item)
+        self._item_index += 1
+        return item
+
+    def _read_item(self, ignore_comments):
+        '''Return the next Fortran code item that has not been read
+        before. Include statements are dealt with here.
+
+        :param bool ignore_comments: When True then act as if Fortran \
+        code does not contain any comments or blank lines.
+
+        :returns: the next line item. This can be from a local fifo \
+        buffer, from an include reader or from this reader.
+        :rtype: py:class:`fparser.common.readfortran.Line`
+
+        :raises StopIteration: if no more lines are found.
+        :raises StopIteration: if a general error has occured.
+
+        '''
         try:
             if self.reader is not None:
                 # inside INCLUDE statement
@@ -755,7 +1079,10 @@ class FortranReaderBase(object):
                         # file. Setting reader to None indicates that
                         # we should now read from the main reader.
                         self.reader = None
-            item = self._next(ignore_comments)
+            if self._item_cache is None:
+                item = self._next(ignore_comments)
+            else:
+                item = self._next_cached(ignore_comments)
             if isinstance(item, Line) and _IS_INCLUDE_LINE(item.line):
                 # catch INCLUDE statement and create a new FortranReader
                 # to enter to included file.
@@ -779,7 +1106,7 @@ class FortranReaderBase(object):
                     #
                     return item
                 reader.info('including file %r' % (path), item)
-                self.reader = FortranFileReader(
+                self.reader = INCLUDE_CACHE.get_reader(
                     path,
                     include_dirs=include_dirs,
                     ignore_comments=ignore_comments)
@@ -817,12 +1144,13 @@ class FortranReaderBase(object):
         """
         if ignore_comments is None:
             ignore_comments = self._ignore_comments
-        fifo_item_pop = self.fifo_item.pop
+        fifo_item = self.fifo_item
+        fifo_item_pop = fifo_item.pop
         while 1:
-            try:
+            if fifo_item:
                 # first empty the FIFO item buffer:
                 item = fifo_item_pop(0)
-            except IndexError:
+            else:
                 # construct a new item from source
                 item = self.get_source_item()
                 if item is None:
@@ -832,10 +1160,12 @@ class FortranReaderBase(object):
             # else ignore empty lines and comments by getting next line
 
         if not isinstance(item, Comment):
-            # resolve `;` statement terminations
+            # resolve `;` statement terminations. The (cheaper) check of
+            # the raw line avoids computing the string replacement map
+            # for lines that can not contain a separator.
             if not self._format.is_pyf and isinstance(item, Line) \
                    and not item.is_f2py_directive \
-                   and ';' in item.get_line():
+                   and ';' in item.line and ';' in item.get_line():
                 # ;-separator not recognized in pyf-mode
                 items = []
                 for line in item.get_line().split(';'):
@@ -848,6 +1178,135 @@ class FortranReaderBase(object):
                 return fifo_item_pop(0)
         return item
 
+    # Persistent item cache:
+
+    def enable_item_cache(self, item_cache, content):
+        '''
+        Associates a persistent item cache with this reader. The items
+        are then rebuilt from the cache when the same content has been
+        read before with the same format and value of
+        ignore_comments. Otherwise they are read from source and stored
+        in the cache once the end of the source is reached.
+
+        :param item_cache: the cache to use.
+        :type item_cache: :py:class:`fparser.common.readfortran.ItemCache`
+        :param content: the complete source read by this reader.
+        :type content: str or bytes-like object
+
+        :raises FortranReaderError: if items have already been read.
+        '''
+        if self.linecount or self._item_log or self.fifo_item:
+            raise FortranReaderError(
+                "An item cache must be enabled before any items are read.")
+        self._item_cache = item_cache
+        self._item_cache_digest = item_cache.digest(content)
+
+    def _next_cached(self, ignore_comments):
+        '''
+        Returns the next item from this reader, rebuilding it from the
+        item cache if possible. Otherwise the item is read from source
+        (see _next()) and recorded so that the items can be stored in
+        the cache once they have all been read.
+
+        :param bool ignore_comments: whether or not to ignore comments.
+
+        :returns: the next item.
+        :rtype: :py:class:`fparser.common.readfortran.Line` or \
+                :py:class:`fparser.common.readfortran.Comment` etc.
+
+        :raises StopIteration: if there are no more items.
+        '''
+        if self._item_records is None and self._recorded_items is None:
+            # First item so look for the items in the cache. The key is
+            # only computed now as the format may have been set after
+            # this reader was created.
+            key = self._item_cache.get_key(self._item_cache_digest,
+                                           self._format,
+                                           self._ignore_comments)
+            entry = self._item_cache.load(key)
+            if entry is None:
+                self._recorded_items = (key, [])
+            else:
+                self._format = fparser.common.sourceinfo.FortranFormat(
+                    *entry['format'])
+                self.f2py_comment_lines = entry['f2py_comment_lines']
+                self._item_records = collections.deque(entry['items'])
+
+        if self._item_records is not None:
+            records = self._item_records
+            while records:
+                item = self._item_from_record(records.popleft())
+                # Consume the source lines of the item so that the
+                # line count and source lines (used when reporting
+                # errors) are the same as when reading from source.
+                self._consume_source_lines(item.span[1])
+                if not item.isempty(ignore_comments):
+                    return item
+            self._consume_source_lines(None)
+            raise StopIteration
+
+        # Comments are always recorded so that the cached items can be
+        # replayed whatever the value of ignore_comments.
+        while True:
+            try:
+                item = self._next(ignore_comments=False)
+            except StopIteration:
+                if self._recorded_items:
+                    key, records = self._recorded_items
+                    self._item_cache.store(key, {
+                        'format': [self._format.is_free,
+                                   self._format.is_strict],
+                        'f2py_comment_lines': self.f2py_comment_lines,
+                        'items': records})
+                    self._recorded_items = ()
+                raise
+            except Exception:
+                # The items would be incomplete so are not stored.
+                self._recorded_items = ()
+                raise
+            if self._recorded_items:
+                self._recorded_items[1].append(_item_to_record(item))
+            if not item.isempty(ignore_comments):
+                return item
+
+    def _consume_source_lines(self, lineno):
+        '''
+        Consumes source lines without processing them.
+
+        :param lineno: the number of the last line to consume or None \
+                       to consume all remaining lines.
+        :type lineno: int or NoneType
+        '''
+        while lineno is None or self.linecount < lineno:
+            if self.get_single_line(ignore_comments=False) is None:
+                break
+
+    def _item_from_record(self, record):
+        '''
+        Rebuilds an item from its record in the item cache.
+
+        :param list record: the record created by _item_to_record().
+
+        :returns: the item.
+        :rtype: :py:class:`fparser.common.readfortran.Line` or \
+                :py:class:`fparser.common.readfortran.Comment` etc.
+        '''
+        kind = record[0]
+        if kind == 'C':
+            _, comment, span = record
+            return self.comment_item(comment, span[0], span[1])
+        if kind == 'M':
+            _, prefix, block, suffix, span, message = record
+            return self.multiline_item(prefix, block, suffix,
+                                       span[0], span[1], message)
+        _, line, span, label, name, strline, strlinemap, message = record
+        if six.PY2 and name is not None:
+            name = str(name)
+        item = self.line_item(line, span[0], span[1], label, name, message)
+        item.strline = strline
+        item.strlinemap = string_replace_dict(strlinemap)
+        return item
+
     # Interface to returned items:
 
     def line_item(self,
@@ -1159,6 +1618,10 @@ class FortranReaderBase(object):
         line = get_single_line()
         if line is None:
             return
+        if self._format.is_fixed and self.fixed_form_fast_path:
+            item = self._scan_fix_statement(line)
+            if item is not None:
+                return item
         startlineno = self.linecount
         line = self.handle_cf2py_start(line)
         is_f2py_directive = startlineno in self.f2py_comment_lines
@@ -1178,9 +1641,11 @@ class FortranReaderBase(object):
                 # comment line:
                 return self.comment_item(line, startlineno, startlineno)
 
-            for i in range(min(5, len(line))):
-                # check that fixed format line starts according to Fortran
-                # standard
+            # check that fixed format line starts according to Fortran
+            # standard. The regular expression quickly accepts the usual
+            # case of a label field that only holds spaces and digits.
+            bad_columns = _FIX_LABEL_FIELD_MATCH(line).end() < len(line[:5])
+            for i in range(min(5, len(line)) if bad_columns else 0):
                 if line[i] not in _SPACEDIGITS:
                     message = 'non-space/digit char %r found in column %i'\
                               ' of fixed Fortran code' % (line[i], i + 1)
@@ -1242,6 +1707,14 @@ class FortranReaderBase(object):
                     return self.comment_item('', startlineno, self.linecount)
                 # line is not a comment and the start of the line is valid
 
+        if self._format.is_free and not self._format.is_pyf \
+           and self.free_form_fast_path:
+            statement = self._scan_free_statement(line)
+            if statement is not None:
+                lines, label, name, have_comment, endlineno = statement
+                return self._free_format_item(lines, startlineno, endlineno,
+                                              label, name, have_comment)
+
         if self._format.is_f77 and not is_f2py_directive:
             # Fortran 77 is easy..
             lines = [line[6:72]]
@@ -1251,75 +1724,13 @@ class FortranReaderBase(object):
             # with the continued line and then handle them as though they
             # follow on after the single line constructed from the multiple
             # continued lines.
-            while _is_fix_cont(self.get_next_line(ignore_empty=True,
-                                                  ignore_comments=True)):
-                # handle fix format line continuations for F77 code
-                line = get_single_line()
-                lines.append(line[6:72])
-            return self.line_item(''.join(lines), startlineno,
-                                  self.linecount, label, name)
+            return self._f77_statement_item(lines, startlineno, label, name)
 
         handle_inline_comment = self.handle_inline_comment
 
         endlineno = self.linecount
         if self._format.is_fix and not is_f2py_directive:
-            # handle inline comment
-            newline, qc, had_comment = handle_inline_comment(line[6:],
-                                                             startlineno)
-            have_comment |= had_comment
-            lines = [newline]
-            next_line = self.get_next_line()
-
-            while _is_fix_cont(next_line) or _is_fix_comment(next_line,
-                                                             isstrict):
-                # handle fix format line continuations for F90 or
-                # newer code.  Mixing fix format and free format line
-                # continuations is not allowed nor detected, just
-                # eject warnings.
-                line2 = get_single_line()  # consume next_line as line2
-                if _is_fix_comment(line2, isstrict):
-                    # handle fix format comments inside line continuations
-                    # after the line construction
-                    citem = self.comment_item(line2,
-                                              self.linecount,
-                                              self.linecount)
-                    self.fifo_item.append(citem)
-                else:
-                    # line continuation
-                    newline, qc, had_comment \
-                        = self.handle_inline_comment(line2[6:],
-                                                     self.linecount,
-                                                     qc)
-                    have_comment |= had_comment
-                    lines.append(newline)
-                    endlineno = self.linecount
-                next_line = self.get_next_line()
-            # no character continuation should follows now
-            if qc is not None:
-                message = 'following character continuation: ' \
-                          + '{!r}, expected None.'
-                message = self.format_message('ASSERTION FAILURE(fix)',
-                                              message.format(qc),
-                                              startlineno,
-                                              self.linecount)
-                logging.getLogger(__name__).warning(message)
-            if len(lines) > 1:
-                for i in range(len(lines)):
-                    line = lines[i]
-                    if line.rstrip().endswith('&'):
-                        message = 'free format line continuation character ' \
-                                  + "`&' detected in fix format code"
-                        location = line.rfind('&') + 5
-                        message = self.format_warning_message(message,
-                                                              startlineno + i,
-                                                              startlineno + i,
-                                                              location)
-                        logging.getLogger(__name__).warning(message)
-            return self.line_item(''.join(lines),
-                                  startlineno,
-                                  endlineno,
-                                  label,
-                                  name)
+            return self._fix_statement_item(line, startlineno, label, name)
 
         # line is free format or fixed format with f2py directive (that
         # will be interpretted as free format line).
@@ -1407,6 +1818,177 @@ class FortranReaderBase(object):
                                           startlineno,
                                           endlineno)
             logging.getLogger(__name__).error(message)
+        return self._free_format_item(lines, startlineno, endlineno,
+                                      label, name, have_comment)
+
+    def _f77_statement_item(self, lines, startlineno, label, name):
+        '''
+        Reads any continuation lines of a Fortran 77 statement and
+        creates the item for the statement.
+
+        :param list lines: the code from the initial line.
+        :param int startlineno: the number of the initial line.
+        :param label: the label of the statement.
+        :type label: int or NoneType
+        :param name: the construct name of the statement.
+        :type name: str or NoneType
+
+        :returns: the item.
+        :rtype: :py:class:`fparser.common.readfortran.Line`
+        '''
+        get_single_line = self.get_single_line
+        line = get_single_line(ignore_empty=True, ignore_comments=True)
+        while _is_fix_cont(line):
+            # handle fix format line continuations for F77 code
+            lines.append(line[6:72])
+            line = get_single_line(ignore_empty=True, ignore_comments=True)
+        if line is not None:
+            # Un-consume the line following the statement.
+            self.put_single_line(line)
+        return self.line_item(''.join(lines), startlineno,
+                              self.linecount, label, name)
+
+    def _fix_statement_item(self, line, startlineno, label, name):
+        '''
+        Reads any continuation lines of a (non Fortran 77) fixed-format
+        statement and creates the item for the statement. Inline
+        comments and comment lines within the statement are added to
+        the FIFO item buffer.
+
+        :param str line: the initial line of the statement.
+        :param int startlineno: the number of the initial line.
+        :param label: the label of the statement.
+        :type label: int or NoneType
+        :param name: the construct name of the statement.
+        :type name: str or NoneType
+
+        :returns: the item.
+        :rtype: :py:class:`fparser.common.readfortran.Line`
+        '''
+        get_single_line = self.get_single_line
+        isstrict = self._format.is_strict
+        # handle inline comment
+        newline, qc, _ = self.handle_inline_comment(line[6:], startlineno)
+        lines = [newline]
+        endlineno = startlineno
+        line2 = get_single_line()
+        while line2 is not None:
+            # handle fix format line continuations for F90 or
+            # newer code.  Mixing fix format and free format line
+            # continuations is not allowed nor detected, just
+            # eject warnings.
+            kind = _classify_fix_line(line2, isstrict)
+            if kind == _FIX_COMMENT:
+                # handle fix format comments inside line continuations
+                # after the line construction
+                citem = self.comment_item(line2,
+                                          self.linecount,
+                                          self.linecount)
+                self.fifo_item.append(citem)
+            elif kind == _FIX_CONTINUATION:
+                # line continuation
+                newline, qc, _ = self.handle_inline_comment(line2[6:],
+                                                            self.linecount,
+                                                            qc)
+                lines.append(newline)
+                endlineno = self.linecount
+            else:
+                # Un-consume the line following the statement.
+                self.put_single_line(line2)
+                break
+            line2 = get_single_line()
+        # no character continuation should follows now
+        if qc is not None:
+            message = 'following character continuation: ' \
+                      + '{!r}, expected None.'
+            message = self.format_message('ASSERTION FAILURE(fix)',
+                                          message.format(qc),
+                                          startlineno,
+                                          self.linecount)
+            logging.getLogger(__name__).warning(message)
+        if len(lines) > 1:
+            for i in range(len(lines)):
+                line = lines[i]
+                if line.rstrip().endswith('&'):
+                    message = 'free format line continuation character ' \
+                              + "`&' detected in fix format code"
+                    location = line.rfind('&') + 5
+                    message = self.format_warning_message(message,
+                                                          startlineno + i,
+                                                          startlineno + i,
+                                                          location)
+                    logging.getLogger(__name__).warning(message)
+        return self.line_item(''.join(lines),
+                              startlineno,
+                              endlineno,
+                              label,
+                              name)
+
+    def _scan_fix_statement(self, line):
+        '''
+        Fast path of get_source_item() for fixed-format source. The
+        initial line of a statement is classified (as a comment,
+        continuation or initial line) by a single match of a
+        precompiled regular expression and the label field is checked
+        in the same way, rather than a character at a time. Lines that
+        need special treatment (f2py directives, invalid label fields,
+        construct names without a statement) are left to the general
+        code.
+
+        :param str line: the initial line of the statement.
+
+        :returns: the item or None if the general code must be used \
+                  (in which case nothing has been consumed).
+        :rtype: :py:class:`fparser.common.readfortran.Line` or \
+                :py:class:`fparser.common.readfortran.Comment` or NoneType
+        '''
+        if _F2PY_SEARCH(line):
+            return None
+        startlineno = self.linecount
+        if _classify_fix_line(line, self._format.is_strict) == _FIX_COMMENT:
+            return self.comment_item(line, startlineno, startlineno)
+        if _FIX_LABEL_FIELD_MATCH(line).end() < len(line[:5]):
+            return None
+        label = None
+        name = None
+        field = line[:5].strip()
+        if field:
+            if not field.isdigit():
+                return None
+            label = int(field)
+        if self._format.is_f77:
+            if not line[6:].strip():
+                return None
+            return self._f77_statement_item([line[6:72]], startlineno,
+                                            label, name)
+        match = _CONSTRUCT_NAME_RE.match(line[6:])
+        if match:
+            name = match.group('name')
+            line = line[:6] + line[6:][match.end():].lstrip()
+        if not line[6:].strip():
+            return None
+        return self._fix_statement_item(line, startlineno, label, name)
+
+    def _free_format_item(self, lines, startlineno, endlineno, label, name,
+                          have_comment):
+        '''
+        Creates the item for a free-format statement.
+
+        :param list lines: the code from each line of the statement, \
+                           with comments and continuations removed.
+        :param int startlineno: the number of the first line.
+        :param int endlineno: the number of the last line.
+        :param label: the label of the statement.
+        :type label: int or NoneType
+        :param name: the construct name of the statement.
+        :type name: str or NoneType
+        :param bool have_comment: whether comments were removed from \
+                                  the statement.
+
+        :returns: the item.
+        :rtype: :py:class:`fparser.common.readfortran.Line` or \
+                :py:class:`fparser.common.readfortran.Comment`
+        '''
         line_content = ''.join(lines).strip()
         if line_content:
             return self.line_item(line_content,
@@ -1420,9 +2002,416 @@ class FortranReaderBase(object):
         if name is not None:
             self.error('No construct following construct-name.')
         if have_comment:
-            return next(self)
+            return self._next()
         return self.comment_item('', startlineno, endlineno)
 
+    def _scan_free_statement(self, line):
+        '''
+        Fast path of get_source_item() for free-format source. Each
+        physical line of the statement is split into its code and any
+        trailing comment with a single match of a precompiled regular
+        expression, rather than by examining the line a character at a
+        time (see handle_inline_comment()). Lines that this can not
+        deal with (a character constant that continues onto the next
+        line, a backslash or an f2py directive in a comment) are left
+        to the general code, with any lines read here being put back.
+
+        :param str line: the first line of the statement.
+
+        :returns: the code from each line of the statement, the label, \
+                  the construct name, whether comments were found and \
+                  the number of the last line of the statement, or None \
+                  if the general code must be used.
+        :rtype: 5-tuple of list, int or NoneType, str or NoneType, \
+                bool, int or NoneType
+        '''
+        label = None
+        name = None
+        match = _LABEL_RE.match(line)
+        if match:
+            label = int(match.group('label'))
+            line = line[match.end():]
+        match = _CONSTRUCT_NAME_RE.match(line)
+        if match:
+            name = match.group('name')
+            line = line[match.end():].lstrip()
+        lines = []
+        comments = []
+        consumed = []
+        endlineno = self.linecount
+        while line is not None:
+            lineno = self.linecount
+            if '\\' in line:
+                break
+            end = _FREE_CODE_MATCH(line).end()
+            if end < len(line):
+                if line[end] != '!' or line.startswith('!f2py', end):
+                    break
+                comments.append(self.comment_item(line[end:], lineno,
+                                                  lineno))
+                line = line[:end]
+            # The handling of continuations is the same as in
+            # get_source_item().
+            i = line.rfind('&')
+            if i != -1:
+                line_i1_rstrip = line[i+1:].rstrip()
+            if not lines:
+                if i == -1 or line_i1_rstrip:
+                    lines.append(line)
+                    line = None
+                    continue
+                endlineno = lineno
+                lines.append(line[:i])
+            else:
+                if i == -1 or line_i1_rstrip:
+                    i = len(line)
+                k = line[:i].find('&')
+                if k != 1 and line[:k].lstrip():
+                    k = -1
+                endlineno = lineno
+                lines.append(line[k+1:i])
+                if i == len(line):
+                    line = None
+                    continue
+            # Get the next line of the statement, skipping comment and
+            # blank lines.
+            while True:
+                line = self.get_single_line()
+                if line is None:
+                    break
+                consumed.append(line)
+                line_lstrip = line.lstrip()
+                if line_lstrip.startswith('!'):
+                    comments.append(self.comment_item(line_lstrip,
+                                                      self.linecount,
+                                                      self.linecount))
+                elif line_lstrip:
+                    break
+        else:
+            self.fifo_item.extend(comments)
+            return lines, label, name, bool(comments), endlineno
+        for line in reversed(consumed):
+            self.put_single_line(line)
+        return None
+
+
+def _item_to_record(item):
+    '''
+    Creates a record of an item that can be stored in an item cache
+    (see ItemCache) and from which the item can be rebuilt without
+    processing the source again.
+
+    :param item: the item.
+    :type item: :py:class:`fparser.common.readfortran.Line` or \
+                :py:class:`fparser.common.readfortran.Comment` etc.
+
+    :returns: the record of the item.
+    :rtype: list
+    '''
+    message = item.args[0] if isinstance(item, FortranReaderError) else None
+    if isinstance(item, Comment):
+        return ['C', item.comment, item.span]
+    if isinstance(item, MultiLine):
+        return ['M', item.prefix, item.block, item.suffix, item.span,
+                message]
+    # Make sure that the string replacement map has been computed.
+    strline = item.get_line()
+    return ['L', item.line, item.span, item.label, item.name, strline,
+            dict(item.strlinemap), message]
+
+
+class ItemCache(object):
+    '''
+    A persistent, on-disk cache of the items produced by readers. An
+    entry is keyed by a hash of the content of the source, the format
+    of the source and whether comments are ignored. It holds a record
+    of each item (its text, span, label, name and string replacement
+    map) so that the items can be rebuilt without processing the
+    source again. Entries are stored as JSON files in the cache
+    directory, which is created if it does not exist.
+
+    For example:
+
+    >>> from fparser.common.readfortran import FortranFileReader, ItemCache
+    >>> cache = ItemCache('.fparser_cache')
+    >>> reader = FortranFileReader('myfile.f90', item_cache=cache)
+
+    :param str directory: the directory in which to store the entries.
+    '''
+    # Incremented whenever the format of an entry changes.
+    version = 1
+
+    def __init__(self, directory):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+
+    @staticmethod
+    def digest(content):
+        '''
+        :param content: the complete source.
+        :type content: str or bytes-like object
+
+        :returns: a hash of the content.
+        :rtype: str
+        '''
+        if isinstance(content, six.text_type):
+            content = content.encode('utf8')
+        return hashlib.sha1(content).hexdigest()
+
+    def get_key(self, digest, mode, ignore_comments):
+        '''
+        :param str digest: the hash of the content of the source.
+        :param mode: the format of the source.
+        :type mode: :py:class:`fparser.common.sourceinfo.FortranFormat`
+        :param bool ignore_comments: whether or not comments are ignored.
+
+        :returns: the key of the entry for the source.
+        :rtype: str
+        '''
+        return '{0}-{1}{2}-{3}-v{4}'.format(
+            digest, 'free' if mode.is_free else 'fixed',
+            '-strict' if mode.is_strict else '',
+            'nocomments' if ignore_comments else 'comments', self.version)
+
+    def _path(self, key):
+        return os.path.join(self.directory, key + '.json')
+
+    def load(self, key):
+        '''
+        :param str key: the key of the entry.
+
+        :returns: the entry or None if there is no (valid) entry.
+        :rtype: dict or NoneType
+        '''
+        try:
+            with io.open(self._path(key), 'r', encoding='utf8') as cache_file:
+                entry = json.load(cache_file)
+        except (IOError, OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def store(self, key, entry):
+        '''
+        Stores an entry in the cache. The entry is written to a
+        temporary file which then replaces any existing entry so that
+        concurrent readers never see a partially written entry. Failure
+        to write the entry is logged but is otherwise ignored.
+
+        :param str key: the key of the entry.
+        :param dict entry: the entry.
+        '''
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            handle, tmp_name = tempfile.mkstemp(dir=self.directory,
+                                                suffix='.tmp')
+            with os.fdopen(handle, 'w') as tmp_file:
+                json.dump(entry, tmp_file)
+            getattr(os, 'replace', os.rename)(tmp_name, self._path(key))
+        except (IOError, OSError) as error:
+            logging.getLogger(__name__).warning(
+                "Failed to store item cache entry '%s': %s", key, error)
+            return
+        self.stores += 1
+
+
+class IncludeCache(object):
+    '''
+    A process-wide cache of the items read from files that are
+    included (via INCLUDE lines) in Fortran source. An entry is keyed
+    by the resolved path of the file, its modification time and size
+    (along with the reader options that affect the items produced) and
+    holds the reader used to read the file, and so its decoded lines,
+    plus the items it produced. Including the same file again then
+    only requires these items to be replayed.
+
+    As the items of a file include those of the files that it includes
+    in turn, an entry also records the path, modification time and size
+    of each of those files and is only used if none of them has
+    changed.
+
+    The number of entries is bounded, with the least recently used
+    entry being discarded when the limit is reached. Setting
+    `max_size` to zero disables caching.
+
+    :param int max_size: the maximum number of files to cache.
+    '''
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        # The files included (directly or not) by each of the files
+        # that the current thread is reading, innermost last.
+        self._reading = threading.local()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_reader(self, path, include_dirs=None, ignore_comments=True):
+        '''
+        Provides a reader for an included file, using the cached items
+        for the file if they are available and up to date.
+
+        :param str path: the path of the included file.
+        :param list include_dirs: directories in which to look for \
+                                  files included by this one.
+        :param bool ignore_comments: whether or not to discard comments.
+
+        :returns: an object providing the `next` method of a reader.
+        :rtype: :py:class:`fparser.common.readfortran.ItemReplayReader` \
+                or :py:class:`fparser.common.readfortran.FortranFileReader`
+        '''
+        if self.max_size <= 0:
+            return FortranFileReader(path, include_dirs=include_dirs,
+                                     ignore_comments=ignore_comments)
+        stamp = _file_stamp(os.path.realpath(path))
+        key = stamp + (tuple(include_dirs or []), ignore_comments)
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None and \
+               all(_file_stamp(nested[0]) == nested for nested in entry[2]):
+                # Re-insert to mark as most recently used.
+                self._entries[key] = entry
+                self.hits += 1
+            else:
+                entry = None
+                self.misses += 1
+        if entry is None:
+            stack = getattr(self._reading, 'stack', None)
+            if stack is None:
+                stack = self._reading.stack = []
+            stack.append([])
+            try:
+                reader = FortranFileReader(path, include_dirs=include_dirs,
+                                           ignore_comments=ignore_comments)
+                items = []
+                while True:
+                    try:
+                        items.append(
+                            reader.next(ignore_comments=ignore_comments))
+                    except StopIteration:
+                        break
+            finally:
+                nested = tuple(stack.pop())
+            entry = (reader, items, nested)
+            self._add(key, entry)
+        stack = getattr(self._reading, 'stack', None)
+        if stack:
+            # The file is included by the one being read.
+            stack[-1].append(stamp)
+            stack[-1].extend(entry[2])
+        return ItemReplayReader(entry)
+
+    def _add(self, key, entry):
+        '''
+        Adds an entry to the cache, discarding the least recently used
+        entries if the cache is full.
+
+        :param tuple key: the key of the entry.
+        :param tuple entry: the entry.
+        '''
+        with self._lock:
+            self._entries[key] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        '''
+        :returns: the cache counters (hits, misses, evictions), the \
+                  hit rate and the number of cached files.
+        :rtype: dict
+        '''
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'size': len(self._entries)}
+
+    def clear(self):
+        ''' Removes all entries from the cache and resets the counters. '''
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+class ItemReplayReader(object):
+    '''
+    Replays the items previously read from a file. Each item returned
+    is a copy of the original so that items (which record the results
+    of parsing them) are never shared between parse trees.
+
+    :param entry: the reader that read the file, the items it \
+                  produced and the files that it included.
+    :type entry: (:py:class:`fparser.common.readfortran.FortranReaderBase`, \
+                  list, tuple)
+    '''
+    def __init__(self, entry):
+        self.source_reader, self._items = entry[:2]
+        self._index = 0
+
+    def next(self, ignore_comments=None):
+        '''
+        :param bool ignore_comments: unused as the items were read with \
+                                     the required value.
+
+        :returns: a copy of the next item.
+        :rtype: :py:class:`fparser.common.readfortran.Line` or \
+                :py:class:`fparser.common.readfortran.Comment` etc.
+
+        :raises StopIteration: if there are no more items.
+        '''
+        # pylint: disable=unused-argument
+        if self._index >= len(self._items):
+            raise StopIteration
+        item = self._items[self._index]
+        self._index += 1
+        new_item = item.__class__.__new__(item.__class__)
+        new_item.__dict__.update(item.__dict__)
+        if isinstance(item, Exception):
+            new_item.args = item.args
+        if isinstance(item, Line):
+            new_item.parse_cache = {}
+        return new_item
+
+
+def _file_stamp(path):
+    '''
+    :param str path: the (resolved) path of a file.
+
+    :returns: the path, modification time and size of the file, or \
+              just the path if the file cannot be accessed.
+    :rtype: tuple
+    '''
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return (path,)
+    return (path, stat.st_mtime, stat.st_size)
+
+
+def _map_file(filename):
+    '''
+    Memory-maps a file for reading.
+
+    :param str filename: the name of the file.
+
+    :returns: a read-only map of the file (or an empty bytes object if \
+              the file is empty as such files cannot be mapped).
+    :rtype: :py:class:`mmap.mmap` or bytes
+    '''
+    with io.open(filename, 'rb') as file_object:
+        if os.fstat(file_object.fileno()).st_size == 0:
+            return b''
+        return mmap.mmap(file_object.fileno(), 0, access=mmap.ACCESS_READ)
+
 
 class FortranFileReader(FortranReaderBase):
     '''
@@ -1433,6 +2422,14 @@ class FortranFileReader(FortranReaderBase):
     :param list source_only: Fortran source files to search for modules
                              required by "use" statements.
     :param bool ignore_comments: Whether or not to ignore comments
+    :param bool use_mmap: Whether to memory-map the file rather than \
+    read it. Lines are then decoded on demand and the reader only \
+    keeps the offsets of the lines it has consumed, which reduces \
+    memory use for very large files. Only supported when a filename \
+    is supplied.
+    :param item_cache: a persistent cache of the items read from \
+    source. Only used when a filename is supplied.
+    :type item_cache: :py:class:`fparser.common.readfortran.ItemCache`
 
     For example:
 
@@ -1442,35 +2439,60 @@ class FortranFileReader(FortranReaderBase):
 
     '''
     def __init__(self, file_candidate, include_dirs=None, source_only=None,
-                 ignore_comments=True):
+                 ignore_comments=True, use_mmap=False, item_cache=None):
         # The filename is used as a unique ID. This is then used to cache the
         # contents of the file. Obviously if the file changes content but not
         # filename, problems will ensue.
         #
-        self._remove_on_destruction = False
         self._close_on_destruction = False
+        if use_mmap and not isinstance(file_candidate, six.string_types):
+            raise ValueError('FortranFileReader can only memory-map a file '
+                             'given its filename.')
+        source_lines = None
+        content = None
         if isinstance(file_candidate, six.string_types):
             self.id = file_candidate
-            from fparser.common.utils import make_clean_tmpfile
-            # Handle potential invalid characters in the input. Done
-            # by creating a new file (tmpfile) with any errors removed
-            # (or raising an exception - see make_clean_tmpfile).
-            tmpfile = make_clean_tmpfile(file_candidate)
-            self.file = io.open(tmpfile, 'r', encoding='UTF-8')
+            if use_mmap:
+                buffer = _map_file(file_candidate)
+                self.file = SourceBuffer(buffer)
+                source_lines = self.file.lines
+                # A separate view of the buffer is used so that only
+                # the lines needed to decide the format are decoded.
+                lines = SourceBuffer(buffer)
+                content = buffer
+            else:
+                from fparser.common.utils import read_source_file
+                # Handle potential invalid characters in the input. The
+                # file is read and decoded once with any errors removed
+                # (or an exception raised - see read_source_file). The
+                # same content is then used to determine the source
+                # format and is fed to the reader directly, so no
+                # temporary files are required.
+                source = read_source_file(file_candidate)
+                self.file = six.StringIO(source)
+                lines = fparser.common.sourceinfo.iter_source_lines(source)
+                content = source
+            if os.path.splitext(file_candidate)[1] == '.pyf':
+                mode = fparser.common.sourceinfo.FortranFormat(True, True)
+            else:
+                mode = fparser.common.sourceinfo.get_source_info_iter(lines)
             self._close_on_destruction = True
-            self._remove_on_destruction = True
         elif hasattr(file_candidate,
                      'read') and hasattr(file_candidate,
                                          'name'):  # Is likely a file
             self.id = file_candidate.name
             self.file = file_candidate
+            mode = fparser.common.sourceinfo.get_source_info(file_candidate)
         else:  # Probably not something we can deal with
             message = 'FortranFileReader is used with a filename'
             message += ' or file-like object.'
             raise ValueError(message)
-        mode = fparser.common.sourceinfo.get_source_info(file_candidate)
 
         FortranReaderBase.__init__(self, self.file, mode, ignore_comments)
+        if source_lines is not None:
+            self.source_lines = source_lines
+        if item_cache is not None and content is not None:
+            self.enable_item_cache(item_cache, content)
 
         if include_dirs is None:
             self.include_dirs.insert(0, os.path.dirname(self.id))
@@ -1483,10 +2505,12 @@ class FortranFileReader(FortranReaderBase):
     def __del__(self):
         if self._close_on_destruction:
             self.file.close()
-            if self._remove_on_destruction:
-                os.remove(self.file.name)
 
     def close_source(self):
+        if isinstance(self.file, SourceBuffer):
+            # The buffer holds the source lines so it must remain open
+            # for as long as the reader exists.
+            return
         self.file.close()
 
 
@@ -1499,6 +2523,8 @@ class FortranStringReader(FortranReaderBase):
     :param list source_only: Fortran source files to search for modules
                              required by "use" statements.
     :param bool ignore_comments: Whether or not to ignore comments
+    :param item_cache: a persistent cache of the items read from source.
+    :type item_cache: :py:class:`fparser.common.readfortran.ItemCache`
 
     For example:
 
@@ -1513,7 +2539,7 @@ class FortranStringReader(FortranReaderBase):
 
     '''
     def __init__(self, string, include_dirs=None, source_only=None,
-                 ignore_comments=True):
+                 ignore_comments=True, item_cache=None):
         # The Python ID of the string was used to uniquely identify it for
         # caching purposes. Unfortunately this ID is only unique for the
         # lifetime of the string. In CPython it is the address of the string
@@ -1532,4 +2558,58 @@ class FortranStringReader(FortranReaderBase):
             self.include_dirs = include_dirs[:]
         if source_only is not None:
             self.source_only = source_only[:]
+        if item_cache is not None:
+            self.enable_item_cache(item_cache, string)
         return
+
+
+class FortranBytesReader(FortranReaderBase):
+    '''
+    Reads Fortran source code held in memory as encoded bytes. Lines are
+    decoded as they are read (see :py:class:`SourceBuffer`) so the
+    source is never decoded, copied or hashed as a whole. The buffer
+    is not closed by the reader.
+
+    :param buffer: the encoded source.
+    :type buffer: bytes, memoryview or :py:class:`mmap.mmap`
+    :param str cache_id: a unique identifier for the source, e.g. its \
+    hash in a content-addressed store. If this is not supplied then \
+    the buffer is hashed to create one.
+    :param list include_dirs: List of dirs to search for include files
+    :param list source_only: Fortran source files to search for modules
+                             required by "use" statements.
+    :param bool ignore_comments: Whether or not to ignore comments
+    :param str encoding: the encoding of the source.
+    :param item_cache: a persistent cache of the items read from source.
+    :type item_cache: :py:class:`fparser.common.readfortran.ItemCache`
+
+    For example:
+
+    >>> from fparser.common.readfortran import FortranBytesReader
+    >>> reader = FortranBytesReader(b"program test\\nend program test\\n",
+    ...                             cache_id="test-program")
+
+    '''
+    def __init__(self, buffer, cache_id=None, include_dirs=None,
+                 source_only=None, ignore_comments=True, encoding='utf8',
+                 item_cache=None):
+        if cache_id is None:
+            cache_id = 'bytes-' + hashlib.sha1(buffer).hexdigest()
+        self.id = cache_id
+        source = SourceBuffer(buffer, encoding)
+        # A separate view of the buffer is used so that only the lines
+        # needed to decide the format are decoded.
+        mode = fparser.common.sourceinfo.get_source_info_iter(
+            SourceBuffer(buffer, encoding))
+        FortranReaderBase.__init__(self, source, mode, ignore_comments)
+        self.source_lines = source.lines
+        if include_dirs is not None:
+            self.include_dirs = include_dirs[:]
+        if source_only is not None:
+            self.source_only = source_only[:]
+        if item_cache is not None:
+            self.enable_item_cache(item_cache, buffer)
+
+
+# The cache of included files shared by all readers.
+INCLUDE_CACHE = IncludeCache()
@@ -69,7 +69,6 @@ fixed format. It also tries to differentiate between strict and "pyf" although
 I'm not sure what that is.
 '''
 
-import io
 import os
 import re
 import six
@@ -218,17 +217,49 @@ _HAS_PYF_HEADER = re.compile(r'-[*]-\s*pyf\s*-[*]-', re.I).search
 _FREE_FORMAT_START = re.compile(r'[^c*!]\s*[^\s\d\t]', re.I).match
 
 
-def get_source_info_str(source):
+def iter_source_lines(source):
     '''
-    Determines the format of Fortran source held in a string.
+    Generates the lines of a string one at a time (without their new
+    line characters) so that the whole string need not be split up
+    front.
+
+    :param str source: the string to split into lines.
 
-    Returns a FortranFormat object.
+    :returns: a generator of the lines in the string.
+    :rtype: generator of str
     '''
-    lines = source.splitlines()
-    if not lines:
+    start = 0
+    length = len(source)
+    while start < length:
+        end = source.find('\n', start)
+        if end == -1:
+            yield source[start:]
+            return
+        yield source[start:end]
+        start = end + 1
+
+
+def get_source_info_iter(lines):
+    '''
+    Determines the format of Fortran source provided as an iterable of
+    lines. Lines are consumed one at a time and only until the format
+    has been decided, so there is no need for the whole source to be
+    available (or read) up front.
+
+    :param lines: the lines of source. Trailing new line characters \
+                  are permitted.
+    :type lines: iterable of str
+
+    :returns: the format of the source.
+    :rtype: :py:class:`fparser.common.sourceinfo.FortranFormat`
+    '''
+    lines = iter(lines)
+    try:
+        line = next(lines)
+    except StopIteration:
         return FortranFormat(False, False)
 
-    firstline = lines[0].lstrip()
+    firstline = line.lstrip()
     if _HAS_F_HEADER(firstline):
         return FortranFormat(False, True)
     if _HAS_FIX_HEADER(firstline):
@@ -239,17 +270,31 @@ def get_source_info_str(source):
         return FortranFormat(True, True)
 
     line_tally = 10000  # Check up to this number of non-comment lines
-    is_free = False
-    while line_tally > 0 and lines:
-        line = lines.pop(0).rstrip()
+    while line is not None:
+        line = line.rstrip()
         if line and line[0] != '!':
             line_tally -= 1
             if line[0] != '\t' and _FREE_FORMAT_START(line[:5]) \
                or line[-1:] == '&':
-                is_free = True
+                return FortranFormat(True, False)
+            if line_tally == 0:
                 break
+        line = next(lines, None)
+
+    return FortranFormat(False, False)
 
-    return FortranFormat(is_free, False)
+
+def get_source_info_str(source):
+    '''
+    Determines the format of Fortran source held in a string. Only the
+    lines up to the one that decides the format are examined.
+
+    :param str source: the Fortran source.
+
+    :returns: the format of the source.
+    :rtype: :py:class:`fparser.common.sourceinfo.FortranFormat`
+    '''
+    return get_source_info_iter(iter_source_lines(source))
 
 
 ##############################################################################
@@ -299,9 +344,14 @@ def get_source_info(file_candidate):
         # As such we need to take a note of the current state of the file
         # pointer so we can restore it when we've finished what we're doing.
         #
+        # Lines are read one at a time so only the part of the file
+        # needed to decide the format is read.
+        #
         pointer = file_candidate.tell()
         file_candidate.seek(0)
-        source_info = get_source_info_str(file_candidate.read())
+        empty = file_candidate.read(0)
+        source_info = get_source_info_iter(iter(file_candidate.readline,
+                                                empty))
         file_candidate.seek(pointer)
         return source_info
     else:
@@ -311,14 +361,10 @@ def get_source_info(file_candidate):
         # If it's a string we assume it is a filename. In which case we need
         # to open the named file so we can read it.
         #
-        # It is closed on completion so as to return it to the state it was
-        # found in.
+        # The file is read (and any invalid characters removed) in a
+        # single pass without the need for a temporary copy.
         #
-        from fparser.common.utils import make_clean_tmpfile
-        tmpfile = make_clean_tmpfile(file_candidate)
-        with io.open(tmpfile, 'r', encoding='utf8') as file_object:
-            string = get_source_info_str(file_object.read())
-        os.remove(tmpfile)
-        return string
+        from fparser.common.utils import read_source_file
+        return get_source_info_str(read_source_file(file_candidate))
 
 ##############################################################################
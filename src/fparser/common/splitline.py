@@ -75,7 +75,9 @@ First version created: May 2006
 """
 
 
+import collections
 import re
+import threading
 
 
 class String(str):
@@ -88,13 +90,17 @@ class ParenString(str):
     pass
 
 
-__all__ = ['String', 'string_replace_map', 'splitquote', 'splitparen']
+__all__ = ['String', 'string_replace_map', 'splitquote', 'splitparen',
+           'LineCache', 'STRING_REPLACE_CACHE', 'LineTokens', 'tokenize',
+           'get_tokens', 'TOKENS_CACHE']
 
 _f2py_str_findall = re.compile(r"_F2PY_STRING_CONSTANT_\d+_").findall
 _is_name = re.compile(r'\w*\Z', re.I).match
 _is_simple_str = re.compile(r'\w*\Z', re.I).match
-_f2py_findall = re.compile(
-    r'(_F2PY_STRING_CONSTANT_\d+_|F2PY_EXPR_TUPLE_\d+)').findall
+_f2py_sub = re.compile(
+    r'_F2PY_STRING_CONSTANT_\d+_|F2PY_EXPR_TUPLE_\d+').sub
+_f2py_index_findall = re.compile(
+    r'_F2PY_STRING_CONSTANT_(\d+)_|F2PY_EXPR_TUPLE_(\d+)').findall
 
 
 class string_replace_dict(dict):
@@ -103,44 +109,193 @@ class string_replace_dict(dict):
     by string_replace_map() function.
     """
     def __call__(self, line):
-        for k in _f2py_findall(line):
-            line = line.replace(k, self[k])
-        return line
-
-
-def string_replace_map(line, lower=False,
-                       _cache={'index': 0, 'pindex': 0}):
+        # Replace each placeholder as a whole, as one may be a prefix
+        # of another (e.g. F2PY_EXPR_TUPLE_1 of F2PY_EXPR_TUPLE_10).
+        return _f2py_sub(lambda match: self[match.group()], line)
+
+
+class LineCache(object):
+    '''
+    A bounded cache of the results of a function of a line, such as
+    string_replace_map() or tokenize(), keyed by the arguments of the
+    function. The grammar matching repeatedly examines the same text
+    as it tries alternative rules, so this turns most calls into a
+    dictionary lookup. When the limit is reached the least recently
+    used entry is discarded. Setting `max_size` to zero disables
+    caching.
+
+    :param function: the function whose results are cached.
+    :type function: callable
+    :param int max_size: the maximum number of results to cache.
+    '''
+    def __init__(self, function, max_size=4096):
+        self.function = function
+        self.max_size = max_size
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, *args):
+        '''
+        Provides the result of the function for the supplied arguments,
+        using the cached result if there is one. The result must not be
+        modified by the caller.
+
+        :param args: the arguments of the function.
+
+        :returns: the result of the function.
+        '''
+        if self.max_size <= 0:
+            return self.function(*args)
+        with self._lock:
+            entry = self._entries.pop(args, None)
+            if entry is not None:
+                # Re-insert to mark as most recently used.
+                self._entries[args] = entry
+                self.hits += 1
+                return entry
+            self.misses += 1
+        entry = self.function(*args)
+        with self._lock:
+            self._entries[args] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return entry
+
+    def put(self, entry, *args):
+        '''
+        Records the result of the function for the supplied arguments
+        when it is already known (e.g. derived from another result), so
+        that a later get() does not need to call the function.
+
+        :param entry: the result of the function.
+        :param args: the arguments of the function.
+        '''
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries.pop(args, None)
+            self._entries[args] = entry
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self):
+        '''
+        :returns: the cache counters (hits, misses, evictions), the \
+                  hit rate and the number of cached results.
+        :rtype: dict
+        '''
+        lookups = self.hits + self.misses
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': float(self.hits) / lookups if lookups else 0.0,
+                'size': len(self._entries)}
+
+    def clear(self):
+        ''' Removes all entries from the cache and resets the counters. '''
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+
+def string_replace_map(line, lower=False):
     """
     1) Replaces string constants with symbol `'_F2PY_STRING_CONSTANT_<index>_'`
     2) Replaces (expression) with symbol `(F2PY_EXPR_TUPLE_<index>)`
     Returns a new line and the replacement map.
+
+    The indices are numbered from 1 for each line (after any already
+    present in the line) so the same line is always masked in the
+    same way and the result can be taken from STRING_REPLACE_CACHE.
     """
-    items = []
+    newline, string_map = STRING_REPLACE_CACHE.get(line, bool(lower))
+    # The cached map must not be modified by the caller.
+    return newline, string_replace_dict(string_map)
+
+
+def _string_replace_map(line, lower):
+    """
+    Does the work of string_replace_map() without caching.
+
+    :param str line: the line to mask.
+    :param bool lower: whether to lower-case the parts of the line \
+                       that are not strings.
+
+    :returns: the masked line and the replacement map.
+    :rtype: (str, :py:class:`fparser.common.splitline.string_replace_dict`)
+    """
+    index = 0
+    pindex = 0
+    if 'F2PY_' in line:
+        # Avoid clashing with placeholders in an already-masked line.
+        for sindex, eindex in _f2py_index_findall(line):
+            if sindex:
+                index = max(index, int(sindex))
+            else:
+                pindex = max(pindex, int(eindex))
+    tokens = get_tokens(line)
+    quotes = tokens.quotes
     string_map = string_replace_dict()
     rev_string_map = {}
-    for item in splitquote(line, lower=lower)[0]:
-        if isinstance(item, String) and not _is_simple_str(item[1:-1]):
+    # The masked form of each string, keyed by its start position.
+    masked = {}
+    for start, end in quotes:
+        item = line[start:end]
+        if not _is_simple_str(item[1:-1]):
             key = rev_string_map.get(item)
             if key is None:
-                _cache['index'] += 1
-                index = _cache['index']
+                index += 1
                 key = "_F2PY_STRING_CONSTANT_%s_" % (index)
                 it = item[1:-1]
                 string_map[key] = it
                 rev_string_map[it] = key
-            items.append(item[0]+key+item[-1])
-        else:
-            items.append(item)
-    newline = ''.join(items)
+            masked[start] = item[0]+key+item[-1]
+
+    def render(first, last):
+        '''
+        :returns: line[first:last] with its strings masked.
+        :rtype: str
+        '''
+        if not quotes:
+            return line[first:last].lower() if lower else line[first:last]
+        parts = []
+        pos = first
+        for start, end in quotes:
+            if end <= first:
+                continue
+            if start >= last:
+                break
+            if pos < start:
+                parts.append(line[pos:start].lower() if lower
+                             else line[pos:start])
+            parts.append(masked.get(start, line[start:end]))
+            pos = end
+        if pos < last:
+            parts.append(line[pos:last].lower() if lower
+                         else line[pos:last])
+        return ''.join(parts)
+
     items = []
     expr_keys = []
-    for item in splitparen(newline):
-        if isinstance(item, ParenString) and not _is_name(item[1:-1].strip()):
+    pos = 0
+    for start, end in tokens.brackets:
+        items.append(render(pos, start))
+        if end is None:
+            pos = start
+            break
+        item = render(start, end)
+        if not _is_name(item[1:-1].strip()):
             key = rev_string_map.get(item)
             if key is None:
-                _cache['pindex'] += 1
-                index = _cache['pindex']
-                key = 'F2PY_EXPR_TUPLE_%s' % (index)
+                pindex += 1
+                key = 'F2PY_EXPR_TUPLE_%s' % (pindex)
                 it = item[1:-1].strip()
                 string_map[key] = it
                 rev_string_map[it] = key
@@ -148,6 +303,8 @@ def string_replace_map(line, lower=False,
             items.append(item[0]+key+item[-1])
         else:
             items.append(item)
+        pos = end
+    items.append(render(pos, len(line)))
     found_keys = set()
     for k in expr_keys:
         v = string_map[k]
@@ -162,76 +319,276 @@ def string_replace_map(line, lower=False,
     return ''.join(items), string_map
 
 
+# The body of a string (following its opening quote), including the
+# closing quote if there is one. A backslash escapes the character
+# following it (both inside and outside strings) and a string runs to
+# the end of the line if it is not closed.
+_STRING_BODY_TEMPLATE = r'(?:[^{0}\\]|\\.?)*{0}?'
+
+# The lexical elements found between the strings of a line. A period
+# is only taken as part of a number if it does not start an operator
+# such as `.eq.`.
+_LEXEME_FINDITER = re.compile(r'''
+  (?P<escape>\\.?)
+| (?P<operator>\*\*|//|==|/=|<=|>=|=>|[-+*/<>=]|\.[a-z]+\.)
+| (?P<name>[a-z_]\w*)
+| (?P<number>(?:\d+(?:\.(?![a-z]+\.)\d*)?|\.\d+)(?:[edq][-+]?\d+)?)
+''', re.I | re.S | re.X).finditer
+
+# The compiled tokenizer patterns keyed by the quote and bracket
+# characters.
+_TOKEN_PATTERNS = {}
+
+
+def _token_patterns(quotechars, paren_open, paren_close):
+    '''
+    :param str quotechars: the characters that delimit strings.
+    :param str paren_open: the characters that open brackets.
+    :param str paren_close: the characters that close brackets.
+
+    :returns: the `search` method of a pattern matching the characters \
+              that determine the structure of a line (backslashes, \
+              quotes and brackets) and the `match` methods of the \
+              string body patterns, keyed by quote character.
+    :rtype: (callable, dict)
+    '''
+    key = (quotechars, paren_open, paren_close)
+    patterns = _TOKEN_PATTERNS.get(key)
+    if patterns is None:
+        search = re.compile('[{0}]'.format(re.escape(
+            '\\' + quotechars + paren_open + paren_close))).search
+        body_matches = dict(
+            (char, re.compile(_STRING_BODY_TEMPLATE.format(re.escape(char)),
+                              re.S).match) for char in quotechars)
+        patterns = (search, body_matches)
+        _TOKEN_PATTERNS[key] = patterns
+    return patterns
+
+
+def _is_escaped(line, pos, first):
+    '''
+    :param str line: a line.
+    :param int pos: a position in the line.
+    :param int first: the first position that may hold a backslash.
+
+    :returns: whether the character at `pos` is preceded by an odd \
+              number of backslashes.
+    :rtype: bool
+    '''
+    count = 0
+    while pos - count > first and line[pos - count - 1] == '\\':
+        count += 1
+    return count % 2 == 1
+
+
+class LineTokens(object):
+    '''
+    The token table of a line, as produced in a single pass by
+    tokenize(). Positions are indices into the line and spans are
+    (start, end) pairs with `end` exclusive. Only tokens outside
+    strings are recorded and "top-level" means not within brackets.
+
+    The strings and brackets are found by tokenize(). The operators
+    are only found, from the parts of the line between the strings,
+    when first asked for.
+
+    :param str line: the line that was tokenized.
+    '''
+    def __init__(self, line):
+        self.line = line
+        # The quote character of a string left open at the end of the
+        # line (or None).
+        self.stopchar = None
+        # The spans of the strings, including their quotes.
+        self.quotes = []
+        # The spans of the top-level bracketed parts. The end is None
+        # for brackets that are not closed.
+        self.brackets = []
+        # The position of the matching closing bracket of each opening
+        # bracket that is closed.
+        self.pairs = {}
+        self._openings = None
+        self._operators = None
+
+    def opening(self, pos):
+        '''
+        :param int pos: the position of a closing bracket.
+
+        :returns: the position of the opening bracket that it closes \
+                  (or None if there is none).
+        :rtype: int or NoneType
+        '''
+        if self._openings is None:
+            self._openings = dict((close, start) for start, close
+                                  in self.pairs.items())
+        return self._openings.get(pos)
+
+    @property
+    def operators(self):
+        '''
+        Finds the top-level (candidate) operators in the parts of the
+        line between its strings.
+
+        :returns: the spans of the operators.
+        :rtype: list of (int, int)
+        '''
+        if self._operators is None:
+            operators = []
+            line = self.line
+            # The top-level bracketed parts, those that are not closed
+            # running to the end of the line.
+            brackets = [(start, len(line) if end is None else end)
+                        for start, end in self.brackets]
+            index = 0
+            gaps = [end for _, end in self.quotes]
+            gaps = zip([0] + gaps, [start for start, _ in self.quotes] +
+                       [len(line)])
+            for first, last in gaps:
+                for match in _LEXEME_FINDITER(line, first, last):
+                    if match.lastgroup != 'operator':
+                        continue
+                    start = match.start()
+                    while index < len(brackets) and \
+                            brackets[index][1] <= start:
+                        index += 1
+                    if index < len(brackets) and brackets[index][0] <= start:
+                        # Within brackets.
+                        continue
+                    operators.append(match.span())
+            self._operators = operators
+        return self._operators
+
+    def split_quotes(self, lower=False):
+        '''
+        :param bool lower: whether to lower-case the parts of the line \
+                           that are not strings.
+
+        :returns: the line split into strings and the parts between them.
+        :rtype: list of str and :py:class:`fparser.common.splitline.String`
+        '''
+        line = self.line
+        items = []
+        pos = 0
+        for start, end in self.quotes:
+            if pos < start:
+                items.append(line[pos:start].lower() if lower
+                             else line[pos:start])
+            items.append(String(line[start:end]))
+            pos = end
+        if pos < len(line):
+            items.append(line[pos:].lower() if lower else line[pos:])
+        return items
+
+    def split_brackets(self):
+        '''
+        :returns: the line split into top-level bracketed parts and the \
+                  parts between them.
+        :rtype: list of str and \
+                :py:class:`fparser.common.splitline.ParenString`
+        '''
+        line = self.line
+        items = []
+        pos = 0
+        for start, end in self.brackets:
+            items.append(line[pos:start])
+            if end is None:
+                pos = start
+                break
+            items.append(ParenString(line[start:end]))
+            pos = end
+        if pos != len(line):
+            items.append(line[pos:])
+        return items
+
+
+def tokenize(line, stopchar=None, quotechars='"\'', paren_open="([",
+             paren_close=")]"):
+    '''
+    Tokenizes a line in a single pass, recording its strings and
+    bracket structure (including the matching pairs of brackets) in a
+    :py:class:`fparser.common.splitline.LineTokens` table.
+
+    :param str line: the line to tokenize.
+    :param stopchar: the quote character of a string continued from \
+                     a previous line (or None).
+    :type stopchar: str or NoneType
+    :param str quotechars: the characters that delimit strings.
+    :param str paren_open: the characters that open brackets.
+    :param str paren_close: the characters that close brackets. \
+                            paren_open[x] is closed by paren_close[x].
+
+    :returns: the token table of the line.
+    :rtype: :py:class:`fparser.common.splitline.LineTokens`
+    '''
+    search, body_matches = _token_patterns(quotechars, paren_open,
+                                           paren_close)
+    tokens = LineTokens(line)
+    quotes = tokens.quotes
+    pos = 0
+    if stopchar is not None:
+        # The line starts within a string. A quote at its very start
+        # continues the string rather than closing it.
+        first = 1 if line[:1] == stopchar else 0
+        pos = body_matches[stopchar](line, first).end()
+        if line:
+            quotes.append((0, pos))
+        if pos == first or line[pos-1] != stopchar or \
+           _is_escaped(line, pos-1, first):
+            tokens.stopchar = stopchar
+            return tokens
+    brackets = tokens.brackets
+    pairs = tokens.pairs
+    # The expected closing bracket and the position of each open bracket.
+    stack = []
+    opens = []
+    while True:
+        match = search(line, pos)
+        if match is None:
+            break
+        start = match.start()
+        char = line[start]
+        pos = start + 1
+        if char == '\\':
+            # Skip the escaped character.
+            pos += 1
+        elif char in quotechars:
+            pos = body_matches[char](line, pos).end()
+            quotes.append((start, pos))
+            if pos == start + 1 or line[pos-1] != char or \
+               _is_escaped(line, pos-1, start+1):
+                tokens.stopchar = char
+        elif char in paren_open:
+            if not stack:
+                brackets.append((start, None))
+            stack.append(paren_close[paren_open.index(char)])
+            opens.append(start)
+        elif stack and char == stack[-1]:
+            stack.pop()
+            pairs[opens.pop()] = start
+            if not stack:
+                brackets[-1] = (brackets[-1][0], pos)
+    return tokens
+
+
 def splitquote(line, stopchar=None, lower=False, quotechars='"\''):
     """
-    Fast LineSplitter
+    Splits a line into strings and the parts between them. This is a
+    view of the table produced by tokenize().
+
+    :param str line: the string to split.
+    :param stopchar: the quote character of a string continued from \
+                     a previous line (or None).
+    :type stopchar: str or NoneType
+    :param bool lower: whether to lower-case the parts that are not \
+                       strings.
+    :param str quotechars: the characters that delimit strings.
+
+    :returns: the parts of the line and the quote character of a \
+              string left open at its end (or None).
+    :rtype: (list, str or NoneType)
     """
-    items = []
-    i = 0
-    while 1:
-        try:
-            char = line[i]
-            i += 1
-        except IndexError:
-            break
-        l = []
-        l_append = l.append
-        nofslashes = 0
-        if stopchar is None:
-            # search for string start
-            while 1:
-                if char in quotechars and not nofslashes % 2:
-                    stopchar = char
-                    i -= 1
-                    break
-                if char == '\\':
-                    nofslashes += 1
-                else:
-                    nofslashes = 0
-                l_append(char)
-                try:
-                    char = line[i]
-                    i += 1
-                except IndexError:
-                    break
-            if not l:
-                continue
-            item = ''.join(l)
-            if lower:
-                item = item.lower()
-            items.append(item)
-            continue
-        if char == stopchar:
-            # string starts with quotechar
-            l_append(char)
-            try:
-                char = line[i]
-                i += 1
-            except IndexError:
-                if l:
-                    item = String(''.join(l))
-                    items.append(item)
-                break
-        # else continued string
-        while 1:
-            if char == stopchar and not nofslashes % 2:
-                l_append(char)
-                stopchar = None
-                break
-            if char == '\\':
-                nofslashes += 1
-            else:
-                nofslashes = 0
-            l_append(char)
-            try:
-                char = line[i]
-                i += 1
-            except IndexError:
-                break
-        if l:
-            item = String(''.join(l))
-            items.append(item)
-    return items, stopchar
+    tokens = tokenize(line, stopchar, quotechars)
+    return tokens.split_quotes(lower), tokens.stopchar
 
 
 def splitparen(line, paren_open="([", paren_close=")]"):
@@ -239,6 +596,7 @@ def splitparen(line, paren_open="([", paren_close=")]"):
     Splits a line into top-level parenthesis and not-parenthesised
     parts. E.g.: "a( (1+2)*3) = b(x)" becomes:
     ["a", "( (1+2)*3)", " = b", "(x)"]
+    This is a view of the table produced by tokenize().
     :param str line: the string to split.
     :param str paren_open: The characters that define an open parentheses.
     :param str paren_close: The characters that define a closing parentheses.
@@ -249,56 +607,20 @@ def splitparen(line, paren_open="([", paren_close=")]"):
     """
 
     assert len(paren_open) == len(paren_close)
+    return tokenize(line, paren_open=paren_open,
+                    paren_close=paren_close).split_brackets()
 
-    items = []   # Result list
-    num_backslashes = 0   # Counts consecutive "\" characters
-    # Empty if outside quotes, or set to the starting (and therefore
-    # also the ending) quote character while reading text inside quotes.
-    inside_quotes_char = ""
-    start = 0    # Index of start of current part.
-    stack = []   # Stack keeping track of required closing brackets
-
-    for idx, char in enumerate(line):
-        if char == "\\":
-            num_backslashes = (num_backslashes+1) % 2
-            continue
-
-        # We had an odd number of \, so the next character is neither
-        # a real quote or parenthesis character, and can just be added.
-        if num_backslashes == 1:
-            num_backslashes = 0
-            continue
-
-        # If we are reading a quote, keep on reading till closing
-        # quote is reached
-        if inside_quotes_char != '':
-            # Reset inside_quotes_char if we find the closing quote
-            if char == inside_quotes_char:
-                inside_quotes_char = ''
-            continue
-
-        if char == "\'" or char == '"':
-            inside_quotes_char = char
-            continue
-
-        pos = paren_open.find(char)
-        if pos > -1:
-            if len(stack) == 0:
-                # New part starts:
-                items.append(line[start:idx])
-                start = idx
-            stack.append(paren_close[pos])
-            continue
-
-        # Found closing bracket
-        if len(stack) > 0 and char == stack[-1]:
-            stack.pop()
-            if len(stack) == 0:
-                # Found last closing bracket
-                items.append(ParenString(line[start:idx+1]))
-                start = idx+1
-
-    # Add any leftover characters as a separate item
-    if start != len(line):
-        items.append(line[start:])
-    return items
+
+def get_tokens(line):
+    '''
+    :param str line: a line.
+
+    :returns: the (cached) token table of the line, which must not be \
+              modified.
+    :rtype: :py:class:`fparser.common.splitline.LineTokens`
+    '''
+    return TOKENS_CACHE.get(line)
+
+
+STRING_REPLACE_CACHE = LineCache(_string_replace_map)
+TOKENS_CACHE = LineCache(tokenize)
@@ -48,7 +48,8 @@ import tempfile
 
 import pytest
 
-from fparser.common.readfortran import FortranFileReader, FortranStringReader
+from fparser.common.readfortran import FortranFileReader, \
+    FortranStringReader, FortranReaderBase
 import fparser.common.sourceinfo
 import fparser.common.tests.logging_utils
 
@@ -507,6 +508,152 @@ def test_include6(tmpdir, ignore_comments):
                         expected, tmpdir, ignore_comments=ignore_comments)
 
 
+def test_include_cache(tmpdir, monkeypatch):
+    '''Check that a file included more than once is read once and its
+    items replayed (as copies) from the include cache, that the cache is
+    bounded and that a modified file is read again.
+
+    '''
+    from fparser.common.readfortran import IncludeCache, ItemReplayReader
+    cache = IncludeCache(max_size=1)
+    monkeypatch.setattr("fparser.common.readfortran.INCLUDE_CACHE", cache)
+    include_file = tmpdir.join("prog.inc")
+    include_file.write("print *, 'Hello'\n")
+    other_file = tmpdir.join("other.inc")
+    other_file.write("print *, 'Bye'\n")
+    fortran_code = ("program test\n"
+                    "  include 'prog.inc'\n"
+                    "  include 'prog.inc'\n"
+                    "  include 'other.inc'\n"
+                    "  include 'prog.inc'\n"
+                    "end program")
+    reader = FortranStringReader(fortran_code, include_dirs=[str(tmpdir)])
+    items = [item for item in reader]
+    assert [item.line for item in items] == [
+        "program test", "print *, 'Hello'", "print *, 'Hello'",
+        "print *, 'Bye'", "print *, 'Hello'", "end program"]
+    # Replayed items are distinct objects.
+    assert items[1] is not items[2]
+    assert items[1].reader is items[2].reader
+    assert cache.stats() == {'hits': 1, 'misses': 3, 'evictions': 2,
+                             'hit_rate': 0.25, 'size': 1}
+    # Changing the file (and so its size) results in it being re-read.
+    include_file.write("print *, 'Hello again'\n")
+    cache.max_size = 10
+    path = str(include_file)
+    replay = cache.get_reader(path)
+    assert isinstance(replay, ItemReplayReader)
+    assert replay.next().line == "print *, 'Hello again'"
+    with pytest.raises(StopIteration):
+        replay.next()
+    assert cache.get_reader(path).next().line == "print *, 'Hello again'"
+    assert cache.stats()['hits'] == 2
+    cache.clear()
+    assert cache.stats() == {'hits': 0, 'misses': 0, 'evictions': 0,
+                             'hit_rate': 0.0, 'size': 0}
+    # A maximum size of zero disables the cache.
+    cache.max_size = 0
+    assert isinstance(cache.get_reader(path), FortranFileReader)
+
+
+def test_include_cache_nested(tmpdir, monkeypatch):
+    '''Check that the cached items of an included file are not used if a
+    file that it includes in turn has changed.
+
+    '''
+    from fparser.common.readfortran import IncludeCache
+    cache = IncludeCache()
+    monkeypatch.setattr("fparser.common.readfortran.INCLUDE_CACHE", cache)
+    tmpdir.join("b.inc").write("include 'c.inc'\n")
+    nested_file = tmpdir.join("c.inc")
+    nested_file.write("integer :: old\n")
+    fortran_code = ("program test\n"
+                    "  include 'b.inc'\n"
+                    "end program")
+
+    def read():
+        ''' :returns: the lines read from the program. '''
+        reader = FortranStringReader(fortran_code,
+                                     include_dirs=[str(tmpdir)])
+        return [item.line for item in reader]
+
+    assert read() == ["program test", "integer :: old", "end program"]
+    assert read() == ["program test", "integer :: old", "end program"]
+    assert cache.stats()['hits'] == 1
+    nested_file.write("integer :: new, newer\n")
+    assert read() == ["program test", "integer :: new, newer",
+                      "end program"]
+    assert cache.stats()['hits'] == 1
+    assert read() == ["program test", "integer :: new, newer",
+                      "end program"]
+    assert cache.stats()['hits'] == 2
+
+
+def test_item_cache(tmpdir, monkeypatch):
+    '''Check that the items read from source are stored in a persistent
+    item cache and that, when the same source is read again, the items
+    are rebuilt from the cache rather than from source.
+
+    '''
+    from fparser.common.readfortran import ItemCache, FortranReaderBase
+    cache = ItemCache(str(tmpdir.join("cache")))
+    fortran_code = ("program test ! a comment\n"
+                    "  a = 'x'; b = (c + 1)\n"
+                    "  loop: do i = 1, 2\n"
+                    "10  print *, 'Hello'\n"
+                    "  end do loop\n"
+                    "end program")
+
+    def read_items(ignore_comments):
+        ''' Returns a representation of the items read from the source. '''
+        reader = FortranStringReader(fortran_code, item_cache=cache,
+                                     ignore_comments=True)
+        items = []
+        for item in iter(lambda: reader.get_item(ignore_comments), None):
+            items.append((repr(item), getattr(item, "strline", None),
+                          getattr(item, "strlinemap", None)))
+        return items, reader.linecount, len(reader.source_lines)
+
+    expected = read_items(False)
+    assert cache.misses == 1 and cache.stores == 1
+    assert len(expected[0]) == 8
+    # Fail if the source is processed again.
+    monkeypatch.setattr(FortranReaderBase, "get_source_item", None)
+    assert read_items(False) == expected
+    # Comments are always stored so can be dropped when replaying.
+    assert [item for item in expected[0] if "Comment" not in item[0]] == \
+        read_items(True)[0]
+    assert cache.hits == 2 and cache.stores == 1
+    # The same source read with a different format is not in the cache
+    # (so reading fails as the source can not be processed).
+    reader = FortranStringReader(fortran_code, item_cache=cache)
+    reader.set_format(fparser.common.sourceinfo.FortranFormat(True, True))
+    with pytest.raises(StopIteration):
+        reader.next()
+    assert cache.misses == 2 and cache.stores == 1
+
+
+def test_item_cache_errors(tmpdir, caplog):
+    '''Check that a failure to store an item cache entry is logged and
+    that an item cache can not be enabled once items have been read.
+
+    '''
+    from fparser.common.readfortran import ItemCache, FortranReaderError
+    cache_dir = tmpdir.join("cache")
+    cache_dir.write("not a directory")
+    cache = ItemCache(str(cache_dir))
+    reader = FortranStringReader("a = 1", item_cache=cache)
+    assert reader.next().line == "a = 1"
+    with pytest.raises(StopIteration):
+        reader.next()
+    assert cache.stores == 0
+    assert "Failed to store item cache entry" in caplog.text
+    with pytest.raises(FortranReaderError) as excinfo:
+        reader.enable_item_cache(cache, "a = 1")
+    assert ("An item cache must be enabled before any items are read."
+            in str(excinfo.value))
+
+
 def test_get_item(ignore_comments):
     '''Check the get_item() function works as expected. Test with and
     without comments being ignored.
@@ -588,6 +735,107 @@ def test_multi_put_item(ignore_comments):
         assert filo_line == orig_lines.pop(-1)
     assert not orig_lines
 
+
+def test_checkpoint_rewind(ignore_comments):
+    '''Check that the reader can be returned to a checkpoint, that
+    nested checkpoints work and that an invalid checkpoint is rejected.
+    Test with and without ignoring comments.
+
+    '''
+    from fparser.common.readfortran import FortranReaderError
+    code = ("program test\n"
+            "  ! prog comment 1\n"
+            "  a = 1\n"
+            "  ! prog comment 2\n"
+            "  b = 2\n"
+            "  c = 3\n"
+            "  d = 4\n"
+            "end program")
+    reader = FortranStringReader(code, ignore_comments=ignore_comments)
+    first = reader.get_item()
+    outer = reader.checkpoint()
+    orig_lines = [reader.get_item(), reader.get_item()]
+    inner = reader.checkpoint()
+    last_line = reader.get_item()
+    reader.rewind(inner)
+    assert reader.get_item() is last_line
+    reader.rewind(outer)
+    assert reader.pending_items[:3] == orig_lines + [last_line]
+    assert [reader.get_item() for _ in range(3)] == orig_lines + [last_line]
+    assert not reader.pending_items
+    # A released checkpoint leaves the reader where it is.
+    checkpoint = reader.checkpoint()
+    reader.release(checkpoint)
+    assert reader.get_item() is not first
+    with pytest.raises(FortranReaderError) as err:
+        reader.rewind(-1)
+    assert "Invalid reader checkpoint '-1'" in str(err.value)
+
+
+def test_item_log_trimmed(monkeypatch):
+    '''Check that the log of items read is trimmed when there are no
+    outstanding checkpoints and that items may still be put back.
+
+    '''
+    monkeypatch.setattr("fparser.common.readfortran._ITEM_LOG_SIZE", 2)
+    code = "\n".join("a = {0}".format(idx) for idx in range(10))
+    reader = FortranStringReader(code)
+    items = [reader.get_item() for _ in range(5)]
+    assert len(reader._item_log) <= 3
+    for item in reversed(items):
+        reader.put_item(item)
+    assert [reader.get_item() for _ in range(5)] == items
+    checkpoint = reader.checkpoint()
+    items = [reader.get_item() for _ in range(5)]
+    reader.rewind(checkpoint)
+    assert [reader.get_item() for _ in range(5)] == items
+    assert reader.get_item() is None
+
+
+def test_free_form_fast_path(ignore_comments, monkeypatch):
+    '''Check that the fast path for free-format statements produces the
+    same items as the general code, including for the statements it
+    leaves to the general code.
+
+    '''
+    code = ("program test ! a comment\n"
+            "10 a = 'b!c' // \"d\"\"e\" ! trailing comment\n"
+            "  loop: do i = 1, 2\n"
+            "    call foo(a, & ! comment\n"
+            "! comment line\n"
+            "\n"
+            "             & b); x = 1\n"
+            "    s = 'split &\n"
+            "        &string' ! comment\n"
+            "    t = 'a\\'b'\n"
+            "    u = 1 !f2py + 1\n"
+            "  end do loop\n"
+            "end program test\n")
+
+    def read_items(fast_path):
+        ''' Returns a representation of the items read from the code. '''
+        reader = FortranStringReader(code, ignore_comments=ignore_comments)
+        reader.free_form_fast_path = fast_path
+        return ([(str(item), item.span) for item in reader],
+                reader.linecount, reader.f2py_comment_lines)
+
+    expected = read_items(False)
+    scan_calls = []
+    scan = FortranReaderBase._scan_free_statement
+
+    def scan_free_statement(reader, line):
+        ''' Records whether the fast path was used. '''
+        result = scan(reader, line)
+        scan_calls.append(result is not None)
+        return result
+    monkeypatch.setattr(FortranReaderBase, "_scan_free_statement",
+                        scan_free_statement)
+    assert read_items(True) == expected
+    # The split string, the backslash and the f2py directive are left to
+    # the general code.
+    assert scan_calls.count(False) == 3
+    assert scan_calls.count(True) == 6
+
 # Issue 177: get_item(ignore_comments) - how does ignore_comments affect
 # processing?
 
@@ -640,6 +888,74 @@ def test_filename_reader():
         raise
 
 
+##############################################################################
+
+def test_filename_reader_no_tmpfile(tmpdir, monkeypatch):
+    '''
+    Tests that reading a Fortran source file given its filename does not
+    create any temporary files and that invalid characters are removed.
+    '''
+    def no_tmpfile(*args, **kwargs):
+        ''' Fails if a temporary file is requested. '''
+        raise AssertionError("A temporary file was created")
+    monkeypatch.setattr(tempfile, "NamedTemporaryFile", no_tmpfile)
+
+    filename = str(tmpdir.join("bad_char.f90"))
+    with io.open(filename, mode='wb') as source_file:
+        source_file.write(b"program test\n  a = 1\xca\nend program test\n")
+    unit_under_test = FortranFileReader(filename)
+    assert unit_under_test.format == \
+        fparser.common.sourceinfo.FortranFormat(True, False)
+    assert [item.line for item in unit_under_test] == \
+        ["program test", "a = 1", "end program test"]
+
+
+##############################################################################
+
+def test_filename_reader_mmap(tmpdir):
+    '''
+    Tests that a memory-mapped Fortran source file provides the same
+    items as a file that is read and that consumed lines are available
+    (decoded on demand) through source_lines.
+    '''
+    from fparser.common.readfortran import SourceLines
+    filename = str(tmpdir.join("mapped.f90"))
+    with io.open(filename, mode='w', encoding='UTF-8') as source_file:
+        source_file.write(FULL_FREE_SOURCE)
+
+    unit_under_test = FortranFileReader(filename, ignore_comments=False,
+                                        use_mmap=True)
+    assert isinstance(unit_under_test.source_lines, SourceLines)
+    expected = FortranFileReader(filename, ignore_comments=False)
+    assert unit_under_test.format == expected.format
+    assert [repr(item) for item in unit_under_test] == \
+        [repr(item) for item in expected]
+    assert list(unit_under_test.source_lines) == expected.source_lines
+    assert unit_under_test.source_lines[-1] == "end program test"
+    assert unit_under_test.source_lines[3:6] == ["", "program test", ""]
+    with pytest.raises(IndexError):
+        _ = unit_under_test.source_lines[len(expected.source_lines)]
+    message = unit_under_test.format_message("ERROR", "here", 5, 5)
+    assert "    5:program test <== here" in message
+    assert message == expected.format_message("ERROR", "here", 5, 5)
+
+
+def test_mmap_reader_empty_and_invalid(tmpdir):
+    '''
+    Tests that an empty file can be memory-mapped and that memory-mapping
+    is rejected when a file object is supplied.
+    '''
+    filename = str(tmpdir.join("empty.f90"))
+    io.open(filename, mode='w').close()
+    unit_under_test = FortranFileReader(filename, use_mmap=True)
+    assert unit_under_test.get_item() is None
+    assert not unit_under_test.source_lines
+    with io.open(filename, mode='r') as source_file:
+        with pytest.raises(ValueError) as err:
+            _ = FortranFileReader(source_file, use_mmap=True)
+    assert "can only memory-map a file given its filename" in str(err.value)
+
+
 ##############################################################################
 
 def test_file_reader():
@@ -691,6 +1007,31 @@ def test_string_reader():
         assert unit_under_test.get_single_line(ignore_empty=True) == expected
 
 
+@pytest.mark.parametrize("make_buffer", [bytes, bytearray, memoryview])
+def test_bytes_reader(make_buffer):
+    '''
+    Tests that Fortran source can be read from encoded bytes, that the
+    lines read are only held in the buffer and that the identifier is
+    either supplied or computed from the content.
+    '''
+    from fparser.common.readfortran import FortranBytesReader, SourceLines
+    buffer = make_buffer(FULL_FREE_SOURCE.encode('utf8'))
+    unit_under_test = FortranBytesReader(buffer, cache_id="my-source")
+    assert unit_under_test.id == "my-source"
+    expected = fparser.common.sourceinfo.FortranFormat(True, False)
+    assert unit_under_test.format == expected
+    for expected in FULL_FREE_EXPECTED:
+        assert unit_under_test.get_single_line(ignore_empty=True) == expected
+    assert isinstance(unit_under_test.source_lines, SourceLines)
+    assert unit_under_test.source_lines[-1] == FULL_FREE_EXPECTED[-1]
+    assert unit_under_test.get_single_line() is None
+    reader = FortranBytesReader(buffer, ignore_comments=False)
+    assert reader.id.startswith("bytes-")
+    assert reader.id == FortranBytesReader(buffer).id
+    assert [item.line for item in reader if item.line] == [
+        line.strip() for line in FULL_FREE_EXPECTED]
+
+
 ##############################################################################
 
 def test_inherited_f77():
@@ -856,3 +1197,57 @@ cComment
     assert reader.format.mode == 'fix', repr(reader.format.mode)
     for item in reader:
         assert str(item) == expected.pop(0)
+
+
+@pytest.mark.parametrize("isstrict", [True, False])
+def test_classify_fix_line(isstrict):
+    '''
+    Tests that the classification of fixed-format lines agrees with
+    _is_fix_comment() and _is_fix_cont().
+    '''
+    from fparser.common.readfortran import _classify_fix_line, \
+        _is_fix_comment, _is_fix_cont, _FIX_COMMENT, _FIX_CONTINUATION, \
+        _FIX_INITIAL
+    for line in ["", "c", "C comment", "* star", "! bang", "   ! bang",
+                 "     !", "     &", "     1 x", "    !", " \f   !",
+                 "      x = 1 ! comment", "10    continue", " c", "#if"]:
+        if _is_fix_comment(line, isstrict):
+            expected = _FIX_COMMENT
+        elif _is_fix_cont(line):
+            expected = _FIX_CONTINUATION
+        else:
+            expected = _FIX_INITIAL
+        assert _classify_fix_line(line, isstrict) == expected, repr(line)
+
+
+@pytest.mark.parametrize("isstrict", [True, False])
+def test_fixed_form_fast_path(ignore_comments, isstrict):
+    '''
+    Tests that the fast path for fixed-format statements produces the
+    same items as the general code.
+    '''
+    code = ("c comment\n"
+            "      subroutine foo(a,\n"
+            "! comment line\n"
+            "     &               b)\n"
+            "   10 a = 'b!c' ! inline comment\n"
+            "      call bar(a, 5hhello)\n"
+            "      s = 'split\n"
+            "     & string'\n"
+            "cf2py intent(in) a\n"
+            "      x = 1 !f2py + 1\n"
+            "  ab  y = 2\n"
+            "\n"
+            "      end\n")
+
+    def read_items(fast_path):
+        ''' Returns a representation of the items read from the code. '''
+        reader = FortranStringReader(code, ignore_comments=ignore_comments)
+        reader.set_format(
+            fparser.common.sourceinfo.FortranFormat(False, isstrict))
+        reader.fixed_form_fast_path = fast_path
+        return ([(str(item), item.span) for item in reader],
+                reader.linecount, reader.f2py_comment_lines,
+                str(reader.format))
+
+    assert read_items(True) == read_items(False)
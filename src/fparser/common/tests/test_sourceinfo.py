@@ -47,7 +47,8 @@ import pytest
 import six
 
 from fparser.common.sourceinfo import FortranFormat, \
-                                      get_source_info_str, get_source_info
+                                      get_source_info_str, get_source_info, \
+                                      get_source_info_iter, iter_source_lines
 
 
 ##############################################################################
@@ -280,6 +281,39 @@ def test_get_source_info_str(header, content):
         assert source_info == content[1]
 
 
+##############################################################################
+
+def test_get_source_info_iter_stops_early():
+    '''
+    Tests that lines are only consumed until the format is decided.
+    '''
+    lines = iter(["! A comment", "program main", "      end program main"])
+    assert get_source_info_iter(lines) == FortranFormat(True, False)
+    assert list(lines) == ["      end program main"]
+    lines = iter(["! -*- f77 -*-", "      program main"])
+    assert get_source_info_iter(lines) == FortranFormat(False, True)
+    assert list(lines) == ["      program main"]
+    assert get_source_info_iter([]) == FortranFormat(False, False)
+
+
+def test_get_source_info_iter_tally():
+    '''
+    Tests that at most 10000 non-comment lines are examined.
+    '''
+    lines = ["      x = 1\n"] * 10000 + ["x = 1\n"]
+    assert get_source_info_iter(lines) == FortranFormat(False, False)
+    assert get_source_info_iter(lines[1:]) == FortranFormat(True, False)
+
+
+def test_iter_source_lines():
+    '''
+    Tests that a string is split into lines lazily.
+    '''
+    assert list(iter_source_lines("")) == []
+    assert list(iter_source_lines("a\n\nb")) == ["a", "", "b"]
+    assert list(iter_source_lines("a\nb\n")) == ["a", "b"]
+
+
 ##############################################################################
 
 # Another parameterised test fixture. See "header" above.
@@ -71,7 +71,8 @@ Test parsing single Fortran lines.
 
 """
 
-from fparser.common.splitline import splitparen, splitquote, string_replace_map
+from fparser.common.splitline import splitparen, splitquote, \
+    string_replace_map, STRING_REPLACE_CACHE, tokenize
 
 
 def test_splitparen():
@@ -138,3 +139,83 @@ def test_string_replace_map():
     result, string_map = string_replace_map('a()')
     assert result == 'a()'
     assert string_map == {}
+
+
+def test_string_replace_map_deterministic():
+    '''Tests that string_replace_map numbers its placeholders afresh
+    for each line and avoids any placeholders already in the line.'''
+    line = 'a = b("x y", (c+d)) + "p q"'
+    result, string_map = string_replace_map(line)
+    assert result == 'a = b(F2PY_EXPR_TUPLE_1) + "_F2PY_STRING_CONSTANT_2_"'
+    assert string_map == {'F2PY_EXPR_TUPLE_1': '"x y", (c+d)',
+                          '_F2PY_STRING_CONSTANT_2_': 'p q'}
+    assert string_replace_map(line) == (result, string_map)
+    assert string_map(result) == line
+    # Masking an already-masked line must not re-use its placeholders.
+    result, string_map = string_replace_map('(F2PY_EXPR_TUPLE_3) + (a+b)')
+    assert result == '(F2PY_EXPR_TUPLE_3) + (F2PY_EXPR_TUPLE_4)'
+    assert string_map == {'F2PY_EXPR_TUPLE_4': 'a+b'}
+
+
+def test_string_replace_cache():
+    '''Tests the LRU cache used by string_replace_map.'''
+    cache = STRING_REPLACE_CACHE
+    old_max_size = cache.max_size
+    cache.clear()
+    try:
+        cache.max_size = 2
+        _, string_map = string_replace_map('f(a+b)')
+        # Modifying the returned map must not affect the cached one.
+        string_map['F2PY_EXPR_TUPLE_1'] = 'x'
+        assert string_replace_map('f(a+b)')[1] == \
+            {'F2PY_EXPR_TUPLE_1': 'a+b'}
+        assert string_replace_map('F(A+B)', lower=True)[0] == \
+            'f(F2PY_EXPR_TUPLE_1)'
+        string_replace_map('g(a+b)')
+        assert cache.stats() == {'hits': 1, 'misses': 3, 'evictions': 1,
+                                 'hit_rate': 0.25, 'size': 2}
+        # A result can also be recorded without calling the function.
+        cache.put(('h(F2PY_EXPR_TUPLE_1)', {}), 'h(x)', False)
+        assert string_replace_map('h(x)')[0] == 'h(F2PY_EXPR_TUPLE_1)'
+        cache.max_size = 0
+        string_replace_map('g(a+b)')
+        assert cache.stats()['hits'] == 2
+        cache.clear()
+        assert cache.stats() == {'hits': 0, 'misses': 0, 'evictions': 0,
+                                 'hit_rate': 0.0, 'size': 0}
+    finally:
+        cache.max_size = old_max_size
+
+
+def test_string_replace_dict_prefix():
+    '''Tests that a placeholder is restored correctly when it is a
+    prefix of another placeholder in the line.'''
+    line = ', '.join('f(a+%d)' % index for index in range(11))
+    new_line, string_map = string_replace_map(line)
+    assert 'F2PY_EXPR_TUPLE_1)' in new_line
+    assert 'F2PY_EXPR_TUPLE_10)' in new_line
+    assert string_map(new_line) == line
+
+
+def test_tokenize():
+    '''Tests the token table produced by tokenize.'''
+    line = "x = a(i, 'b,(c') + f(1:2) .and. 1.e5 , y(:)"
+    tokens = tokenize(line)
+    assert tokens.quotes == [(9, 15)]
+    assert tokens.stopchar is None
+    assert [line[start:end] for start, end in tokens.brackets] == \
+        ["(i, 'b,(c')", "(1:2)", "(:)"]
+    assert [line[start:end] for start, end in tokens.operators] == \
+        ['=', '+', '.and.']
+    assert tokens.pairs == {5: 15, 20: 24, 40: 42}
+    assert tokens.opening(24) == 20
+    assert tokens.opening(23) is None
+    # A string continued from a previous line and one left open.
+    tokens = tokenize("bc' // 'de", stopchar="'")
+    assert tokens.quotes == [(0, 3), (7, 10)]
+    assert tokens.stopchar == "'"
+    # Unclosed and mismatched brackets.
+    tokens = tokenize("a(b] + c")
+    assert tokens.brackets == [(1, None)]
+    assert tokens.split_brackets() == ['a', '(b] + c']
+    assert tokens.operators == []
@@ -42,7 +42,8 @@ import os
 import pytest
 import six
 
-from fparser.common.utils import split_comma, ParseError, make_clean_tmpfile
+from fparser.common.utils import split_comma, ParseError, \
+    make_clean_tmpfile, read_source_file
 from fparser.two.utils import InternalError
 
 
@@ -247,3 +248,51 @@ def test_mct_utf8():
     filepath = os.path.join(os.path.dirname(os.path.abspath(__file__)),
                             "utf.f90")
     _ = make_clean_tmpfile(filepath)
+
+
+# tests for the read_source_file function
+
+
+def test_rsf_works(tmpdir):
+    '''Test that if there are no errors in the input file then we get
+    its exact content and that Windows line endings are normalised.
+
+    '''
+    content = (
+        "program valid\r\n"
+        "end program valid\n")
+    input_filepath = create_tmp_file(content, tmpdir)
+    assert read_source_file(input_filepath) == content.replace("\r", "")
+
+
+def test_rsf_invalid_args(tmpdir):
+    '''Test that the expected exceptions occur if invalid skip_bad_input
+    or encoding arguments are provided.
+
+    '''
+    input_filepath = create_tmp_file("", tmpdir)
+    with pytest.raises(InternalError) as excinfo:
+        _ = read_source_file(input_filepath, skip_bad_input="INVALID")
+    assert ("read_source_file: skip_bad_input argument should be False or "
+            "True but found 'INVALID'.") in str(excinfo.value)
+    with pytest.raises(InternalError) as excinfo:
+        _ = read_source_file(input_filepath, encoding="invalid")
+    assert "unknown encoding: invalid'." in str(excinfo.value)
+
+
+def test_rsf_bad_input(tmpdir, caplog):
+    '''Test that invalid characters are skipped in an input file by
+    default (with a logging message) and that an exception is raised
+    when skip_bad_input is False.
+
+    '''
+    content = "HELLO"
+    invalid_content = u"\xca".join(content)
+    input_filepath = create_tmp_file(invalid_content, tmpdir)
+    assert read_source_file(input_filepath, encoding="ascii") == content
+    assert ("Skipped bad character in input file. Error returned was 'ascii' "
+            "codec can't decode byte ") in caplog.text
+    with pytest.raises(ParseError) as excinfo:
+        _ = read_source_file(input_filepath, skip_bad_input=False,
+                             encoding="ascii")
+    assert "Bad character in input file." in str(excinfo.value)
@@ -356,6 +356,62 @@ class classes(six.with_metaclass(meta_classes, type)):
         return cls
 
 
+def read_source_file(filename, skip_bad_input=True, encoding="utf8"):
+    '''Reads the content of a Fortran source file in a single pass and
+    decodes it. An input file may contain invalid characters which, in
+    Python3, cause an exception when the file is decoded. By default
+    any invalid characters are removed from the decoded content (and
+    a warning is logged). If the skip_bad_input optional argument is
+    set to 'False' then an exception will be raised if invalid
+    characters are found in either Python2 or 3.
+
+    :param str filename: the name of the file to read.
+    :param bool skip_bad_input: Optional argument specifying whether \
+    to ignore and remove invalid input ('True') or whether to raise an \
+    exception ('False'). Defaults to 'True'.
+    :param str encoding: Optional argument specifying the encoding to \
+    use when decoding the input file. Defaults to 'utf8'.
+
+    :returns: the decoded content of the file.
+    :rtype: unicode (py2) or str (py3)
+
+    :raises InternalError: if the skip_bad_input argument has an \
+    invalid (not False or True) value or the encoding is unknown.
+    :raises ParseError: if invalid input is found in the input file \
+    and the argument 'skip_bad_input' is set to 'False'.
+
+    '''
+    from fparser.two.utils import InternalError
+
+    if skip_bad_input not in [False, True]:
+        raise InternalError(
+            "utils.py: read_source_file: skip_bad_input argument should "
+            "be False or True but found '{0}'.".format(skip_bad_input))
+
+    import codecs
+    try:
+        decoder = codecs.lookup(encoding).decode
+    except LookupError as excinfo:
+        raise InternalError(excinfo)
+
+    with io.open(filename, "rb") as orig_file:
+        raw_input = orig_file.read()
+
+    try:
+        file_input, _ = decoder(raw_input)
+    except UnicodeDecodeError as excinfo:
+        message = ("character in input file. Error returned was "
+                   "{0}.".format(str(excinfo)))
+        if not skip_bad_input:
+            raise ParseError("Bad "+message)
+        # Log the fact that this character will be removed from the input
+        logging.getLogger(__name__).warning("Skipped bad %s", message)
+        # Tell codec to skip any errors
+        file_input, _ = decoder(raw_input, 'ignore')
+    # Universal newline handling, as would be done by a text-mode file.
+    return file_input.replace(u'\r\n', u'\n').replace(u'\r', u'\n')
+
+
 def make_clean_tmpfile(filename, skip_bad_input=True, encoding="utf8"):
     '''An input file may contain invalid characters which, in Python3
     causes an exception when the file is read. By default, this utility
@@ -367,6 +423,10 @@ def make_clean_tmpfile(filename, skip_bad_input=True, encoding="utf8"):
     'False' then an exception will be raised if invalid characters are
     found in either Python2 or 3.
 
+    Note that the readers no longer make use of this function (see
+    :py:func:`read_source_file`) as it requires the input to be read
+    and written more than once.
+
     :param str filename: the name of the original filename
     :param bool skip_bad_input: Optional argument specifying whether \
     to ignore and remove invalid input ('True') or whether to raise an \
@@ -384,7 +444,6 @@ def make_clean_tmpfile(filename, skip_bad_input=True, encoding="utf8"):
 
     '''
     import tempfile
-    import codecs
     from fparser.two.utils import InternalError
 
     if skip_bad_input not in [False, True]:
@@ -392,24 +451,8 @@ def make_clean_tmpfile(filename, skip_bad_input=True, encoding="utf8"):
             "utils.py: make_clean_tmpfile: skip_bad_input argument should "
             "be False or True but found '{0}'.".format(skip_bad_input))
 
-    try:
-        orig_file = codecs.open(filename, "r", encoding=encoding)
-        _ = orig_file.read()
-    except LookupError as excinfo:
-        raise InternalError(excinfo)
-    except UnicodeDecodeError as excinfo:
-        message = ("character in input file. Error returned was "
-                   "{0}.".format(str(excinfo)))
-        if not skip_bad_input:
-            raise ParseError("Bad "+message)
-        # Log the fact that this character will be removed from the input file
-        logging.getLogger(__name__).warning("Skipped bad %s", message)
-    orig_file.close()
-
-    # Tell codec to skip any errors
-    with io.open(filename, "r",
-                 encoding=encoding, errors='ignore') as orig_file:
-        file_input = orig_file.read()
+    file_input = read_source_file(filename, skip_bad_input=skip_bad_input,
+                                  encoding=encoding)
 
     if six.PY2:
         # Unicode needs to be encoded.
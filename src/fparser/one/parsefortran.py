@@ -84,11 +84,23 @@ class FortranParser(object):
 
     Use .parse() method for parsing, parsing result is saved in .block
     attribute.
+
+    Parsers are cached by reader id in a dictionary shared by all
+    parsers unless another one is supplied, e.g. an empty dictionary
+    per thread when parsing files concurrently.
+
+    :param reader: the reader providing the Fortran code.
+    :type reader: :py:class:`fparser.common.readfortran.FortranReaderBase`
+    :param bool ignore_comments: whether or not to discard comments.
+    :param dict cache: the parsers previously created, keyed by reader \
+                       id, or None to use the shared cache.
     '''
     cache = {}
 
-    def __init__(self, reader, ignore_comments=True):
+    def __init__(self, reader, ignore_comments=True, cache=None):
         self.reader = reader
+        if cache is not None:
+            self.cache = cache
         logging.getLogger(__name__).setLevel(logging.DEBUG)
         if reader.id in self.cache:
             parser = self.cache[reader.id]
@@ -117,7 +129,7 @@ class FortranParser(object):
         '''
         Pushes the given item to the reader.
         '''
-        self.reader.fifo_item.insert(0, item)
+        self.reader.put_item(item)
         return
 
     def parse(self):
@@ -99,6 +99,13 @@ def test_log_cache(log):
                             'error':    [],
                             'critical': []}
 
+    # A parser with its own cache does not use the shared one.
+    log.reset()
+    cache = {}
+    parser = fparser.one.parsefortran.FortranParser(Readerlike(), cache=cache)
+    assert cache == {'thisun': parser}
+    assert log.messages['info'] == []
+
 
 def test_log_failure(log, monkeypatch):
     '''
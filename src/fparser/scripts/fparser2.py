@@ -77,14 +77,21 @@ except ImportError:
     from optparse import OptionParser
 
 
+# The number of rules reported by --profile-rules.
+RULE_PROFILE_LIMIT = 30
+
+
 def runner(_, options, args):
     ''' Function to read, parse and output fortran source code '''
     from fparser.two.parser import ParserFactory
     from fparser.two.Fortran2003 import FortranSyntaxError, InternalError
+    from fparser.two.utils import RULE_PROFILE
     from fparser.common.readfortran import FortranFileReader
     if not args:
         print("Error: No fortran files specified")
         raise SystemExit(1)
+    profile_rules = getattr(options, "profile_rules", False)
+    RULE_PROFILE.reset()
     for filename in args:
         try:
             reader = FortranFileReader(filename,
@@ -95,7 +102,8 @@ def runner(_, options, args):
         if options.mode != 'auto':
             reader.format.from_mode(options.mode)
         try:
-            f2003_parser = ParserFactory().create()
+            f2003_parser = ParserFactory().create(
+                profile_rules=profile_rules)
             program = f2003_parser(reader)
             if options.task == "show":
                 print(program)
@@ -104,17 +112,21 @@ def runner(_, options, args):
         except FortranSyntaxError as msg:
             print("Syntax error: {0}".format(str(msg)))
             try:
-                # protect the access to fifo_item[-1] in case the fifo
-                # buffer is empty
+                # protect the access to pending_items[-1] in case there
+                # are no items that have been put back into the reader
+                pending_items = reader.pending_items
                 print('parsing %r failed at %s' % (filename,
-                                                   reader.fifo_item[-1]))
-                print('started at %s' % (reader.fifo_item[0]))
+                                                   pending_items[-1]))
+                print('started at %s' % (pending_items[0]))
             except IndexError:
                 pass
             raise SystemExit(1)
         except InternalError as msg:
             print("Internal error in fparser: {0}".format(str(msg)))
             raise SystemExit(1)
+    if profile_rules:
+        print("Grammar rules taking the most time to match:")
+        print(RULE_PROFILE.table(limit=RULE_PROFILE_LIMIT))
 
 
 def main():
@@ -70,8 +70,11 @@ representation of the code(s).
 
 '''
 from __future__ import print_function
+import json
+import os
 import sys
 import logging
+import timeit
 from fparser.scripts.script_options import set_read_options
 
 logging.basicConfig()
@@ -82,14 +85,145 @@ except ImportError:
     from optparse import OptionParser
 
 
+def find_fortran_files(paths):
+    '''Expand a list of paths into a list of Fortran files. Directories
+    are searched recursively for files with a Fortran file extension
+    and other paths are returned unchanged.
+
+    :param paths: a list of file and directory paths.
+    :type paths: list of str
+
+    :returns: the Fortran files.
+    :rtype: list of str
+
+    '''
+    from fparser.common.utils import module_file_extensions
+    filenames = []
+    for path in paths:
+        if not os.path.isdir(path):
+            filenames.append(path)
+            continue
+        for dirpath, dirnames, files in os.walk(path):
+            dirnames.sort()
+            for name in sorted(files):
+                if os.path.splitext(name)[1].lower() in \
+                   module_file_extensions:
+                    filenames.append(os.path.join(dirpath, name))
+    return filenames
+
+
+def read_file(filename):
+    '''Read all of the items in a Fortran file, without output, and
+    return statistics about the reading.
+
+    :param str filename: the Fortran file.
+
+    :returns: the name and size (in bytes) of the file, the number of \
+    lines and items read, the time taken (in seconds) and the error \
+    that occured, if any.
+    :rtype: dict
+
+    '''
+    from fparser.common.readfortran import FortranFileReader
+    start = timeit.default_timer()
+    lines = 0
+    items = 0
+    error = None
+    try:
+        size = os.path.getsize(filename)
+        reader = FortranFileReader(filename)
+        for _ in reader:
+            items += 1
+        lines = reader.linecount
+    # Any error is reported rather than stopping the other files from
+    # being read.
+    except Exception as err:  # pylint: disable=broad-except
+        size = 0
+        error = str(err)
+    return {'filename': filename,
+            'bytes': size,
+            'lines': lines,
+            'items': items,
+            'seconds': timeit.default_timer() - start,
+            'error': error}
+
+
+def batch_read(filenames, jobs=1, slowest=5):
+    '''Read a number of Fortran files, using a pool of worker processes
+    if more than one job is requested, and summarise the throughput of
+    the reader.
+
+    :param filenames: the Fortran files.
+    :type filenames: list of str
+    :param int jobs: the number of files to read concurrently.
+    :param int slowest: the number of slowest files to report.
+
+    :returns: the totals, the rates (per second of elapsed time), the \
+    slowest files and the files that could not be read.
+    :rtype: dict
+
+    '''
+    start = timeit.default_timer()
+    if jobs > 1 and len(filenames) > 1:
+        import multiprocessing
+        pool = multiprocessing.Pool(jobs)
+        try:
+            results = pool.map(read_file, filenames, chunksize=1)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        results = [read_file(filename) for filename in filenames]
+    elapsed = timeit.default_timer() - start
+    summary = {'files': len(results),
+               'jobs': jobs,
+               'seconds': elapsed,
+               'failed': [{'filename': result['filename'],
+                           'error': result['error']}
+                          for result in results if result['error']]}
+    for key in ['lines', 'items', 'bytes']:
+        summary[key] = sum(result[key] for result in results)
+        summary[key + '_per_second'] = \
+            summary[key] / elapsed if elapsed else 0.0
+    results.sort(key=lambda result: result['seconds'], reverse=True)
+    summary['slowest'] = [{'filename': result['filename'],
+                           'seconds': result['seconds']}
+                          for result in results[:slowest]]
+    return summary
+
+
+def print_summary(summary):
+    '''Print a summary of the reading of a number of files in a human
+    readable form.
+
+    :param dict summary: the summary created by batch_read().
+
+    '''
+    print("Read {0} file(s) ({1} failed) in {2:.3f}s using {3} job(s)"
+          "".format(summary['files'], len(summary['failed']),
+                    summary['seconds'], summary['jobs']))
+    for key in ['lines', 'items', 'bytes']:
+        print("  {0:>6}: {1:>12} ({2:.1f}/s)".format(
+            key, summary[key], summary[key + '_per_second']))
+    if summary['slowest']:
+        print("Slowest files:")
+        for result in summary['slowest']:
+            print("  {0:.3f}s {1}".format(result['seconds'],
+                                          result['filename']))
+    for result in summary['failed']:
+        print("Failed to read '{0}': {1}".format(result['filename'],
+                                                 result['error']))
+
+
 def runner(_, options, args):
     '''Call the Fortran File reader for each filename in args and print
-    out its content.
+    out its content or, in batch mode, statistics about the reading.
 
     :param options: command line argument information from the options \
     parser
     :type options: :py:class:`optparse.Values`
-    :param args: a list of Fortran filepaths
+    :param args: a list of Fortran filepaths (or, in batch mode, \
+    directories containing Fortran files)
     :type args: list of str
 
     :raises NotImplementedError: if the task option is not set to \
@@ -97,6 +231,15 @@ def runner(_, options, args):
 
     '''
     from fparser.common.readfortran import FortranFileReader
+    if getattr(options, 'batch', False):
+        summary = batch_read(find_fortran_files(args),
+                             jobs=max(options.jobs, 1),
+                             slowest=options.slowest)
+        if options.json:
+            print(json.dumps(summary, indent=2, sort_keys=True))
+        else:
+            print_summary(summary)
+        return
     for filename in args:
         reader = FortranFileReader(filename)
         if options.task == 'show':
@@ -77,6 +77,30 @@ Description:
                       choices = ['show'],
                       help = 'Specify reading task. Default: %default.'
                       )
+    group = OptionGroup(parser, 'Batch options',
+                        description='Read many files (searching any '
+                        'directories given for Fortran files) without '
+                        'showing their content and report the throughput '
+                        'of the reader.')
+    group.add_option('--batch',
+                     action='store_true',
+                     default=False,
+                     help='Run in batch mode.')
+    group.add_option('--jobs', '-j',
+                     type='int',
+                     default=1,
+                     help='Number of files to read concurrently. '
+                     'Default: %default.')
+    group.add_option('--slowest',
+                     type='int',
+                     default=5,
+                     help='Number of slowest files to report. '
+                     'Default: %default.')
+    group.add_option('--json',
+                     action='store_true',
+                     default=False,
+                     help='Output the summary as JSON.')
+    parser.add_option_group(group)
     parser.add_option_group(get_fortran_code_group(parser))
 
 def set_parse_options(parser):
@@ -115,6 +139,12 @@ Description:
                       choices = ['f2003', 'f2008'],
                       help = 'Specify the Fortran standard to use. Default: %default.'
                       )
+    parser.add_option('--profile-rules',
+                      action='store_true',
+                      default=False,
+                      help='Report the grammar rules that take the most '
+                      'time to match.'
+                      )
     parser.add_option_group(get_fortran_code_group(parser))
     
 def get_fortran_code_group(parser):
@@ -72,8 +72,9 @@
 
 import re
 import logging
-from fparser.common.splitline import string_replace_map
+from fparser.common.splitline import string_replace_map, get_tokens
 from fparser.two import pattern_tools as pattern
+from fparser.two import expression
 from fparser.common.readfortran import FortranReaderBase
 
 from fparser.two.utils import Base, BlockBase, StringBase, WORDClsBase, \
@@ -81,7 +82,8 @@ from fparser.two.utils import Base, BlockBase, StringBase, WORDClsBase, \
     BinaryOpBase, Type_Declaration_StmtBase, CALLBase, CallBase, \
     KeywordValueBase, SeparatorBase, SequenceBase, UnaryOpBase
 from fparser.two.utils import NoMatchError, FortranSyntaxError, \
-    InternalSyntaxError, InternalError, show_result
+    InternalSyntaxError, InternalError, show_result, NO_MATCH, \
+    get_subclasses
 
 #
 # SECTION  1
@@ -248,9 +250,13 @@ class Program(BlockBase):  # R201
                 content.append(obj)
                 add_comments_includes(content, reader)
                 # cause a StopIteration exception if there are no more lines
-                next_line = reader.next()
-                # put the line back in the case where there are more lines
-                reader.put_item(next_line)
+                checkpoint = reader.checkpoint()
+                try:
+                    reader.next()
+                finally:
+                    # put the line back in the case where there are
+                    # more lines
+                    reader.rewind(checkpoint)
         except NoMatchError:
             # Found a syntax error for this rule. Now look to match
             # (via Main_Program0) with a program containing no program
@@ -297,6 +303,7 @@ class Include_Stmt(Base):  # pylint: disable=invalid-name
 
     '''
     use_names = ['Include_Filename']
+    first_tokens = ['INCLUDE']
 
     @staticmethod
     def match(string):
@@ -669,6 +676,7 @@ class Name(StringBase):  # R304
     '''
     # There are no other classes. This is a simple string match.
     subclass_names = []
+    first_tokens = ['letter']
 
     @staticmethod
     def match(string):
@@ -705,6 +713,62 @@ class Literal_Constant(Base):  # R306
         'Int_Literal_Constant', 'Real_Literal_Constant',
         'Complex_Literal_Constant', 'Logical_Literal_Constant',
         'Char_Literal_Constant', 'Boz_Literal_Constant']
+    # The match only gives objects of the subclasses.
+    first_tokens = []
+
+    @staticmethod
+    def match(string):
+        '''
+        Classifies the string as one of the forms of literal constant
+        with a single (regular expression) match and then only
+        attempts to match the class of that form, rather than trying
+        each subclass in turn.
+
+        :param str string: the string to match.
+
+        :returns: the matched literal constant, None if the class of \
+                  its form is not in the table of subclasses (so that \
+                  the subclasses are tried in turn) or NO_MATCH.
+        :rtype: subclass of :py:class:`fparser.two.utils.Base`, \
+                NoneType or object
+
+        '''
+        match = pattern.abs_literal_constant_form.match(
+            string.replace(' ', ''))
+        if match is not None:
+            for form, value in match.groupdict().items():
+                if value is None:
+                    continue
+                # Use the class of the form that the current table of
+                # subclasses holds, which may be that of another
+                # standard.
+                clsname, form_clsname = _LITERAL_CONSTANT_FORMS[form]
+                for form_cls in get_subclasses().get(clsname, []):
+                    if form_cls.__name__ == form_clsname:
+                        break
+                else:
+                    return None
+                obj = form_cls.match_or_none(string)
+                if obj is not None:
+                    return obj
+                break
+        # The forms are mutually exclusive so, if the classified form
+        # does not match, none of the subclasses can.
+        return NO_MATCH
+
+
+# The names of the class holding each form of literal constant in the
+# table of subclasses and of the class of the form (see
+# Literal_Constant.match).
+_LITERAL_CONSTANT_FORMS = {
+    'int': ('Literal_Constant', 'Int_Literal_Constant'),
+    'real': ('Literal_Constant', 'Real_Literal_Constant'),
+    'complex': ('Literal_Constant', 'Complex_Literal_Constant'),
+    'logical': ('Literal_Constant', 'Logical_Literal_Constant'),
+    'char': ('Literal_Constant', 'Char_Literal_Constant'),
+    'binary': ('Boz_Literal_Constant', 'Binary_Constant'),
+    'octal': ('Boz_Literal_Constant', 'Octal_Constant'),
+    'hex': ('Boz_Literal_Constant', 'Hex_Constant')}
 
 
 class Named_Constant(Base):  # R307
@@ -960,6 +1024,7 @@ class Signed_Int_Literal_Constant(NumberBase):  # R405
     """
     # never used because sign is included in pattern
     subclass_names = ['Int_Literal_Constant']
+    first_tokens = ['sign', 'digit']
 
     def match(string):
         return NumberBase.match(
@@ -972,6 +1037,7 @@ class Int_Literal_Constant(NumberBase):  # R406
     <int-literal-constant> = <digit-string> [ _ <kind-param> ]
     """
     subclass_names = []
+    first_tokens = ['digit']
 
     def match(string):
         return NumberBase.match(
@@ -1010,6 +1076,7 @@ class Binary_Constant(STRINGBase):  # R412
                         | B \" <digit> [ <digit> ]... \"
     """
     subclass_names = []
+    first_tokens = ['B']
 
     def match(string):
         return STRINGBase.match(pattern.abs_binary_constant, string)
@@ -1022,6 +1089,7 @@ class Octal_Constant(STRINGBase):  # R413
                        | O \" <digit> [ <digit> ]... \"
     """
     subclass_names = []
+    first_tokens = ['O']
 
     def match(string):
         return STRINGBase.match(pattern.abs_octal_constant, string)
@@ -1034,6 +1102,7 @@ class Hex_Constant(STRINGBase):  # R414
                      | Z \" <digit> [ <digit> ]... \"
     """
     subclass_names = []
+    first_tokens = ['Z']
 
     def match(string):
         return STRINGBase.match(pattern.abs_hex_constant, string)
@@ -1047,6 +1116,7 @@ class Signed_Real_Literal_Constant(NumberBase):  # R416
     <signed-real-literal-constant> = [ <sign> ] <real-literal-constant>
     """
     subclass_names = ['Real_Literal_Constant']  # never used
+    first_tokens = ['sign', 'digit', '.']
 
     def match(string):
         return NumberBase.match(
@@ -1058,6 +1128,7 @@ class Real_Literal_Constant(NumberBase):  # R417
     """
     """
     subclass_names = []
+    first_tokens = ['digit', '.']
 
     def match(string):
         return NumberBase.match(
@@ -1075,6 +1146,7 @@ class Complex_Literal_Constant(Base):  # R421
     """
     subclass_names = []
     use_names = ['Real_Part', 'Imag_Part']
+    first_tokens = ['(']
 
     def match(string):
         if not string or string[0]+string[-1] != '()':
@@ -1227,6 +1299,7 @@ class Char_Literal_Constant(Base):  # pylint: disable=invalid-name
                           or [ kind-param _ ] " rep-char "
     '''
     subclass_names = []
+    first_tokens = ['quote', 'letter', 'digit']
     rep = pattern.char_literal_constant
 
     @staticmethod
@@ -1305,6 +1378,7 @@ class Logical_Literal_Constant(NumberBase):  # R428
                                  | .FALSE. [ _ <kind-param> ]
     """
     subclass_names = []
+    first_tokens = ['.']
 
     def match(string):
         return NumberBase.match(pattern.abs_logical_literal_constant_named,
@@ -1325,6 +1399,7 @@ class Derived_Type_Def(BlockBase):  # R429
     use_names = ['Derived_Type_Stmt', 'Type_Param_Def_Stmt',
                  'Private_Or_Sequence', 'Component_Part',
                  'Type_Bound_Procedure_Part', 'End_Type_Stmt']
+    first_tokens = ['Derived_Type_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -1346,6 +1421,7 @@ class Derived_Type_Stmt(StmtBase):  # pylint: disable=invalid-name
     '''
     subclass_names = []
     use_names = ['Type_Attr_Spec_List', 'Type_Name', 'Type_Param_Name_List']
+    first_tokens = ['TYPE']
 
     @staticmethod
     def match(string):
@@ -1432,6 +1508,7 @@ class Type_Name(Name):  # C424
     """
     subclass_names = []
     use_names = []
+    first_tokens = ['letter']
 
     def match(string):
         if pattern.abs_intrinsic_type_name.match(string):
@@ -2170,6 +2247,7 @@ class Derived_Type_Spec(CallBase):  # R455
     """
     subclass_names = ['Type_Name']
     use_names = ['Type_Param_Spec_List']
+    first_tokens = ['Type_Name']
 
     def match(string):
         return CallBase.match(Type_Name, Type_Param_Spec_List, string)
@@ -2194,6 +2272,7 @@ class Structure_Constructor_2(KeywordValueBase):  # R457.b
     """
     subclass_names = ['Component_Data_Source']
     use_names = ['Keyword']
+    first_tokens = ['Keyword', 'Component_Data_Source']
 
     def match(string):
         return KeywordValueBase.match(Keyword, Component_Data_Source, string)
@@ -2207,6 +2286,7 @@ class Structure_Constructor(CallBase):  # R457
     """
     subclass_names = ['Structure_Constructor_2']
     use_names = ['Derived_Type_Spec', 'Component_Spec_List']
+    first_tokens = ['Derived_Type_Spec']
 
     def match(string):
         return CallBase.match(Derived_Type_Spec, Component_Spec_List, string)
@@ -2243,6 +2323,7 @@ class Enum_Def(BlockBase):  # R460
     """
     subclass_names = []
     use_names = ['Enum_Def_Stmt', 'Enumerator_Def_Stmt', 'End_Enum_Stmt']
+    first_tokens = ['Enum_Def_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -2256,6 +2337,7 @@ class Enum_Def_Stmt(StmtBase):  # R461
     """
     subclass_names = []
     use_names = []
+    first_tokens = ['ENUM']
 
     @staticmethod
     def match(string):
@@ -2318,6 +2400,7 @@ class Array_Constructor(BracketBase):  # R465
     """
     subclass_names = []
     use_names = ['Ac_Spec']
+    first_tokens = ['(', '[']
 
     def match(string):
         try:
@@ -2371,6 +2454,21 @@ class Ac_Value(Base):  # R469
     subclass_names = ['Ac_Implied_Do', 'Expr']
 
 
+class Ac_Value_List(SequenceBase):  # R469-list
+    """
+    <ac-value-list> = <ac-value> [ , <ac-value> ]...
+
+    Runs of literal constants are kept as LiteralRuns when
+    utils.STREAM_LITERALS is set.
+    """
+    subclass_names = ['Ac_Value']
+    use_names = []
+
+    @staticmethod
+    def match(string):
+        return SequenceBase.match(',', Ac_Value, string, literals=True)
+
+
 class Ac_Implied_Do(Base):  # R470
     """
     <ac-implied-do> = ( <ac-value-list> , <ac-implied-do-control> )
@@ -2894,6 +2992,7 @@ class Access_Stmt(StmtBase, WORDClsBase):  # R518
     """
     subclass_names = []
     use_names = ['Access_Spec', 'Access_Id_List']
+    first_tokens = ['PUBLIC', 'PRIVATE']
 
     def match(string):
         return WORDClsBase.match(
@@ -2936,6 +3035,7 @@ class Allocatable_Stmt(StmtBase, WORDClsBase):  # R520
     """
     subclass_names = []
     use_names = ['Object_Name_Deferred_Shape_Spec_List_Item_List']
+    first_tokens = ['ALLOCATABLE']
 
     def match(string):
         return WORDClsBase.match(
@@ -2951,6 +3051,7 @@ class Asynchronous_Stmt(StmtBase, WORDClsBase):  # R521
     """
     subclass_names = []
     use_names = ['Object_Name_List']
+    first_tokens = ['ASYNCHRONOUS']
 
     def match(string):
         return WORDClsBase.match(
@@ -2966,6 +3067,7 @@ class Bind_Stmt(StmtBase):  # R522
     """
     subclass_names = []
     use_names = ['Language_Binding_Spec', 'Bind_Entity_List']
+    first_tokens = ['BIND']
 
     def match(string):
         i = string.find('::')
@@ -3007,6 +3109,7 @@ class Data_Stmt(StmtBase):  # R524
     """
     subclass_names = []
     use_names = ['Data_Stmt_Set']
+    first_tokens = ['DATA']
 
     @staticmethod
     def match(string):
@@ -3167,6 +3270,22 @@ class Data_Stmt_Value(Base):  # R530
         return '%s * %s' % self.items
 
 
+class Data_Stmt_Value_List(SequenceBase):  # R530-list
+    """
+    <data-stmt-value-list> = <data-stmt-value> [ , <data-stmt-value> ]...
+
+    Runs of literal constants are kept as LiteralRuns when
+    utils.STREAM_LITERALS is set.
+    """
+    subclass_names = ['Data_Stmt_Value']
+    use_names = []
+
+    @staticmethod
+    def match(string):
+        return SequenceBase.match(',', Data_Stmt_Value, string,
+                                  literals=True)
+
+
 class Data_Stmt_Repeat(Base):  # R531
     """
     <data-stmt-repeat> = <scalar-int-constant>
@@ -3211,6 +3330,7 @@ class Dimension_Stmt(StmtBase):  # R535
     """
     subclass_names = []
     use_names = ['Array_Name', 'Array_Spec']
+    first_tokens = ['DIMENSION']
 
     def match(string):
         if string[:9].upper() != 'DIMENSION':
@@ -3244,6 +3364,7 @@ class Intent_Stmt(StmtBase):  # R536
     """
     subclass_names = []
     use_names = ['Intent_Spec', 'Dummy_Arg_Name_List']
+    first_tokens = ['INTENT']
 
     def match(string):
         if string[:6].upper() != 'INTENT':
@@ -3275,6 +3396,7 @@ class Optional_Stmt(StmtBase, WORDClsBase):  # R537
     """
     subclass_names = []
     use_names = ['Dummy_Arg_Name_List']
+    first_tokens = ['OPTIONAL']
 
     def match(string):
         return WORDClsBase.match(
@@ -3290,6 +3412,7 @@ class Parameter_Stmt(StmtBase, CALLBase):  # R538
     """
     subclass_names = []
     use_names = ['Named_Constant_Def_List']
+    first_tokens = ['PARAMETER']
 
     def match(string):
         return CALLBase.match('PARAMETER', Named_Constant_Def_List,
@@ -3316,6 +3439,7 @@ class Cray_Pointer_Stmt(StmtBase, WORDClsBase):  # pylint: disable=invalid-name
     '''
     subclass_names = []
     use_names = ['Cray_Pointer_Decl_List']
+    first_tokens = ['POINTER']
 
     @staticmethod
     def match(string):
@@ -3450,6 +3574,7 @@ class Pointer_Stmt(StmtBase, WORDClsBase):  # R540
     """
     subclass_names = []
     use_names = ['Pointer_Decl_List']
+    first_tokens = ['POINTER']
 
     def match(string):
         return WORDClsBase.match('POINTER', Pointer_Decl_List, string,
@@ -3478,6 +3603,7 @@ class Protected_Stmt(StmtBase, WORDClsBase):  # R542
     """
     subclass_names = []
     use_names = ['Entity_Name_List']
+    first_tokens = ['PROTECTED']
 
     def match(string):
         return WORDClsBase.match(
@@ -3493,6 +3619,7 @@ class Save_Stmt(StmtBase, WORDClsBase):  # R543
     """
     subclass_names = []
     use_names = ['Saved_Entity_List']
+    first_tokens = ['SAVE']
 
     def match(string):
         return WORDClsBase.match(
@@ -3541,6 +3668,7 @@ class Target_Stmt(StmtBase):  # R546
     """
     subclass_names = []
     use_names = ['Target_Entity_Decl_List']
+    first_tokens = ['TARGET']
 
     @staticmethod
     def match(string):
@@ -3561,6 +3689,7 @@ class Value_Stmt(StmtBase, WORDClsBase):  # R547
     """
     subclass_names = []
     use_names = ['Dummy_Arg_Name_List']
+    first_tokens = ['VALUE']
 
     @staticmethod
     def match(string):
@@ -3576,6 +3705,7 @@ class Volatile_Stmt(StmtBase, WORDClsBase):  # R548
     """
     subclass_names = []
     use_names = ['Object_Name_List']
+    first_tokens = ['VOLATILE']
 
     @staticmethod
     def match(string):
@@ -3597,6 +3727,7 @@ items : ({'NONE', Implicit_Spec_List},)
     """
     subclass_names = []
     use_names = ['Implicit_Spec_List']
+    first_tokens = ['IMPLICIT']
 
     @staticmethod
     def match(string):
@@ -3684,6 +3815,7 @@ items : (Namelist_Group_Name, Namelist_Group_Object_List)-tuple
     """
     subclass_names = []
     use_names = ['Namelist_Group_Name', 'Namelist_Group_Object_List']
+    first_tokens = ['NAMELIST']
 
     @staticmethod
     def match(string):
@@ -3724,6 +3856,7 @@ class Equivalence_Stmt(StmtBase, WORDClsBase):  # R554
     """
     subclass_names = []
     use_names = ['Equivalence_Set_List']
+    first_tokens = ['EQUIVALENCE']
 
     def match(string):
         return WORDClsBase.match('EQUIVALENCE', Equivalence_Set_List, string)
@@ -3745,10 +3878,14 @@ class Equivalence_Set(Base):  # R555
             return
         tmp = Equivalence_Object_List(line)
         obj = tmp.items[0]
-        tmp.items = tmp.items[1:]
-        if not tmp.items:
+        if len(tmp.items) < 2:
             return
-        return obj, tmp
+        # The list may be shared (see utils.PackratCache) so a copy
+        # holds the remaining items.
+        rest = object.__new__(Equivalence_Object_List)
+        rest.__dict__.update(tmp.__dict__)
+        rest.items = tmp.items[1:]
+        return obj, rest
     match = staticmethod(match)
 
     def tostr(self):
@@ -3772,6 +3909,7 @@ class Common_Stmt(StmtBase):  # R557
     """
     subclass_names = []
     use_names = ['Common_Block_Name', 'Common_Block_Object_List']
+    first_tokens = ['COMMON']
 
     def match(string):
         if string[:6].upper() != 'COMMON':
@@ -3941,6 +4079,7 @@ class Substring(CallBase):  # R609
     """
     subclass_names = []
     use_names = ['Parent_String', 'Substring_Range']
+    first_tokens = ['Parent_String']
 
     def match(string):
         return CallBase.match(
@@ -3985,6 +4124,7 @@ class Data_Ref(SequenceBase):
     '''
     subclass_names = ['Part_Ref']
     use_names = []
+    first_tokens = ['Part_Ref']
 
     @staticmethod
     def match(string):
@@ -4024,6 +4164,7 @@ class Part_Ref(CallBase):  # R613
     """
     subclass_names = ['Part_Name']
     use_names = ['Section_Subscript_List']
+    first_tokens = ['Part_Name']
 
     def match(string):
         return CallBase.match(
@@ -4044,6 +4185,7 @@ class Type_Param_Inquiry(BinaryOpBase):  # R615
     """
     subclass_names = []
     use_names = ['Designator', 'Type_Param_Name']
+    first_tokens = ['Designator']
 
     def match(string):
         return BinaryOpBase.match(
@@ -4064,6 +4206,7 @@ class Array_Section(CallBase):  # R617
     """
     subclass_names = ['Data_Ref']
     use_names = ['Substring_Range']
+    first_tokens = ['Data_Ref']
 
     def match(string):
         return CallBase.match(
@@ -4147,6 +4290,7 @@ class Allocate_Stmt(StmtBase):  # R623
     """
     subclass_names = []
     use_names = ['Type_Spec', 'Allocation_List', 'Alloc_Opt_List']
+    first_tokens = ['ALLOCATE']
 
     @staticmethod
     def match(string):
@@ -4297,6 +4441,7 @@ class Nullify_Stmt(StmtBase, CALLBase):  # R633
     """
     subclass_names = []
     use_names = ['Pointer_Object_List']
+    first_tokens = ['NULLIFY']
 
     def match(string):
         return CALLBase.match(
@@ -4321,6 +4466,7 @@ class Deallocate_Stmt(StmtBase):  # R635
     """
     subclass_names = []
     use_names = ['Allocate_Object_List', 'Dealloc_Opt_List']
+    first_tokens = ['DEALLOCATE']
 
     @staticmethod
     def match(string):
@@ -4409,6 +4555,7 @@ class Parenthesis(BracketBase):  # R701.h
     """
     subclass_names = []
     use_names = ['Expr']
+    first_tokens = ['(']
 
     def match(string):
         return BracketBase.match('()', Expr, string)
@@ -4422,6 +4569,7 @@ class Level_1_Expr(UnaryOpBase):  # R702
     """
     subclass_names = ['Primary']
     use_names = []
+    first_tokens = ['.', 'Primary']
 
     def match(string):
         return UnaryOpBase.match(
@@ -4494,6 +4642,7 @@ class Mult_Operand(BinaryOpBase):  # R704
     """
     subclass_names = ['Level_1_Expr']
     use_names = ['Mult_Operand']
+    first_tokens = ['Level_1_Expr']
 
     def match(string):
         return BinaryOpBase.match(
@@ -4510,6 +4659,7 @@ class Add_Operand(BinaryOpBase):  # R705
     """
     subclass_names = ['Mult_Operand']
     use_names = ['Add_Operand', 'Mult_Operand']
+    first_tokens = ['Add_Operand']
 
     def match(string):
         return BinaryOpBase.match(
@@ -4527,6 +4677,7 @@ class Level_2_Expr(BinaryOpBase):  # R706
     """
     subclass_names = ['Level_2_Unary_Expr']
     use_names = ['Level_2_Expr']
+    first_tokens = ['Level_2_Expr']
 
     def match(string):
         return BinaryOpBase.match(
@@ -4541,6 +4692,7 @@ class Level_2_Unary_Expr(UnaryOpBase):  # R706.c
     """
     subclass_names = ['Add_Operand']
     use_names = []
+    first_tokens = ['sign', 'Add_Operand']
 
     def match(string):
         return UnaryOpBase.match(
@@ -4559,6 +4711,7 @@ class Level_3_Expr(BinaryOpBase):  # R710
     """
     subclass_names = ['Level_2_Expr']
     use_names = ['Level_3_Expr']
+    first_tokens = ['Level_3_Expr']
 
     def match(string):
         return BinaryOpBase.match(
@@ -4577,6 +4730,7 @@ class Level_4_Expr(BinaryOpBase):  # R712
     """
     subclass_names = ['Level_3_Expr']
     use_names = []
+    first_tokens = ['Level_3_Expr']
 
     def match(string):
         return BinaryOpBase.match(
@@ -4595,6 +4749,7 @@ class And_Operand(UnaryOpBase):  # R714
     """
     subclass_names = ['Level_4_Expr']
     use_names = []
+    first_tokens = ['.', 'Level_4_Expr']
 
     def match(string):
         return UnaryOpBase.match(
@@ -4609,6 +4764,7 @@ class Or_Operand(BinaryOpBase):  # R715
     """
     subclass_names = ['And_Operand']
     use_names = ['Or_Operand', 'And_Operand']
+    first_tokens = ['Or_Operand']
 
     @staticmethod
     def match(string):
@@ -4623,6 +4779,7 @@ class Equiv_Operand(BinaryOpBase):  # R716
     """
     subclass_names = ['Or_Operand']
     use_names = ['Equiv_Operand']
+    first_tokens = ['Equiv_Operand']
 
     def match(string):
         return BinaryOpBase.match(
@@ -4638,6 +4795,7 @@ class Level_5_Expr(BinaryOpBase):  # R717
     """
     subclass_names = ['Equiv_Operand']
     use_names = ['Level_5_Expr']
+    first_tokens = ['Level_5_Expr']
 
     def match(string):
         return BinaryOpBase.match(
@@ -4657,8 +4815,13 @@ class Expr(BinaryOpBase):  # R722
     """
     subclass_names = ['Level_5_Expr']
     use_names = ['Expr']
+    first_tokens = ['Expr']
 
     def match(string):
+        if expression.ENABLED:
+            result = expression.parse(string)
+            if result is not None:
+                return result
         return BinaryOpBase.match(
             Expr, pattern.defined_binary_op.named(), Level_5_Expr,
             string, exclude_op_pattern=pattern.non_defined_binary_op)
@@ -4777,26 +4940,26 @@ class Pointer_Assignment_Stmt(StmtBase):  # R735
 
     @staticmethod
     def match(string):
-        line, repmap = string_replace_map(string)
-        i = line.find('=>')
-        if i == -1:
+        tokens = get_tokens(string)
+        for i, end in tokens.operators:
+            if end - i == 2 and string[i:end] == '=>':
+                break
+        else:
             return
-        lhs = line[:i].rstrip()
-        rhs = repmap(line[i+2:].lstrip())
+        lhs = string[:i].rstrip()
+        rhs = string[i+2:].lstrip()
         if lhs.endswith(')'):
-            i = lhs.rfind('(')
-            if i == -1:
+            i = tokens.opening(len(lhs) - 1)
+            if i is None or string[i] != '(':
                 return
-            o = repmap(lhs[:i].rstrip())
-            tmp = repmap(lhs[i+1:-1].strip())
+            o = lhs[:i].rstrip()
+            tmp = lhs[i+1:-1].strip()
             try:
                 return Data_Pointer_Object(o), Bounds_Spec_List(tmp), \
                     Data_Target(rhs)
             except NoMatchError as msg:
                 return Data_Pointer_Object(o), Bounds_Remapping_List(tmp), \
                     Data_Target(rhs)
-        else:
-            lhs = repmap(lhs)
         try:
             return Data_Pointer_Object(lhs), None, Data_Target(rhs)
         except NoMatchError as msg:
@@ -4871,6 +5034,7 @@ class Proc_Component_Ref(BinaryOpBase):  # R741
     """
     subclass_names = []
     use_names = ['Variable', 'Procedure_Component_Name']
+    first_tokens = ['Variable']
 
     def match(string):
         return BinaryOpBase.match(Variable, r'%', Procedure_Component_Name,
@@ -4893,6 +5057,7 @@ class Where_Stmt(StmtBase):  # R743
     """
     subclass_names = []
     use_names = ['Mask_Expr', 'Where_Assignment_Stmt']
+    first_tokens = ['WHERE']
 
     def match(string):
         if string[:5].upper() != 'WHERE':
@@ -4931,6 +5096,7 @@ class Where_Construct(BlockBase):  # R744
     use_names = ['Where_Construct_Stmt', 'Where_Body_Construct',
                  'Masked_Elsewhere_Stmt',
                  'Elsewhere_Stmt', 'End_Where_Stmt']
+    first_tokens = ['Where_Construct_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(string):
@@ -4966,6 +5132,7 @@ class Where_Construct_Stmt(StmtBase):  # R745
     """
     subclass_names = []
     use_names = ['Where_Construct_Name', 'Mask_Expr']
+    first_tokens = ['WHERE']
 
     @staticmethod
     def match(string):
@@ -5099,6 +5266,7 @@ class Forall_Construct(BlockBase):  # R752
     subclass_names = []
     use_names = ['Forall_Construct_Stmt', 'Forall_Body_Construct',
                  'End_Forall_Stmt']
+    first_tokens = ['Forall_Construct_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -5115,6 +5283,7 @@ class Forall_Construct_Stmt(StmtBase, WORDClsBase):  # R753
     """
     subclass_names = []
     use_names = ['Forall_Construct_Name', 'Forall_Header']
+    first_tokens = ['FORALL']
 
     @staticmethod
     def match(string):
@@ -5267,6 +5436,7 @@ class Forall_Stmt(StmtBase):  # pylint: disable=invalid-name
     '''
     subclass_names = []
     use_names = ['Forall_Header', 'Forall_Assignment_Stmt']
+    first_tokens = ['FORALL']
 
     @staticmethod
     def match(string):
@@ -5358,6 +5528,7 @@ class If_Construct(BlockBase):  # R802
     subclass_names = []
     use_names = ['If_Then_Stmt', 'Block', 'Else_If_Stmt',
                  'Else_Stmt', 'End_If_Stmt']
+    first_tokens = ['If_Then_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(string):
@@ -5393,6 +5564,7 @@ class If_Then_Stmt(StmtBase):  # R803
     """
     subclass_names = []
     use_names = ['If_Construct_Name', 'Scalar_Logical_Expr']
+    first_tokens = ['IF']
 
     @staticmethod
     def match(string):
@@ -5501,6 +5673,7 @@ class If_Stmt(StmtBase):  # R807
     """
     subclass_names = []
     use_names = ['Scalar_Logical_Expr', 'Action_Stmt_C802']
+    first_tokens = ['IF']
 
     @staticmethod
     def match(string):
@@ -5532,6 +5705,7 @@ class Case_Construct(BlockBase):  # R808
     subclass_names = []
     use_names = ['Select_Case_Stmt', 'Case_Stmt',
                  'End_Select_Stmt', 'Execution_Part_Construct']
+    first_tokens = ['Select_Case_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -5565,6 +5739,7 @@ class Select_Case_Stmt(StmtBase, CALLBase):  # R809
     """
     subclass_names = []
     use_names = ['Case_Construct_Name', 'Case_Expr']
+    first_tokens = ['SELECT']
 
     @staticmethod
     def match(string):
@@ -5698,6 +5873,7 @@ class Associate_Construct(BlockBase):  # R816
     subclass_names = []
     use_names = ['Associate_Stmt', 'Execution_Part_Construct',
                  'End_Associate_Stmt']
+    first_tokens = ['Associate_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -5715,6 +5891,7 @@ class Associate_Stmt(StmtBase, CALLBase):  # R817
     """
     subclass_names = []
     use_names = ['Associate_Construct_Name', 'Association_List']
+    first_tokens = ['ASSOCIATE']
 
     @staticmethod
     def match(string):
@@ -5769,6 +5946,7 @@ class Select_Type_Construct(BlockBase):  # R821
     subclass_names = []
     use_names = ['Select_Type_Stmt', 'Type_Guard_Stmt',
                  'Execution_Part_Construct', 'End_Select_Type_Stmt']
+    first_tokens = ['Select_Type_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -5786,6 +5964,7 @@ class Select_Type_Stmt(StmtBase):  # R822
     """
     subclass_names = []
     use_names = ['Select_Construct_Name', 'Associate_Name', 'Selector']
+    first_tokens = ['SELECT']
 
     @staticmethod
     def match(string):
@@ -5918,6 +6097,7 @@ class Block_Label_Do_Construct(BlockBase):  # pylint: disable=invalid-name
     """
     subclass_names = []
     use_names = ['Label_Do_Stmt', 'Execution_Part_Construct', 'End_Do']
+    first_tokens = ['Label_Do_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -5961,6 +6141,7 @@ class Block_Nonlabel_Do_Construct(BlockBase):  # pylint: disable=invalid-name
     """
     subclass_names = []
     use_names = ['Nonlabel_Do_Stmt', 'Execution_Part_Construct', 'End_Do_Stmt']
+    first_tokens = ['Nonlabel_Do_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -5993,6 +6174,7 @@ class Label_Do_Stmt(StmtBase):  # pylint: disable=invalid-name
     """
     subclass_names = []
     use_names = ['Do_Construct_Name', 'Label', 'Loop_Control']
+    first_tokens = ['DO']
 
     @staticmethod
     def match(string):
@@ -6060,6 +6242,7 @@ class Nonlabel_Do_Stmt(StmtBase, WORDClsBase):  # pylint: disable=invalid-name
     """
     subclass_names = []
     use_names = ['Do_Construct_Name', 'Loop_Control']
+    first_tokens = ['DO']
 
     @staticmethod
     def match(string):
@@ -6230,6 +6413,7 @@ class Action_Term_Do_Construct(BlockBase):  # R836
     subclass_names = []
     use_names = ['Label_Do_Stmt', 'Execution_Part_Construct',
                  'Do_Term_Action_Stmt']
+    first_tokens = ['Label_Do_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -6289,6 +6473,7 @@ class Outer_Shared_Do_Construct(BlockBase):  # R839
     """
     subclass_names = []
     use_names = ['Label_Do_Stmt', 'Do_Body', 'Shared_Term_Do_Construct']
+    first_tokens = ['Label_Do_Stmt']
 
     def match(reader):
         content = []
@@ -6343,6 +6528,7 @@ class Cycle_Stmt(StmtBase, WORDClsBase):  # R843
     """
     subclass_names = []
     use_names = ['Do_Construct_Name']
+    first_tokens = ['CYCLE']
 
     def match(string):
         return WORDClsBase.match('CYCLE', Do_Construct_Name, string)
@@ -6355,6 +6541,7 @@ class Exit_Stmt(StmtBase, WORDClsBase):  # R844
     """
     subclass_names = []
     use_names = ['Do_Construct_Name']
+    first_tokens = ['EXIT']
 
     def match(string):
         return WORDClsBase.match('EXIT', Do_Construct_Name, string)
@@ -6367,6 +6554,7 @@ class Goto_Stmt(StmtBase):  # R845
     """
     subclass_names = []
     use_names = ['Label']
+    first_tokens = ['GO']
 
     def match(string):
         if string[:2].upper() != 'GO':
@@ -6387,6 +6575,7 @@ class Computed_Goto_Stmt(StmtBase):  # R846
     """
     subclass_names = []
     use_names = ['Label_List', 'Scalar_Int_Expr']
+    first_tokens = ['GO']
 
     def match(string):
         if string[:2].upper() != 'GO':
@@ -6422,6 +6611,7 @@ class Arithmetic_If_Stmt(StmtBase):  # R847
     """
     subclass_names = []
     use_names = ['Scalar_Numeric_Expr', 'Label']
+    first_tokens = ['IF']
 
     def match(string):
         if string[:2].upper() != 'IF':
@@ -6448,6 +6638,7 @@ class Continue_Stmt(StmtBase, STRINGBase):  # R848
     <continue-stmt> = CONTINUE
     """
     subclass_names = []
+    first_tokens = ['CONTINUE']
 
     def match(string):
         return STRINGBase.match('CONTINUE', string)
@@ -6463,6 +6654,7 @@ class Stop_Stmt(StmtBase, WORDClsBase):  # R849
     """
     subclass_names = []
     use_names = ['Stop_Code']
+    first_tokens = ['STOP']
 
     def match(string):
         return WORDClsBase.match('STOP', Stop_Code, string)
@@ -6520,6 +6712,7 @@ class Open_Stmt(StmtBase, CALLBase):  # R904
     """
     subclass_names = []
     use_names = ['Connect_Spec_List']
+    first_tokens = ['OPEN']
 
     @staticmethod
     def match(string):
@@ -6609,6 +6802,7 @@ class Close_Stmt(StmtBase, CALLBase):  # R908
     """
     subclass_names = []
     use_names = ['Close_Spec_List']
+    first_tokens = ['CLOSE']
 
     def match(string):
         return CALLBase.match('CLOSE', Close_Spec_List, string,
@@ -6658,6 +6852,7 @@ items : (Io_Control_Spec_List, Format, Input_Item_List)
     """
     subclass_names = []
     use_names = ['Io_Control_Spec_List', 'Input_Item_List', 'Format']
+    first_tokens = ['READ']
 
     @staticmethod
     def match(string):
@@ -6718,6 +6913,7 @@ class Write_Stmt(StmtBase):  # pylint: disable=invalid-name
     '''
     subclass_names = []
     use_names = ['Io_Control_Spec_List', 'Output_Item_List']
+    first_tokens = ['WRITE']
 
     @staticmethod
     def match(string):
@@ -6770,6 +6966,7 @@ items : (Format, Output_Item_List)
     """
     subclass_names = []
     use_names = ['Format', 'Output_Item_List']
+    first_tokens = ['PRINT']
 
     def match(string):
         if string[:5].upper() != 'PRINT':
@@ -7004,6 +7201,7 @@ class Wait_Stmt(StmtBase, CALLBase):  # R921
     """
     subclass_names = []
     use_names = ['Wait_Spec_List']
+    first_tokens = ['WAIT']
 
     @staticmethod
     def match(string):
@@ -7053,6 +7251,7 @@ items : (File_Unit_Number, Position_Spec_List)
     """
     subclass_names = []
     use_names = ['File_Unit_Number', 'Position_Spec_List']
+    first_tokens = ['BACKSPACE']
 
     @staticmethod
     def match(string):
@@ -7084,6 +7283,7 @@ items : (File_Unit_Number, Position_Spec_List)
     """
     subclass_names = []
     use_names = ['File_Unit_Number', 'Position_Spec_List']
+    first_tokens = ['ENDFILE']
 
     @staticmethod
     def match(string):
@@ -7115,6 +7315,7 @@ items : (File_Unit_Number, Position_Spec_List)
     """
     subclass_names = []
     use_names = ['File_Unit_Number', 'Position_Spec_List']
+    first_tokens = ['REWIND']
 
     @staticmethod
     def match(string):
@@ -7172,6 +7373,7 @@ items : (File_Unit_Number, Position_Spec_List)
     """
     subclass_names = []
     use_names = ['File_Unit_Number', 'Position_Spec_List']
+    first_tokens = ['FLUSH']
 
     @staticmethod
     def match(string):
@@ -7236,6 +7438,7 @@ items : (Inquire_Spec_List, Scalar_Int_Variable, Output_Item_List)
     subclass_names = []
     use_names = ['Inquire_Spec_List', 'Scalar_Int_Variable',
                  'Output_Item_List']
+    first_tokens = ['INQUIRE']
 
     @staticmethod
     def match(string):
@@ -7366,6 +7569,7 @@ class Format_Stmt(StmtBase, WORDClsBase):  # R1001
     """
     subclass_names = []
     use_names = ['Format_Specification']
+    first_tokens = ['FORMAT']
 
     @staticmethod
     def match(string):
@@ -8629,6 +8833,7 @@ class Use_Stmt(StmtBase):  # pylint: disable=invalid-name
     '''
     subclass_names = []
     use_names = ['Module_Nature', 'Module_Name', 'Rename_List', 'Only_List']
+    first_tokens = ['USE']
 
     @staticmethod
     def match(string):
@@ -8913,6 +9118,7 @@ class Interface_Block(BlockBase):  # R1201
     subclass_names = []
     use_names = ['Interface_Stmt', 'Interface_Specification',
                  'End_Interface_Stmt']
+    first_tokens = ['Interface_Stmt', 'INCLUDE']
 
     @staticmethod
     def match(reader):
@@ -8941,6 +9147,7 @@ items : ({Generic_Spec, 'ABSTRACT'},)
     """
     subclass_names = []
     use_names = ['Generic_Spec']
+    first_tokens = ['INTERFACE', 'ABSTRACT']
 
     @staticmethod
     def match(string):
@@ -9123,6 +9330,7 @@ class Import_Stmt(StmtBase, WORDClsBase):  # R1209
     """
     subclass_names = []
     use_names = ['Import_Name_List']
+    first_tokens = ['IMPORT']
 
     @staticmethod
     def match(string):
@@ -9138,6 +9346,7 @@ class External_Stmt(StmtBase, WORDClsBase):  # R1210
     """
     subclass_names = []
     use_names = ['External_Name_List']
+    first_tokens = ['EXTERNAL']
 
     def match(string):
         return WORDClsBase.match(
@@ -9159,6 +9368,7 @@ items : (Proc_Interface, Proc_Attr_Spec_List, Proc_Decl_List)
     """
     subclass_names = []
     use_names = ['Proc_Interface', 'Proc_Attr_Spec_List', 'Proc_Decl_List']
+    first_tokens = ['PROCEDURE']
 
     @staticmethod
     def match(string):
@@ -9283,6 +9493,7 @@ class Intrinsic_Stmt(StmtBase, WORDClsBase):  # R1216
     """
     subclass_names = []
     use_names = ['Intrinsic_Procedure_Name_List']
+    first_tokens = ['INTRINSIC']
 
     def match(string):
         return WORDClsBase.match(
@@ -9299,6 +9510,7 @@ class Function_Reference(CallBase):  # R1217
     """
     subclass_names = []
     use_names = ['Procedure_Designator', 'Actual_Arg_Spec_List']
+    first_tokens = ['Procedure_Designator']
 
     def match(string):
         return CallBase.match(
@@ -9503,6 +9715,7 @@ class Intrinsic_Name(STRINGBase):  # No explicit rule
                       list(specific_function_names.keys()))
 
     subclass_names = []
+    first_tokens = ['letter']
 
     @staticmethod
     def match(string):
@@ -9529,6 +9742,7 @@ class Intrinsic_Function_Reference(CallBase):  # No explicit rule
     '''
     subclass_names = []
     use_names = ['Intrinsic_Name', 'Actual_Arg_Spec_List']
+    first_tokens = ['Intrinsic_Name']
 
     @staticmethod
     def match(string):
@@ -9611,6 +9825,7 @@ items : (Procedure_Designator, Actual_Arg_Spec_List)
     """
     subclass_names = []
     use_names = ['Procedure_Designator', 'Actual_Arg_Spec_List']
+    first_tokens = ['CALL']
 
     def match(string):
         if string[:4].upper() != 'CALL':
@@ -9642,6 +9857,7 @@ class Procedure_Designator(BinaryOpBase):  # R1219
     """
     subclass_names = ['Procedure_Name', 'Proc_Component_Ref']
     use_names = ['Data_Ref', 'Binding_Name']
+    first_tokens = ['Data_Ref']
 
     def match(string):
         return BinaryOpBase.match(Data_Ref, pattern.percent_op.named(),
@@ -10000,6 +10216,7 @@ items : (Entry_Name, Dummy_Arg_List, Suffix)
     """
     subclass_names = []
     use_names = ['Entry_Name', 'Dummy_Arg_List', 'Suffix']
+    first_tokens = ['ENTRY']
 
     @staticmethod
     def match(string):
@@ -10038,6 +10255,7 @@ class Return_Stmt(StmtBase):  # R1236
     """
     subclass_names = []
     use_names = ['Scalar_Int_Expr']
+    first_tokens = ['RETURN']
 
     def match(string):
         start = string[:6].upper()
@@ -10059,6 +10277,7 @@ class Contains_Stmt(StmtBase, STRINGBase):  # R1237
     <contains-stmt> = CONTAINS
     """
     subclass_names = []
+    first_tokens = ['CONTAINS']
 
     def match(string):
         return STRINGBase.match('CONTAINS', string)
@@ -0,0 +1,400 @@
+# Copyright (c) 2020 Science and Technology Facilities Council
+
+# All rights reserved.
+
+# Modifications made as part of the fparser project are distributed
+# under the following license:
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''An iterative operator-precedence parser for the intrinsic operators
+of Fortran expressions (rules R702 to R722).
+
+The Fortran2003 expression rules (Expr, Level_5_Expr, ..., Level_1_Expr)
+split an expression at one operator and recurse into the operands, so
+an expression with thousands of operators exceeds the recursion limit
+and takes a time that grows faster than its length. When this parser
+is enabled, Expr instead finds all of the top-level operators in one
+pass and combines the operands with an explicit operator stack. It
+creates the same nodes (Level_2_Expr, Add_Operand, And_Operand, ...)
+that the recursive rules would, with the same strings, so the result
+is indistinguishable. The operands themselves (names, literals,
+function references, bracketed expressions, ...) are matched by
+Level_1_Expr as before.
+
+Expressions that this parser does not handle, such as those with
+defined operators, or those that the recursive rules would reject or
+match unusually (e.g. a sign directly after a multiplication), are
+declined and left to the recursive rules.
+
+The parser is disabled by default. ENABLED is a module variable so,
+unlike the class hierarchy of a parser context (see
+:py:meth:`fparser.two.parser.ParserFactory.create_context`), it applies
+to the whole process, i.e. to all threads and contexts::
+
+    >>> from fparser.two import expression
+    >>> expression.ENABLED = True
+
+The tree of a long expression is as deep as the expression has
+operators at one precedence level. Printing it (str or repr) and
+walking it with :py:func:`fparser.two.utils.walk_ast` do not recurse
+over the operations, but other operations on the tree, such as
+comparing two trees, still do and so are limited by the recursion
+limit.
+
+'''
+
+import re
+import six
+
+from fparser.two.utils import NoMatchError, get_operator_table
+
+# Whether Expr uses this parser, in all threads and parser contexts.
+ENABLED = False
+
+# The lexemes of a masked expression. Numbers and logical literal
+# constants are matched so that their dots and exponent signs are not
+# taken for operators. Any other text is part of an operand.
+_LEXEME_FINDITER = re.compile(
+    r'''(?P<number>(?<![\w$])(?:\d+(?:\.(?!\s*[a-z]+\s*\.)\d*)?|\.\d+)
+                    (?:[ed][-+]?\d+)?)
+      | (?P<logical>\.\s*(?:true|false)\s*\.)
+      | (?P<dotted>\.\s*[a-z]+\s*\.)
+      | (?P<symbol>\*\*|//|==|/=|<=|>=|[-+*/<>])''',
+    re.I | re.X).finditer
+
+# The placeholders of the masked parts of an expression (see
+# fparser.common.splitline.string_replace_map).
+_PLACEHOLDER_FINDITER = re.compile(
+    r'_F2PY_STRING_CONSTANT_\d+_|F2PY_EXPR_TUPLE_\d+').finditer
+
+_RELATIONAL = ('==', '/=', '<', '<=', '>', '>=',
+               '.EQ.', '.NE.', '.LT.', '.LE.', '.GT.', '.GE.')
+
+# The precedence, right associativity and node class name of each
+# binary operator.
+_BINARY = {'**': (9, True, 'Mult_Operand'),
+           '*': (8, False, 'Add_Operand'),
+           '/': (8, False, 'Add_Operand'),
+           '+': (7, False, 'Level_2_Expr'),
+           '-': (7, False, 'Level_2_Expr'),
+           '//': (6, False, 'Level_3_Expr'),
+           '.AND.': (3, False, 'Or_Operand'),
+           '.OR.': (2, False, 'Equiv_Operand'),
+           '.EQV.': (1, False, 'Level_5_Expr'),
+           '.NEQV.': (1, False, 'Level_5_Expr')}
+_BINARY.update((op, (5, False, 'Level_4_Expr')) for op in _RELATIONAL)
+
+# The precedence and node class name of each unary operator.
+_UNARY = {'+': (7, 'Level_2_Unary_Expr'),
+          '-': (7, 'Level_2_Unary_Expr'),
+          '.NOT.': (4, 'And_Operand')}
+
+# The operators that a sign (None for the start of the expression) and
+# a .NOT. may follow. The recursive rules do not accept them elsewhere.
+_SIGN_FOLLOWS = frozenset((None, '//', '.NOT.', '.AND.', '.OR.', '.EQV.',
+                           '.NEQV.') + _RELATIONAL)
+_NOT_FOLLOWS = frozenset((None, '.AND.', '.OR.', '.EQV.', '.NEQV.'))
+
+# The operators within a term of a sum.
+_FACTOR_OPS = frozenset(('**', '*', '/'))
+
+
+class _Node(object):
+    '''
+    A node of the expression tree before the fparser2 objects are
+    created.
+
+    :param str cls_name: the name of the node class or None for an \
+                         operand.
+    :param str op: the operator (as it appears in the masked \
+                   expression for a unary operator).
+    :param list children: the operand nodes.
+    :param int start: the start of the node in the masked expression.
+    :param int end: the end of the node in the masked expression.
+    '''
+    __slots__ = ('cls_name', 'op', 'children', 'start', 'end', 'string')
+
+    def __init__(self, cls_name, op, children, start, end):
+        self.cls_name = cls_name
+        self.op = op
+        self.children = children
+        self.start = start
+        self.end = end
+        self.string = None
+
+
+def _operand(line, start, end):
+    '''
+    :returns: the operand node for the (non-blank) text between start \
+              and end of the masked expression, without the \
+              surrounding white space.
+    :rtype: :py:class:`fparser.two.expression._Node`
+    '''
+    text = line[start:end]
+    stripped = text.lstrip()
+    start += len(text) - len(stripped)
+    return _Node(None, None, None, start, start + len(stripped.rstrip()))
+
+
+def _reduce(operands, operators):
+    '''
+    Combines the operator on top of the stack with its operands.
+    '''
+    cls_name, op, start = operators.pop()
+    rhs = operands.pop()
+    if start is None:
+        lhs = operands.pop()
+        operands.append(_Node(cls_name, op, [lhs, rhs], lhs.start, rhs.end))
+    else:
+        operands.append(_Node(cls_name, op, [rhs], start, rhs.end))
+
+
+def _build(line):
+    '''
+    Builds the tree of the intrinsic operators of a masked expression.
+
+    :param str line: the masked expression.
+
+    :returns: the root of the tree or None if the expression is not \
+              handled.
+    :rtype: :py:class:`fparser.two.expression._Node` or NoneType
+    '''
+    operands = []
+    # The entries of the operator stack are the class name, operator
+    # and, for a unary operator, its start (None for a binary one).
+    operators = []
+    precedence = []
+    previous = None
+    pos = 0
+    # The recursive rules reject a sum in which a term other than the
+    # first is a product with a signed exponent (e.g. a + b*1.0e+5),
+    # as they take the exponent sign for an addition, so such sums are
+    # declined. Track the term being read for this.
+    signed = False
+    first_term = True
+    factors = 0
+    for match in _LEXEME_FINDITER(line):
+        kind = match.lastgroup
+        if kind == 'number':
+            text = match.group()
+            if '+' in text or '-' in text:
+                signed = True
+            continue
+        if kind == 'logical':
+            continue
+        start, end = match.span()
+        op = match.group().upper()
+        if kind == 'dotted':
+            op = op.replace(' ', '')
+            if op not in _BINARY and op != '.NOT.':
+                # A defined operator.
+                return None
+        if line[pos:start].strip():
+            operands.append(_operand(line, pos, start))
+            if op not in _BINARY:
+                return None
+            factors += 1
+            if op not in _FACTOR_OPS:
+                if signed and factors > 1 and not first_term:
+                    return None
+                signed = False
+                factors = 0
+                first_term = op not in ('+', '-')
+            prec, right, cls_name = _BINARY[op]
+            while precedence and (precedence[-1] > prec or
+                                  precedence[-1] == prec and not right):
+                if prec == 5 and precedence[-1] == 5:
+                    # Relational operators are not associative.
+                    return None
+                precedence.pop()
+                _reduce(operands, operators)
+            operators.append((cls_name, op, None))
+        else:
+            if op in ('+', '-'):
+                if previous not in _SIGN_FOLLOWS:
+                    return None
+            elif op != '.NOT.' or previous not in _NOT_FOLLOWS:
+                return None
+            prec, cls_name = _UNARY[op]
+            operators.append((cls_name, match.group(), start))
+        precedence.append(prec)
+        previous = op
+        pos = end
+    if previous is None or not line[pos:].strip():
+        return None
+    operands.append(_operand(line, pos, len(line)))
+    if signed and factors > 0 and not first_term:
+        return None
+    while operators:
+        _reduce(operands, operators)
+    return operands[0]
+
+
+def _restorer(line, repmap):
+    '''
+    :returns: a function that gives the text of a part of the masked \
+              expression with the masked parts restored. The masked \
+              expression is only restored once.
+    :rtype: function
+    '''
+    # The offsets into the restored expression of the ends of the
+    # placeholders.
+    ends = []
+    offsets = []
+    pieces = []
+    pos = 0
+    offset = 0
+    for match in _PLACEHOLDER_FINDITER(line):
+        start, end = match.span()
+        text = repmap[match.group()]
+        pieces.append(line[pos:start])
+        pieces.append(text)
+        offset += len(text) - (end - start)
+        ends.append(end)
+        offsets.append(offset)
+        pos = end
+    if not ends:
+        return lambda start, end: line[start:end]
+    pieces.append(line[pos:])
+    restored = ''.join(pieces)
+
+    def restore(start, end):
+        # The parts of the tree start and end outside of placeholders.
+        return restored[start + _offset(start):end + _offset(end)]
+
+    def _offset(pos):
+        index = _bisect(ends, pos)
+        return offsets[index - 1] if index else 0
+    return restore
+
+
+def _bisect(ends, pos):
+    '''
+    :returns: the number of placeholders that end at or before pos.
+    :rtype: int
+    '''
+    low, high = 0, len(ends)
+    while low < high:
+        mid = (low + high) // 2
+        if ends[mid] <= pos:
+            low = mid + 1
+        else:
+            high = mid
+    return low
+
+
+def _create(root, string, line, repmap, classes):
+    '''
+    Creates the fparser2 objects of the tree. The nodes are given the
+    strings that the recursive rules would give them: the operands of a
+    binary operator have their masked parts restored (with the white
+    space in brackets removed) whereas the operand of a unary operator
+    is the rest of the string of the operator node.
+
+    :returns: the object of the root of the tree.
+    :rtype: :py:class:`fparser.two.utils.Base`
+
+    :raises NoMatchError: if an operand does not match.
+    '''
+    restore = _restorer(line, repmap)
+    root.string = string
+    order = []
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        order.append(node)
+        if node.cls_name is None:
+            continue
+        if len(node.children) == 1:
+            child = node.children[0]
+            child.string = node.string[len(node.op):].lstrip()
+        else:
+            for child in node.children:
+                child.string = restore(child.start, child.end)
+        stack.extend(node.children)
+    level_1_expr = classes['Level_1_Expr']
+    objects = {}
+    for node in reversed(order):
+        if node.cls_name is None:
+            objects[id(node)] = level_1_expr(node.string)
+            continue
+        cls = classes[node.cls_name]
+        obj = object.__new__(cls)
+        obj.string = node.string
+        obj.item = None
+        children = [objects.pop(id(child)) for child in node.children]
+        if len(children) == 1:
+            obj.init(node.op.rstrip().upper(), children[0])
+        else:
+            obj.init(children[0], node.op.replace(' ', ''), children[1])
+        objects[id(node)] = obj
+    return objects[id(root)]
+
+
+def _classes():
+    '''
+    :returns: the expression classes by name.
+    :rtype: dict
+    '''
+    if not _CLASSES:
+        # Imported here as Fortran2003 uses this module.
+        from fparser.two import Fortran2003
+        for cls_name in ['Level_1_Expr'] + \
+                [entry[2] for entry in _BINARY.values()] + \
+                [entry[1] for entry in _UNARY.values()]:
+            _CLASSES[cls_name] = getattr(Fortran2003, cls_name)
+    return _CLASSES
+
+
+_CLASSES = {}
+
+
+def parse(string):
+    '''
+    Parses an expression with the iterative parser.
+
+    :param str string: the expression.
+
+    :returns: the same object as Expr(string) or None if the \
+              expression is not one that this parser handles, in which \
+              case the recursive rules should be used.
+    :rtype: :py:class:`fparser.two.utils.Base` or NoneType
+    '''
+    if not isinstance(string, six.string_types) or string[:1].isspace():
+        return None
+    table = get_operator_table(string)
+    if not table.derivable:
+        return None
+    root = _build(table.line)
+    if root is None:
+        return None
+    try:
+        return _create(root, string, table.line, table.repmap, _classes())
+    except NoMatchError:
+        return None
@@ -67,8 +67,16 @@
 for a particular standard.'''
 # pylint: disable=eval-used
 
+import contextlib
 import inspect
 import sys
+import threading
+from fparser.two.pattern_tools import instrument_patterns
+from fparser.two.utils import instrument_rules
+
+# Serialises the setting up of class hierarchies, as this updates the
+# (shared) subclass_names lists of the classes.
+_SETUP_LOCK = threading.Lock()
 
 
 def get_module_classes(input_module):
@@ -92,15 +100,93 @@ def get_module_classes(input_module):
     return module_cls_members
 
 
+# The tokens that stand for a set of first tokens in first_tokens.
+_TOKEN_SETS = {'letter': 'ABCDEFGHIJKLMNOPQRSTUVWXYZ',
+               'digit': '0',
+               'quote': '\'"',
+               'sign': '+-'}
+
+
+def get_first_sets(base_classes, subclasses):
+    '''Computes the FIRST set of each class: the first tokens (see
+    :py:func:`fparser.two.utils.first_token`) of the strings that the
+    class can match. This is the union of the tokens given by the
+    first_tokens of the class, if it has its own match method, and of
+    the FIRST sets of its subclasses (or None if it has its own
+    __new__ method). As the classes refer to each
+    other (e.g. an expression starts with an expression) the sets are
+    grown until none of them changes.
+
+    :param dict base_classes: the classes keyed by name.
+    :param dict subclasses: the table of the subclasses of each class \
+                            (keyed by class name).
+    :return: the FIRST set of each class (keyed by name), or None if \
+             the class can match strings starting with any token.
+    :rtype: dict
+
+    '''
+    first = dict((clsname, set()) for clsname in base_classes)
+    changed = True
+    while changed:
+        changed = False
+        for clsname, cls in base_classes.items():
+            if first[clsname] is None:
+                continue
+            names = [subcls.__name__ for subcls in
+                     subclasses.get(clsname, [])]
+            first_set = set()
+            if '__new__' in cls.__dict__:
+                # The class has its own way of being created.
+                first_set = None
+            elif 'match' in cls.__dict__:
+                if cls.__dict__.get('first_tokens') is None:
+                    first_set = None
+                else:
+                    for token in cls.__dict__['first_tokens']:
+                        if token in _TOKEN_SETS:
+                            first_set.update(_TOKEN_SETS[token])
+                        elif len(token) == 1:
+                            first_set.add(token.upper())
+                        elif token.isupper():
+                            # A keyword.
+                            first_set.add(token[0])
+                        else:
+                            names.append(token)
+            for name in names:
+                if first_set is None:
+                    break
+                if first.get(name) is None:
+                    first_set = None
+                else:
+                    first_set.update(first[name])
+            if first_set != first[clsname]:
+                first[clsname] = first_set
+                changed = True
+    return first
+
+
 class ParserFactory(object):
     '''Creates a parser suitable for the specified Fortran standard.'''
 
-    def create(self, std=None):
+    def create(self, std=None, pattern_stats=False, profile_rules=False):
         '''Creates a class hierarchy suitable for the specified Fortran
         standard.
 
         :param str std: the Fortran standard. Choices are 'f2003' or \
                         'f2008'. 'f2003' is the default.
+        :param bool pattern_stats: whether to record statistics of the \
+            matching of the grammar's patterns (see \
+            :py:data:`fparser.two.pattern_tools.PATTERN_STATS`). This \
+            applies to the whole process, i.e. to all threads and \
+            contexts, and stays on until it is switched off with \
+            :py:func:`fparser.two.pattern_tools.instrument_patterns`. \
+            Otherwise (the default) it has no overhead.
+        :param bool profile_rules: whether to record the cost of each \
+            grammar rule (see :py:data:`fparser.two.utils.RULE_PROFILE`). \
+            As with pattern_stats, this applies to the whole process \
+            and stays on until it is switched off with \
+            :py:func:`fparser.two.utils.instrument_rules`. Otherwise \
+            (the default) it has no overhead.
         :return: a Program class (not object) for use with the Fortran reader
         :rtype: :py:class:`fparser.two.Fortran2003.Program`
         :raises ValueError: if the supplied value for the std parameter \
@@ -116,6 +202,73 @@ class ParserFactory(object):
         >>> ast = f2008_parser(reader)
         >>> print ast
 
+        The class hierarchy is shared by all threads that do not have
+        their own (see create_context).
+
+        The statistics of the patterns can be shown after parsing:
+
+        >>> from fparser.two.pattern_tools import PATTERN_STATS, \
+        ...     instrument_patterns
+        >>> parser = ParserFactory().create(pattern_stats=True)
+        >>> ast = parser(reader)
+        >>> print(PATTERN_STATS.table(limit=20))
+        >>> instrument_patterns(False)
+
+        and so can the profile of the rules:
+
+        >>> from fparser.two.utils import RULE_PROFILE, instrument_rules
+        >>> parser = ParserFactory().create(profile_rules=True)
+        >>> ast = parser(reader)
+        >>> print(RULE_PROFILE.table(limit=20))
+        >>> instrument_rules(False)
+
+        '''
+        from fparser.two import Fortran2003
+        if pattern_stats:
+            instrument_patterns()
+        if profile_rules:
+            instrument_rules()
+        program, subclasses = self._create(std)
+        Fortran2003.Base.subclasses = subclasses
+        return program
+
+    def create_context(self, std=None):
+        '''Creates a parser context for the specified Fortran standard.
+        Unlike create, this does not change the class hierarchy shared
+        by all threads, so independent files can be parsed
+        concurrently, including with different standards.
+
+        :param str std: the Fortran standard. Choices are 'f2003' or \
+                        'f2008'. 'f2003' is the default.
+        :return: a parser context for the standard.
+        :rtype: :py:class:`fparser.two.parser.ParserContext`
+        :raises ValueError: if the supplied value for the std parameter \
+                            is invalid
+
+        For example:
+
+        >>> from concurrent.futures import ThreadPoolExecutor
+        >>> context = ParserFactory().create_context(std='f2008')
+        >>> with ThreadPoolExecutor() as pool:
+        ...     asts = list(pool.map(context.parse, readers))
+
+        '''
+        if not std:
+            std = "f2003"
+        program, subclasses = self._create(std)
+        return ParserContext(std, program, subclasses)
+
+    def _create(self, std):
+        '''Creates a class hierarchy suitable for the specified Fortran
+        standard.
+
+        :param str std: the Fortran standard ('f2003' or 'f2008').
+        :return: the top-level class for parsing Fortran code and the \
+                 table of the subclasses of each class.
+        :rtype: (type, dict)
+        :raises ValueError: if the supplied value for the std parameter \
+                            is invalid
+
         '''
         # find all relevant classes in our Fortran2003 file as we
         # always need these.
@@ -127,10 +280,10 @@ class ParserFactory(object):
         if std == "f2003":
             # we already have our required list of classes so call _setup
             # to setup our class hierarchy.
-            self._setup(f2003_cls_members)
+            subclasses = self._setup(f2003_cls_members)
             # the class hierarchy has been set up so return the top
             # level class that we start from when parsing Fortran code.
-            return Fortran2003.Program
+            return Fortran2003.Program, subclasses
         elif std == "f2008":
             # we need to find all relevent classes in our Fortran2003
             # and Fortran2008 files and then ensure that where classes
@@ -148,12 +301,12 @@ class ParserFactory(object):
                     f2008_cls_members.append(local_cls)
             # we now have our required list of classes so call _setup
             # to setup our class hierarchy.
-            self._setup(f2008_cls_members)
+            subclasses = self._setup(f2008_cls_members)
             # the class hierarchy has been set up so return the top
             # level class that we start from when parsing Fortran
             # code. Fortran2008 does not extend the top level class so
             # we return the Fortran2003 one.
-            return Fortran2003.Program
+            return Fortran2003.Program, subclasses
         else:
             raise ValueError("'{0}' is an invalid standard".format(std))
 
@@ -166,6 +319,20 @@ class ParserFactory(object):
 
         :param list input_classes: a list of tuples each containing a \
         class name and a class.
+        :return: the table of the subclasses of each class.
+        :rtype: dict
+
+        '''
+        with _SETUP_LOCK:
+            return self._setup_classes(input_classes)
+
+    def _setup_classes(self, input_classes):
+        '''Does the work of _setup while holding the lock.
+
+        :param list input_classes: a list of tuples each containing a \
+        class name and a class.
+        :return: the table of the subclasses of each class.
+        :rtype: dict
 
         '''
 
@@ -176,10 +343,11 @@ class ParserFactory(object):
         import fparser.two.Fortran2003
         class_type = type(fparser.two.Fortran2003.Base)
 
-        # Reset subclasses dictionary in case this function has been
-        # called before. If this is not done then multiple calls to
-        # the ParserFactory create method may not work correctly.
-        fparser.two.Fortran2003.Base.subclasses = {}
+        # Start from an empty subclasses dictionary in case this
+        # function has been called before. If this is not done then
+        # multiple calls to the ParserFactory create method may not
+        # work correctly.
+        subclasses = {}
 
         for clsinfo in input_classes:
             clsname = "{0}.{1}".format(clsinfo[1].__module__, clsinfo[0])
@@ -226,7 +394,7 @@ class ParserFactory(object):
                 if not opt_subclass_names == cls.subclass_names:
                     cls.subclass_names[:] = opt_subclass_names
 
-        # Initialize Base.subclasses dictionary:
+        # Initialize the subclasses dictionary:
         for clsname, cls in list(base_classes.items()):
             subclass_names = getattr(cls, 'subclass_names', None)
             if subclass_names is None:
@@ -234,9 +402,9 @@ class ParserFactory(object):
                 logging.getLogger(__name__).debug(message)
                 continue
             try:
-                bits = fparser.two.Fortran2003.Base.subclasses[clsname]
+                bits = subclasses[clsname]
             except KeyError:
-                fparser.two.Fortran2003.Base.subclasses[clsname] = bits = []
+                subclasses[clsname] = bits = []
             for name in subclass_names:
                 if name in base_classes:
                     bits.append(base_classes[name])
@@ -270,3 +438,69 @@ class ParserFactory(object):
                         message = ('%s not defined used '
                                    'by %s' % (name, cls.__name__))
                         logging.getLogger(__name__).debug(message)
+
+        # Add the FIRST set of each class (where it is known) and the
+        # subclasses that can match a string starting with each token.
+        first = get_first_sets(base_classes, subclasses)
+        tokens = set()
+        for clsname, first_set in first.items():
+            if first_set is not None:
+                subclasses[(clsname, None)] = frozenset(first_set)
+                tokens.update(first_set)
+        for clsname, bits in list(subclasses.items()):
+            if isinstance(clsname, tuple):
+                continue
+            for token in tokens:
+                pruned = [subcls for subcls in bits
+                          if first[subcls.__name__] is None or
+                          token in first[subcls.__name__]]
+                if len(pruned) < len(bits):
+                    subclasses[(clsname, token)] = pruned
+        return subclasses
+
+
+class ParserContext(object):
+    '''The state needed to parse Fortran code for a particular standard.
+    A context is created by the ParserFactory create_context method and
+    owns its class hierarchy (the table of the subclasses of each
+    class), so parsing with one context does not interfere with
+    parsing in another thread, with another context or standard.
+
+    :param str std: the Fortran standard.
+    :param type program: the top-level class for parsing Fortran code.
+    :param dict subclasses: the table of the subclasses of each class \
+                            (keyed by class name).
+
+    '''
+    def __init__(self, std, program, subclasses):
+        self.std = std
+        self.program = program
+        self.subclasses = subclasses
+
+    @contextlib.contextmanager
+    def activate(self):
+        '''Makes this the context used by the current thread, e.g. when
+        creating parse-tree nodes directly from strings:
+
+        >>> with context.activate():
+        ...     stmt = Fortran2003.Assignment_Stmt('a = b')
+
+        '''
+        from fparser.two.utils import set_subclasses
+        previous = set_subclasses(self.subclasses)
+        try:
+            yield self
+        finally:
+            set_subclasses(previous)
+
+    def parse(self, reader):
+        '''Parses the Fortran code provided by a reader.
+
+        :param reader: the reader providing the Fortran code.
+        :type reader: :py:class:`fparser.common.readfortran.FortranReaderBase`
+        :return: the parse tree.
+        :rtype: :py:class:`fparser.two.Fortran2003.Program`
+
+        '''
+        with self.activate():
+            return self.program(reader)
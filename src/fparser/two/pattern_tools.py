@@ -74,10 +74,73 @@ Author: Pearu Peterson <pearu@cens.ioc.ee>
 Created: Oct 2006
 -----
 """
+import functools
+import json
 import re
+import threading
+import timeit
 
 dollar_ok = True
 
+# The patterns derived from other patterns (e.g. by abs(), named() or
+# flags()), interned so that each distinct pattern only exists (and is
+# compiled) once. Keyed by the label, pattern, optional, flags and value.
+_INTERNED_PATTERNS = {}
+
+# The compiled regular expressions of all patterns, keyed by the
+# pattern and flags.
+_COMPILED_PATTERNS = {}
+
+
+def _intern_pattern(label, pattern, optional=0, flags=0, value=None):
+    '''
+    :returns: the interned pattern with the supplied attributes, \
+              creating it if it does not yet exist.
+    :rtype: :py:class:`fparser.two.pattern_tools.Pattern`
+    '''
+    key = (label, pattern, optional, flags, value)
+    result = _INTERNED_PATTERNS.get(key)
+    if result is None:
+        result = _INTERNED_PATTERNS.setdefault(
+            key, Pattern(label, pattern, optional=optional, flags=flags,
+                         value=value))
+    return result
+
+
+def _derived(method):
+    '''
+    Decorates a Pattern method that derives a new pattern so that the
+    result is remembered (by the method name and arguments) and later
+    calls return the same pattern without constructing a new one.
+
+    :param method: the method to decorate.
+    :type method: callable
+
+    :returns: the decorated method.
+    :rtype: callable
+    '''
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        key = (method.__name__,) + args
+        if kwargs:
+            key += tuple(sorted(kwargs.items()))
+        result = self._derived.get(key)
+        if result is None:
+            result = self._derived.setdefault(key,
+                                              method(self, *args, **kwargs))
+        return result
+    return wrapper
+
+
+def get_pattern_stats():
+    '''
+    :returns: the number of interned (derived) patterns and the number \
+              of distinct compiled regular expressions.
+    :rtype: dict
+    '''
+    return {'interned': len(_INTERNED_PATTERNS),
+            'compiled': len(_COMPILED_PATTERNS)}
+
 
 class Pattern(object):
     """
@@ -94,6 +157,9 @@ class Pattern(object):
     p1.flags(<re.I,..>)
     p1.rsplit(..) -> split a string from the rightmost p1 occurrence
     p1.lsplit(..) -> split a string from the leftmost p1 occurrence
+
+    Patterns derived from others are interned and each distinct
+    (pattern, flags) pair is only compiled once.
     """
     _special_symbol_map = {'.': '[.]',
                            '*': '[*]',
@@ -119,22 +185,30 @@ class Pattern(object):
         self.optional = optional
         self._flags = flags
         self.value = value
+        self._compiled_pattern = None
+        # The patterns derived from this one (see _derived).
+        self._derived = {}
         return
 
+    @_derived
     def flags(self, *flags):
         f = self._flags
         for f1 in flags:
             f = f | f1
-        return Pattern(self.label, self.pattern, optional=self.optional,
-                       flags=f, value=self.value)
+        return _intern_pattern(self.label, self.pattern,
+                               optional=self.optional, flags=f,
+                               value=self.value)
 
     def get_compiled(self):
-        try:
-            return self._compiled_pattern
-        except AttributeError:
-            self._compiled_pattern = compiled = re.compile(self.pattern,
-                                                           self._flags)
-            return compiled
+        compiled = self._compiled_pattern
+        if compiled is None:
+            key = (self.pattern, self._flags)
+            compiled = _COMPILED_PATTERNS.get(key)
+            if compiled is None:
+                compiled = _COMPILED_PATTERNS.setdefault(
+                    key, re.compile(self.pattern, self._flags))
+            self._compiled_pattern = compiled
+        return compiled
 
     def match(self, string):
         return self.get_compiled().match(string)
@@ -183,14 +257,16 @@ class Pattern(object):
         assert abs(self).match(pattern_match), repr(pattern_match)
         return lhs, pattern_match, rhs
 
+    @_derived
     def __abs__(self):
-        return Pattern(self.label, r'\A' + self.pattern + r'\Z',
-                       flags=self._flags, value=self.value)
+        return _intern_pattern(self.label, r'\A' + self.pattern + r'\Z',
+                               flags=self._flags, value=self.value)
 
     def __repr__(self):
         return '%s(%r, %r)' % (self.__class__.__name__, self.label,
                                self.pattern)
 
+    @_derived
     def __or__(self, other):
         label = '( %s OR %s )' % (self.label, other.label)
         if self.pattern == other.pattern:
@@ -199,8 +275,9 @@ class Pattern(object):
         else:
             pattern = '(%s|%s)' % (self.pattern, other.pattern)
             flags = self._flags | other._flags
-        return Pattern(label, pattern, flags=flags)
+        return _intern_pattern(label, pattern, flags=flags)
 
+    @_derived
     def __and__(self, other):
         if isinstance(other, Pattern):
             label = '%s%s' % (self.label, other.label)
@@ -211,30 +288,33 @@ class Pattern(object):
             label = '%s%s' % (self.label, other)
             pattern = self.pattern + other
             flags = self._flags
-        return Pattern(label, pattern, flags=flags)
+        return _intern_pattern(label, pattern, flags=flags)
 
+    @_derived
     def __rand__(self, other):
         assert isinstance(other, str), repr(other)
         label = '%s%s' % (other, self.label)
         pattern = other + self.pattern
-        return Pattern(label, pattern, flags=self._flags)
+        return _intern_pattern(label, pattern, flags=self._flags)
 
+    @_derived
     def __invert__(self):
         if self.optional:
             if self.optional == 1:
-                return Pattern(
+                return _intern_pattern(
                     self.label + '...', self.pattern[:-1] + '*',
                     optional=2, flags=self._flags)
             if self.optional == 2:
-                return Pattern('%s %s' % (self.label[1:-4].strip(),
-                                          self.label),
-                               self.pattern[:-1] + '+',
-                               optional=3, flags=self._flags)
+                return _intern_pattern('%s %s' % (self.label[1:-4].strip(),
+                                                  self.label),
+                                       self.pattern[:-1] + '+',
+                                       optional=3, flags=self._flags)
             return self
         label = '[ %s ]' % (self.label)
         pattern = '(%s)?' % (self.pattern)
-        return Pattern(label, pattern, optional=1, flags=self._flags)
+        return _intern_pattern(label, pattern, optional=1, flags=self._flags)
 
+    @_derived
     def __add__(self, other):
         if isinstance(other, Pattern):
             label = '%s %s' % (self.label, other.label)
@@ -246,15 +326,17 @@ class Pattern(object):
             other = self._special_symbol_map.get(other, other)
             pattern = self.pattern + r'\s*' + other
             flags = self._flags
-        return Pattern(label, pattern, flags=flags)
+        return _intern_pattern(label, pattern, flags=flags)
 
+    @_derived
     def __radd__(self, other):
         assert isinstance(other, str), repr(other)
         label = '%s %s' % (other, self.label)
         other = self._special_symbol_map.get(other, other)
         pattern = other + r'\s*' + self.pattern
-        return Pattern(label, pattern, flags=self._flags)
+        return _intern_pattern(label, pattern, flags=self._flags)
 
+    @_derived
     def named(self, name=None):
         if name is None:
             label = self.label
@@ -263,13 +345,15 @@ class Pattern(object):
         else:
             label = '<%s>' % (name)
         pattern = '(?P%s%s)' % (label.replace('-', '_'), self.pattern)
-        return Pattern(label, pattern, flags=self._flags, value=self.value)
+        return _intern_pattern(label, pattern, flags=self._flags,
+                               value=self.value)
 
+    @_derived
     def rename(self, label):
         if label[0] + label[-1] != '<>':
             label = '<%s>' % (label)
-        return Pattern(label, self.pattern, optional=self.optional,
-                       flags=self._flags, value=self.value)
+        return _intern_pattern(label, self.pattern, optional=self.optional,
+                               flags=self._flags, value=self.value)
 
     def __call__(self, string):
         m = self.match(string)
@@ -279,6 +363,149 @@ class Pattern(object):
             return self.value
         return m.group()
 
+
+class PatternStats(object):
+    '''
+    Statistics of the calls of the Pattern methods that match strings,
+    by pattern label and method: the number of calls, the number that
+    matched (returned something other than None) and the cumulative
+    time taken. The time of a call includes that of any calls it makes
+    (e.g. rsplit calls match). Statistics are only recorded while the
+    methods are instrumented (see instrument_patterns()).
+    '''
+    # The instrumented methods.
+    methods = ('match', 'search', 'rsplit', 'lsplit', '__call__')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # The calls, hits and time of each (label, method).
+        self._counts = {}
+
+    def record(self, label, method, hit, elapsed):
+        '''
+        Records a call.
+
+        :param str label: the label of the pattern.
+        :param str method: the name of the method.
+        :param bool hit: whether the call matched.
+        :param float elapsed: the time taken in seconds.
+        '''
+        with self._lock:
+            counts = self._counts.get((label, method))
+            if counts is None:
+                counts = self._counts[(label, method)] = [0, 0, 0.0]
+            counts[0] += 1
+            if hit:
+                counts[1] += 1
+            counts[2] += elapsed
+
+    def reset(self):
+        '''Discards the statistics recorded so far.'''
+        with self._lock:
+            self._counts.clear()
+
+    def rows(self, sort='time'):
+        '''
+        :param str sort: the key to sort by (in decreasing order), one \
+                         of 'time', 'calls', 'hits' or 'hit_rate'.
+
+        :returns: the statistics of each pattern label and method.
+        :rtype: list of dict
+
+        :raises ValueError: if the sort key is not valid.
+        '''
+        if sort not in ('time', 'calls', 'hits', 'hit_rate'):
+            raise ValueError(
+                "'{0}' is not a valid key to sort pattern statistics "
+                "by".format(sort))
+        with self._lock:
+            items = [(key, list(counts)) for key, counts in
+                     self._counts.items()]
+        rows = []
+        for (label, method), (calls, hits, elapsed) in items:
+            rows.append({'label': label, 'method': method, 'calls': calls,
+                         'hits': hits, 'hit_rate': float(hits) / calls,
+                         'time': elapsed})
+        rows.sort(key=lambda row: (-row[sort], row['label'], row['method']))
+        return rows
+
+    def table(self, sort='time', limit=None):
+        '''
+        :param str sort: the key to sort by (see rows()).
+        :param int limit: the maximum number of rows or None for all.
+
+        :returns: the statistics as a table.
+        :rtype: str
+        '''
+        lines = ['{0:>10} {1:>10} {2:>8} {3:>10}  {4:<8}  {5}'.format(
+            'calls', 'hits', 'hit rate', 'time (s)', 'method', 'label')]
+        for row in self.rows(sort)[:limit]:
+            lines.append(
+                '{calls:10d} {hits:10d} {hit_rate:8.1%} {time:10.4f}  '
+                '{method:<8}  {label}'.format(**row))
+        return '\n'.join(lines)
+
+    def to_json(self, sort='time', **kwargs):
+        '''
+        :param str sort: the key to sort by (see rows()).
+        :param kwargs: any arguments for json.dumps.
+
+        :returns: the statistics as a JSON list of objects.
+        :rtype: str
+        '''
+        return json.dumps(self.rows(sort), **kwargs)
+
+
+# The statistics of the instrumented Pattern methods.
+PATTERN_STATS = PatternStats()
+
+
+def _instrumented(name, method):
+    '''
+    :param str name: the name of a Pattern method.
+    :param method: the (uninstrumented) method.
+    :type method: callable
+
+    :returns: the method with its calls recorded in PATTERN_STATS.
+    :rtype: callable
+    '''
+    timer = timeit.default_timer
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        start = timer()
+        result = method(self, *args, **kwargs)
+        PATTERN_STATS.record(self.label, name, result is not None,
+                             timer() - start)
+        return result
+    return wrapper
+
+
+def instrument_patterns(enable=True):
+    '''
+    Instruments the Pattern methods that match strings so that their
+    calls are recorded in PATTERN_STATS, or restores the original
+    methods. The methods are replaced rather than checking a flag on
+    each call, so there is no overhead when they are not instrumented.
+    The methods are those of the Pattern class, so this applies to the
+    whole process (all threads and parser contexts). They are
+    instrumented when a parser is created with pattern_stats set (see
+    :py:meth:`fparser.two.parser.ParserFactory.create`) and are only
+    restored by calling this function with enable set to False.
+
+    :param bool enable: whether to instrument the methods.
+    '''
+    for name in PatternStats.methods:
+        method = _PATTERN_METHODS[name]
+        setattr(Pattern, name,
+                _instrumented(name, method) if enable else method)
+
+
+# The uninstrumented Pattern methods.
+_PATTERN_METHODS = dict((name, Pattern.__dict__[name])
+                        for name in PatternStats.methods)
+
+
 # Predefined patterns
 
 
@@ -374,6 +601,18 @@ logical_literal_constant_named = Pattern(
 literal_constant = int_literal_constant | real_literal_constant | \
                    complex_literal_constant | logical_literal_constant | \
                    char_literal_constant | boz_literal_constant
+# Classifies a literal constant (with its blanks removed) with a single
+# match: the name of the (only) named group that matched gives the form
+# of the constant. The forms are mutually exclusive so at
+# most one group can match.
+literal_constant_form = int_literal_constant.named('int') | \
+                        real_literal_constant.named('real') | \
+                        complex_literal_constant.named('complex') | \
+                        logical_literal_constant.named('logical') | \
+                        char_literal_constant.named('char') | \
+                        binary_constant.named('binary') | \
+                        octal_constant.named('octal') | \
+                        hex_constant.named('hex')
 constant = literal_constant | named_constant
 int_constant = int_literal_constant | boz_literal_constant | named_constant
 char_constant = char_literal_constant | named_constant
@@ -422,6 +661,7 @@ keyword_equal = keyword + '='
 
 abs_constant = abs(constant)
 abs_literal_constant = abs(literal_constant)
+abs_literal_constant_form = abs(literal_constant_form)
 abs_int_literal_constant = abs(int_literal_constant)
 abs_signed_int_literal_constant = abs(signed_int_literal_constant)
 abs_signed_int_literal_constant_named = abs(signed_int_literal_constant_named)
@@ -43,7 +43,7 @@ subclass tests.
 '''
 
 import pytest
-from fparser.two.Fortran2003 import Declaration_Construct
+from fparser.two.Fortran2003 import Declaration_Construct, Program
 from fparser.api import get_reader
 
 
@@ -97,6 +97,14 @@ def test_format_statement(f2003_create):
     assert str(result) == code
     assert "Format_Stmt" in repr(result)
 
+    # A Hollerith edit descriptor holding a bracket.
+    code = ("PROGRAM p\n"
+            "1 FORMAT(2H(a)\n"
+            "END PROGRAM p")
+    result = Program(get_reader(code))
+    assert str(result) == code
+    assert "Hollerith_Item('(a')" in repr(result)
+
 
 def test_interface_block(f2003_create):
     '''Test an interface block statement is supported by the declaration
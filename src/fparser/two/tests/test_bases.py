@@ -114,3 +114,23 @@ def test_io_ctrl_spec_errors():
     # description
     obj = Io_Control_Spec.match("not_unit=23")
     assert obj is None
+
+
+def test_no_match_sentinel():
+    ''' Unit tests for the internal no-match protocol of Base: _parse
+    and match_or_none signal a failed match without an exception while
+    calling the class still raises NoMatchError '''
+    import pytest
+    from fparser.two.utils import NO_MATCH, NoMatchError
+    from fparser.two.Fortran2003 import Part_Ref, Primary, Name, Comment
+    assert Primary._parse("1 +", None) is NO_MATCH
+    assert Primary.match_or_none("1 +") is None
+    with pytest.raises(NoMatchError) as excinfo:
+        _ = Primary("1 +")
+    assert str(excinfo.value) == "Primary: '1 +'"
+    assert str(Primary._parse("a(1)", None)) == "a(1)"
+    assert isinstance(Name.match_or_none("a"), Name)
+    # A class with its own __new__ is called.
+    assert Comment.match_or_none("a") is None
+    # The parts of a call are matched without an exception.
+    assert Part_Ref.match("a(1 +)") is None
@@ -0,0 +1,131 @@
+# Copyright (c) 2020 Science and Technology Facilities Council
+
+# All rights reserved.
+
+# Modifications made as part of the fparser project are distributed
+# under the following license:
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+'''Test the iterative expression parser in expression.py.'''
+
+import sys
+import pytest
+from fparser.two import expression
+from fparser.two.utils import Base
+from fparser.two.Fortran2003 import Expr
+
+
+def _nodes(obj):
+    '''
+    :returns: the class, string and items (other than nodes) of each \
+              node of a parse tree, in depth-first order.
+    :rtype: list
+    '''
+    nodes = []
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if isinstance(obj, Base):
+            nodes.append((type(obj).__name__, obj.string))
+            stack.extend(reversed(getattr(obj, 'items', ())))
+        else:
+            nodes.append(obj)
+    return nodes
+
+
+@pytest.mark.parametrize('string', [
+    'a + b * c - d / e', 'a ** b ** c * d', '-a ** 2 + b', '+ a * b - c',
+    'a // b // c', "'x'//-b", 'a < b + c', 'a .EQ. 1.0e+5 + x',
+    '.not. a .and. b == c .or. .not. (d .ne. e)', 'a .eqv. b .neqv. c',
+    'a .and. -b < c', '1..eq.x', 'f( a ) * g(1, b) + h(i)%j',
+    '.true. .and. .false._k', '2.d0*x + 1.e-3_dp', 'x - 1.0e+5',
+    '-f( a )', 'b*1.0e+5 + c'])
+def test_parse(f2003_create, string):
+    '''Test that the iterative parser gives the same tree, with the same
+    strings, as the recursive rules.
+
+    '''
+    assert not expression.ENABLED
+    expected = _nodes(Expr(string))
+    result = expression.parse(string)
+    assert _nodes(result) == expected
+
+
+@pytest.mark.parametrize('string', [
+    'a', 'f(a + b)', 'a .myop. b', '.inv. a + b', 'a * -b', 'a ** -b',
+    'a < b < c', 'a == .not. b', '.not. .not. a', 'a + b*1.0e+5',
+    'a +', ' -a', 'a \\ b + c'])
+def test_parse_declined(f2003_create, string):
+    '''Test that the iterative parser declines expressions it does not
+    handle, leaving them to the recursive rules.
+
+    '''
+    assert expression.parse(string) is None
+
+
+def test_enabled(f2003_create, monkeypatch):
+    '''Test that Expr uses the iterative parser when it is enabled, so
+    that an expression with more operators than the recursion limit
+    can be parsed.
+
+    '''
+    monkeypatch.setattr(expression, 'ENABLED', True)
+    terms = sys.getrecursionlimit() + 100
+    string = ' + '.join('a(%d)*b' % index for index in range(terms))
+    result = Expr(string)
+    for index in range(terms - 1, 0, -1):
+        assert result.items[1] == '+'
+        assert result.items[2].string == 'a(%d)*b' % index
+        result = result.items[0]
+    assert result.string == 'a(0)*b'
+    assert str(result) == 'a(0) * b'
+    # Expressions with defined operators use the recursive rules.
+    assert str(Expr('a .inv. b + c')) == 'a .INV. b + c'
+
+
+def test_long_expression(f2003_create, monkeypatch):
+    '''Test that a program with an expression of 5000 terms can be parsed
+    with the iterative parser and that the result can be printed and
+    walked.
+
+    '''
+    from fparser.common.readfortran import FortranStringReader
+    from fparser.two.Fortran2003 import Program, Name
+    from fparser.two.utils import walk_ast
+    monkeypatch.setattr(expression, 'ENABLED', True)
+    terms = 5000
+    string = ' + '.join('x%d' % index for index in range(terms))
+    code = 'program long\n  y = {0}\nend program long\n'.format(string)
+    tree = Program(FortranStringReader(code))
+    assert str(tree) == 'PROGRAM long\n  y = {0}\nEND PROGRAM long'.format(
+        string)
+    assert repr(tree).count("Name('x") == terms
+    names = walk_ast(tree.content, [Name])
+    assert [str(name) for name in names] == \
+        ['long', 'y'] + ['x%d' % index for index in range(terms)] + ['long']
@@ -167,6 +167,50 @@ def test_literal_constant():
     assert isinstance(obj, Binary_Constant), repr(obj)
     assert str(obj) == 'B"01011101"'
 
+    obj = tcls("z '1f'")
+    assert isinstance(obj, Hex_Constant), repr(obj)
+    assert str(obj) == "Z '1F'"
+
+    obj = tcls('1 _ dp')
+    assert isinstance(obj, Int_Literal_Constant), repr(obj)
+    assert str(obj) == '1_dp'
+
+    # Strings that are classified as a form of literal constant but do
+    # not match it, and strings that are not literal constants at all.
+    for string in ["'a' // 'b'", 'B"012"', ' (1, 2)', 'x', '1 + 2', '']:
+        with pytest.raises(NoMatchError) as excinfo:
+            _ = tcls(string)
+        assert str(excinfo.value) == "Literal_Constant: '{0}'".format(string)
+
+
+def test_literal_constant_subclasses():
+    ''' Tests that Literal_Constant uses the class of each form of
+    literal constant held in the current table of subclasses (R306).
+    '''
+    from fparser.two import Fortran2003
+    from fparser.two.utils import get_subclasses, set_subclasses
+
+    class Int_Literal_Constant(Fortran2003.Int_Literal_Constant):
+        ''' A replacement of Int_Literal_Constant. '''
+        match = staticmethod(Fortran2003.Int_Literal_Constant.match)
+
+    class Binary_Constant(Fortran2003.Binary_Constant):
+        ''' A replacement of Binary_Constant. '''
+        match = staticmethod(Fortran2003.Binary_Constant.match)
+
+    table = dict(get_subclasses())
+    for clsname, cls in [("Literal_Constant", Int_Literal_Constant),
+                         ("Boz_Literal_Constant", Binary_Constant)]:
+        table[clsname] = [cls if subcls.__name__ == cls.__name__
+                          else subcls for subcls in table[clsname]]
+    previous = set_subclasses(table)
+    try:
+        assert isinstance(Literal_Constant("35"), Int_Literal_Constant)
+        assert isinstance(Literal_Constant("B'01'"), Binary_Constant)
+        assert isinstance(Literal_Constant("O'01'"), Octal_Constant)
+    finally:
+        set_subclasses(previous)
+
 
 #
 # SECTION 4
@@ -3271,6 +3315,15 @@ def test_format_stmt():  # R1001
     assert isinstance(obj, tcls), repr(type(obj))
     assert str(obj) == "FORMAT('a:', :, ' b')"
 
+    # Brackets within Hollerith edit descriptors.
+    obj = tcls("format (2h(a)")
+    assert isinstance(obj, tcls), repr(type(obj))
+    assert str(obj) == "FORMAT(2H(a)"
+
+    obj = tcls("format (i3, 2h)(, a)")
+    assert isinstance(obj, tcls), repr(type(obj))
+    assert str(obj) == "FORMAT(I3, 2H)(, A)"
+
     return  # TODO
     obj = tcls("format('text=','  '")
     assert str(obj) == ''
@@ -3287,6 +3340,10 @@ def test_format_specification():  # R1002
     assert isinstance(obj, tcls), repr(type(obj))
     assert str(obj) == "(' ', 2F8.1)"
 
+    obj = tcls("(2h(a, i3)")
+    assert isinstance(obj, tcls), repr(type(obj))
+    assert str(obj) == "(2H(a, I3)"
+
 
 def test_format_item():  # R1003
 
@@ -77,3 +77,263 @@ def test_parserfactory_std():
     with pytest.raises(ValueError) as excinfo:
         parser = ParserFactory().create(std="invalid")
         assert "is an invalid standard" in str(excinfo.value)
+
+
+def test_parser_context():
+    '''Test that parser contexts for different standards can be used
+    concurrently in threads without affecting each other or the class
+    hierarchy set up by the create method.
+
+    '''
+    import threading
+    fstring = (
+        "submodule (x) y\n"
+        "end\n")
+    parser = ParserFactory().create(std="f2003")
+    f2003 = ParserFactory().create_context(std="f2003")
+    f2008 = ParserFactory().create_context(std="f2008")
+    assert f2003.std == "f2003" and f2008.std == "f2008"
+    results = {}
+
+    def parse(index, context):
+        ''' Parses the submodule with the supplied context. '''
+        try:
+            results[index] = str(context.parse(FortranStringReader(fstring)))
+        except FortranSyntaxError:
+            results[index] = None
+
+    threads = [threading.Thread(target=parse,
+                                args=(index, (f2003, f2008)[index % 2]))
+               for index in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for index in range(8):
+        if index % 2:
+            assert "SUBMODULE (x) y\nEND" in results[index]
+        else:
+            assert results[index] is None
+    # The class hierarchy set up by create is unaffected.
+    with pytest.raises(FortranSyntaxError):
+        _ = parser(FortranStringReader(fstring))
+    # Nodes may be created directly within a context.
+    from fparser.two import Fortran2003
+    with f2008.activate():
+        assert str(Fortran2003.Assignment_Stmt("a=b")) == "a = b"
+
+
+def test_parserfactory_pattern_stats():
+    '''Test that the ParserFactory create method instruments the
+    patterns when pattern_stats is set and that the statistics can be
+    dumped as a table or JSON.
+
+    '''
+    import json
+    from fparser.two import pattern_tools
+    from fparser.two.pattern_tools import Pattern, PATTERN_STATS, \
+        instrument_patterns
+    PATTERN_STATS.reset()
+    _ = ParserFactory().create(std="f2003", pattern_stats=True)
+    try:
+        assert Pattern.match is not pattern_tools._PATTERN_METHODS["match"]
+        # Creating another parser does not switch the statistics off.
+        parser = ParserFactory().create(std="f2003")
+        _ = parser(FortranStringReader("program x\na = b + 1\nend\n"))
+        rows = PATTERN_STATS.rows()
+        assert rows
+        assert [row["time"] for row in rows] == \
+            sorted((row["time"] for row in rows), reverse=True)
+        for row in rows:
+            assert row["method"] in Pattern.__dict__
+            assert 0 <= row["hits"] <= row["calls"]
+        assert json.loads(PATTERN_STATS.to_json()) == rows
+        table = PATTERN_STATS.table(sort="calls", limit=3).splitlines()
+        assert table[0].split() == ["calls", "hits", "hit", "rate",
+                                    "time", "(s)", "method", "label"]
+        assert len(table) == 4
+    finally:
+        instrument_patterns(False)
+    # The original methods are restored and no longer record calls.
+    for name in pattern_tools.PatternStats.methods:
+        assert Pattern.__dict__[name] is pattern_tools._PATTERN_METHODS[name]
+    PATTERN_STATS.reset()
+    _ = parser(FortranStringReader("program x\na = b + 1\nend\n"))
+    assert not PATTERN_STATS.rows()
+
+
+def test_parserfactory_profile_rules():
+    '''Test that the ParserFactory create method instruments the
+    grammar rules when profile_rules is set and that their profile can
+    be dumped as a table or JSON.
+
+    '''
+    import json
+    from fparser.two import utils
+    from fparser.two.utils import Base, BlockBase, RULE_PROFILE, \
+        instrument_rules
+    from fparser.common.readfortran import FortranReaderBase
+    RULE_PROFILE.reset()
+    _ = ParserFactory().create(std="f2003", profile_rules=True)
+    try:
+        assert Base.__dict__["_parse"].__func__ is not \
+            utils._RULE_METHODS[0]
+        # Creating another parser does not switch the profiler off.
+        parser = ParserFactory().create(std="f2003")
+        _ = parser(FortranStringReader("program x\na = b + 1\nend\n"))
+        rows = RULE_PROFILE.rows()
+        assert [row["exclusive"] for row in rows] == \
+            sorted((row["exclusive"] for row in rows), reverse=True)
+        by_rule = dict(((row["rule"], row["kind"]), row) for row in rows)
+        program = by_rule[("Program", "rule")]
+        assert program["attempts"] == program["successes"] == 1
+        assert program["inclusive"] >= \
+            sum(row["exclusive"] for row in rows) * 0.99
+        assert by_rule[("Main_Program", "block")]["successes"] == 1
+        assert by_rule[("Assignment_Stmt", "rule")]["successes"] == 1
+        assert sum(row["pushbacks"] for row in rows) > 0
+        for row in rows:
+            assert row["attempts"] == row["successes"] + row["failures"]
+            assert row["inclusive"] >= row["exclusive"]
+        assert json.loads(RULE_PROFILE.to_json()) == rows
+        table = RULE_PROFILE.table(sort="attempts", limit=3).splitlines()
+        assert table[0].split() == ["attempts", "successes", "failures",
+                                    "incl", "(s)", "excl", "(s)",
+                                    "pushbacks", "kind", "rule"]
+        assert len(table) == 4
+        with pytest.raises(ValueError) as excinfo:
+            RULE_PROFILE.rows(sort="rule")
+        assert "'rule' is not a valid key" in str(excinfo.value)
+    finally:
+        instrument_rules(False)
+    # The original methods are restored and no longer record calls.
+    assert (Base.__dict__["_parse"].__func__,
+            BlockBase.__dict__["match"].__func__,
+            FortranReaderBase.__dict__["put_item"]) == utils._RULE_METHODS
+    RULE_PROFILE.reset()
+    _ = parser(FortranStringReader("program x\na = b + 1\nend\n"))
+    assert not RULE_PROFILE.rows()
+
+
+def test_get_first_sets():
+    '''Test that the FIRST set of a class holds the tokens of its own
+    match method and those of its subclasses and of the classes it
+    refers to, and is None if any of them is not known.
+
+    '''
+    from fparser.two.utils import Base
+    from fparser.two.parser import get_first_sets
+
+    def no_match(_):
+        ''' Never matches. '''
+        return None
+
+    class Any_Start(Base):
+        ''' Has its own match without first_tokens. '''
+        subclass_names = []
+        match = staticmethod(no_match)
+
+    class Word(Base):
+        ''' Starts with a letter or a number. '''
+        subclass_names = []
+        first_tokens = ['Number', 'letter']
+        match = staticmethod(no_match)
+
+    class Number(Base):
+        ''' Starts with a sign, a digit or a dot (e.g. real). '''
+        subclass_names = ['Word']
+        first_tokens = ['sign', 'digit', '.', 'Number']
+        match = staticmethod(no_match)
+
+    class Stmt(Base):
+        ''' Starts with a keyword. '''
+        subclass_names = []
+        first_tokens = ['CALL', 'quote']
+        match = staticmethod(no_match)
+
+    class Choice(Base):
+        ''' Has no match of its own. '''
+        subclass_names = ['Stmt', 'Number']
+
+    class Anything(Base):
+        ''' Has a subclass that can start with anything. '''
+        subclass_names = ['Stmt', 'Any_Start']
+
+    classes = [Any_Start, Word, Number, Stmt, Choice, Anything]
+    base_classes = dict((cls.__name__, cls) for cls in classes)
+    subclasses = dict((cls.__name__, [base_classes[name] for name in
+                                      cls.subclass_names])
+                      for cls in classes)
+    first = get_first_sets(base_classes, subclasses)
+    letters = set("ABCDEFGHIJKLMNOPQRSTUVWXYZ")
+    assert first["Any_Start"] is None
+    assert first["Word"] == first["Number"] == \
+        letters | set(["+", "-", "0", "."])
+    assert first["Stmt"] == set(["C", "'", '"'])
+    assert first["Choice"] == first["Number"] | first["Stmt"]
+    assert first["Anything"] is None
+
+
+def test_first_token_subclasses():
+    '''Test that the ParserFactory adds the subclasses that can match a
+    string starting with a token to the table of subclasses.
+
+    '''
+    from fparser.two import Fortran2003
+    from fparser.two.utils import first_token
+    _ = ParserFactory().create(std="f2003")
+    table = Fortran2003.Base.subclasses
+    assert first_token("  12.0") == "0"
+    assert first_token("call x") == "C"
+    assert first_token("(/ 1 /)") == "("
+    assert first_token(" ") == ""
+    # A string starting with a digit does not try Name-based rules.
+    digit = table[("Level_1_Expr", "0")]
+    assert Fortran2003.Literal_Constant in digit
+    assert Fortran2003.Name not in digit
+    assert Fortran2003.Data_Ref not in digit
+    assert Fortran2003.Parenthesis not in digit
+    assert Fortran2003.Parenthesis in table[("Level_1_Expr", "(")]
+    # Statements are selected by their keyword.
+    call = table[("Action_Stmt", "C")]
+    assert Fortran2003.Call_Stmt in call
+    assert Fortran2003.Assignment_Stmt in call
+    assert Fortran2003.Allocate_Stmt not in call
+    assert [cls for cls in table["Action_Stmt"] if cls in call] == call
+    # Tokens that do not prune any subclass have no entry.
+    assert ("Level_1_Expr", "@") not in table
+    obj = Fortran2003.Primary("1 ")
+    assert isinstance(obj, Fortran2003.Int_Literal_Constant)
+
+
+def test_block_dispatch():
+    '''Test that a block only tries the classes that can match the first
+    token of the next line.
+
+    '''
+    from fparser.two import Fortran2003
+    from fparser.two.utils import _get_dispatch
+    _ = ParserFactory().create(std="f2003")
+    table = Fortran2003.Base.subclasses
+    assert table[("If_Then_Stmt", None)] == frozenset(["I"])
+    # A class with its own __new__ method may match anything.
+    assert ("Comment", None) not in table
+    classes = [Fortran2003.Use_Stmt, Fortran2003.Comment,
+               Fortran2003.Execution_Part_Construct]
+    dispatch = _get_dispatch(classes)
+    # The dispatch is only created once.
+    assert _get_dispatch(list(classes)) is dispatch
+    reader = FortranStringReader("use x\n! a comment\na = 1\n",
+                                 ignore_comments=False)
+    assert dispatch.candidates(reader) == frozenset([0, 1, 2])
+    _ = reader.get_item()
+    # Comments are not dispatched.
+    assert dispatch.candidates(reader) is None
+    _ = reader.get_item()
+    # An assignment starting with a name other than 'u' skips Use_Stmt.
+    assert dispatch.candidates(reader) == frozenset([1, 2])
+    assert reader.get_item().line == "a = 1"
+    assert dispatch.candidates(reader) is None
+    obj = Fortran2003.Specification_Part(
+        FortranStringReader("use x\nimplicit none\ninteger a\n"))
+    assert str(obj) == "USE x\nIMPLICIT NONE\nINTEGER :: a"
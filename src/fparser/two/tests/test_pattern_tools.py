@@ -120,3 +120,64 @@ def test_power_op_pattern():
     assert match.rsplit('a * b ** c') == ('a * b', '**', 'c')
     assert match.lsplit('a ** b ** c') == ('a', '**', 'b ** c')
     assert match.rsplit('a ** b ** c') == ('a ** b', '**', 'c')
+
+
+def test_pattern_interning():
+    '''
+    Tests that derived patterns are interned and that each distinct
+    regular expression is only compiled once.
+    '''
+    import re
+    from fparser.two.pattern_tools import Pattern, get_pattern_stats, name
+    assert name.named() is name.named()
+    assert abs(name) is abs(name)
+    assert name.flags(re.I) is name.flags(re.I)
+    assert (name + ',') is (name + ',')
+    # Equivalent patterns derived in different ways are the same object.
+    other = Pattern('<name>', name.pattern, flags=name._flags)
+    assert other.named() is name.named()
+    # Patterns with the same regular expression share its compiled form.
+    assert other.get_compiled() is name.get_compiled()
+    assert get_pattern_stats()['compiled'] > 0
+    mult_op = fparser.two.pattern_tools.mult_op.named()
+    assert mult_op.rsplit('a * b') == ('a', '*', 'b')
+    # Splitting again neither creates nor compiles any patterns.
+    stats = get_pattern_stats()
+    assert mult_op.rsplit('c * d') == ('c', '*', 'd')
+    assert mult_op.lsplit('c * d') == ('c', '*', 'd')
+    assert get_pattern_stats() == stats
+
+
+def test_pattern_stats():
+    '''
+    Tests that instrumented patterns record their calls by label and
+    method.
+    '''
+    import pytest
+    from fparser.two.pattern_tools import name, add_op, PATTERN_STATS, \
+        instrument_patterns
+    PATTERN_STATS.reset()
+    instrument_patterns()
+    try:
+        assert name.match('a1')
+        assert not name.match('1a')
+        assert name('abc') == 'abc'
+        assert add_op.named().rsplit('a + b') == ('a', '+', 'b')
+        assert add_op.named().rsplit('a') is None
+    finally:
+        instrument_patterns(False)
+    assert name.match('a2')
+    rows = dict(((row['label'], row['method']), row)
+                for row in PATTERN_STATS.rows(sort='calls'))
+    # __call__ calls match.
+    assert rows[('<name>', 'match')]['calls'] == 3
+    assert rows[('<name>', 'match')]['hits'] == 2
+    assert rows[('<name>', '__call__')]['hit_rate'] == 1.0
+    assert rows[('<add-op>', 'rsplit')]['calls'] == 2
+    assert rows[('<add-op>', 'rsplit')]['hit_rate'] == 0.5
+    assert '<name>' in PATTERN_STATS.table()
+    with pytest.raises(ValueError) as excinfo:
+        PATTERN_STATS.rows(sort='label')
+    assert "'label' is not a valid key" in str(excinfo.value)
+    PATTERN_STATS.reset()
+    assert not PATTERN_STATS.rows()
@@ -141,7 +141,7 @@ def test_runner_internal_error(tmpdir, monkeypatch, capsys):
     # Create a dummy function that replaces the parser
     error_string = "monkey trouble"
 
-    def dummy_parser(_):
+    def dummy_parser(_, **kwargs):
         ''' dummy function that simply raises an internal error '''
         raise InternalError(error_string)
     # monkeypatch the parser so that it returns an InternalError exception.
@@ -318,6 +318,35 @@ def test_main_output_task_none(tmpdir, capsys, monkeypatch):
     assert stdout == ""
 
 
+def test_main_profile_rules(tmpdir, capsys, monkeypatch):
+    '''Test that the script main() function reports the grammar rules
+    taking the most time to match when --profile-rules is set.
+
+    '''
+    import sys
+    from fparser.two.utils import instrument_rules
+    # Create a temporary file containing Fortran code to pass into
+    # runner().
+    my_file = tmpdir.mkdir("sub").join("hello.f90")
+    my_file.write("program hello\nend program hello\n")
+    # Use monkeypatch to spoof the command-line argument.
+    monkeypatch.setattr(sys, "argv", ["fparser2", "--task=none",
+                                      "--profile-rules", my_file.strpath])
+    # Run the relevant script method (main()).
+    try:
+        fparser2.main()
+    finally:
+        instrument_rules(False)
+    # Capture the output and check that the profile has been output.
+    stdout, _ = capsys.readouterr()
+    lines = stdout.splitlines()
+    assert lines[0] == "Grammar rules taking the most time to match:"
+    assert lines[1].split()[0] == "attempts"
+    assert 2 < len(lines) <= 2 + fparser2.RULE_PROFILE_LIMIT
+    assert any(line.split()[-2:] == ["rule", "Program"]
+               for line in lines[2:])
+
+
 def test_main_output_task_invalid(tmpdir, capsys, monkeypatch):
     '''Test that the script main() function prints an error when an
     invalid task option is provided.
@@ -418,3 +447,71 @@ def test_read_main(capsys, tmpdir, monkeypatch):
     stdout, _ = capsys.readouterr()
     assert "line #1'program hello'" in stdout
     assert "line #2'end program hello'" in stdout
+
+
+class DummyBatchArgs(DummyReadArgs):
+    '''dummy object pretending to be the argument options for the read
+    module in scripts when in batch mode.
+
+    :param int jobs: the number of files to read concurrently.
+    :param bool json: whether to output the summary as JSON.
+
+    '''
+    def __init__(self, jobs=1, json=False):
+        super(DummyBatchArgs, self).__init__()
+        self.batch = True
+        self.jobs = jobs
+        self.slowest = 2
+        self.json = json
+
+
+def test_find_fortran_files(tmpdir):
+    '''Test that directories are searched for Fortran files and that
+    other paths are returned unchanged.'''
+    sub = tmpdir.mkdir("sub")
+    sub.join("b.F90").write("")
+    sub.mkdir("inner").join("c.f").write("")
+    sub.join("a.f90").write("")
+    sub.join("notes.txt").write("")
+    files = read.find_fortran_files([str(sub), "missing.f90"])
+    assert files == [str(sub.join("a.f90")), str(sub.join("b.F90")),
+                     str(sub.join("inner", "c.f")), "missing.f90"]
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_read_runner_batch(capsys, tmpdir, jobs):
+    '''Test that the script reads files in batch mode, without showing
+    their content, and reports the throughput and any failures.'''
+    sub = tmpdir.mkdir("sub")
+    sub.join("hello1.f90").write("program hello1\n! comment\n"
+                                 "end program hello1\n")
+    sub.join("hello2.f90").write("program hello2\nend program hello2\n")
+    read.runner(None, DummyBatchArgs(jobs=jobs),
+                [str(sub), "idontexist.f90"])
+    stdout, _ = capsys.readouterr()
+    assert "line #1" not in stdout
+    assert ("Read 3 file(s) (1 failed) in " in stdout)
+    assert "   lines:            5 (" in stdout
+    assert "   items:            4 (" in stdout
+    assert "Slowest files:\n" in stdout
+    assert stdout.count(str(sub)) == 2
+    assert "Failed to read 'idontexist.f90': " in stdout
+
+
+def test_read_runner_batch_json(capsys, tmpdir):
+    '''Test that the script outputs a JSON summary in batch mode if
+    requested.'''
+    import json
+    my_file = tmpdir.mkdir("sub").join("hello.f90")
+    my_file.write("program hello\nend program hello\n")
+    read.runner(None, DummyBatchArgs(json=True), [str(my_file)])
+    stdout, _ = capsys.readouterr()
+    summary = json.loads(stdout)
+    assert summary["files"] == 1
+    assert summary["lines"] == 2
+    assert summary["items"] == 2
+    assert summary["bytes"] == 32
+    assert summary["failed"] == []
+    assert [result["filename"] for result in summary["slowest"]] == \
+        [str(my_file)]
+    assert summary["items_per_second"] > 0.0
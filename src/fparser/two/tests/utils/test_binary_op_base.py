@@ -0,0 +1,94 @@
+# Copyright (c) 2020 Science and Technology Facilities Council
+
+# All rights reserved.
+
+# Modifications made as part of the fparser project are distributed
+# under the following license:
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''File containing unit tests for the BinaryOpBase baseclass and the
+operator table it uses in utils.py'''
+
+from fparser.two import pattern_tools as pattern
+from fparser.two.utils import get_operator_table, OPERATOR_TABLES
+from fparser.two.Fortran2003 import Expr, Level_2_Expr
+
+
+def test_operator_table():
+    '''Test that the operator table only holds the top-level operators
+    of an expression and splits it as Pattern.rsplit/lsplit would.
+
+    '''
+    table = get_operator_table("a + f(b - c) - 'd+e' + 1.0e+5")
+    assert get_operator_table("a + f(b - c) - 'd+e' + 1.0e+5") is table
+    assert table.line == "a + f(F2PY_EXPR_TUPLE_1) - " \
+        "'_F2PY_STRING_CONSTANT_1_' + 1.0e+5"
+    spans, adjacent = table.spans(pattern.add_op.named())
+    assert [table.line[start:end] for start, end in spans] == \
+        ['+', '-', '+', '+']
+    assert adjacent == 4
+    # The sign of the exponent is not split at.
+    assert table.split(pattern.add_op.named(), is_add=True) == \
+        ("a + f(F2PY_EXPR_TUPLE_1) - '_F2PY_STRING_CONSTANT_1_'", '+',
+         '1.0e+5')
+    assert table.split(pattern.add_op.named()) == \
+        ("a + f(F2PY_EXPR_TUPLE_1) - '_F2PY_STRING_CONSTANT_1_' + 1.0e",
+         '+', '5')
+    assert table.split(pattern.add_op.named(), right=False) == \
+        ('a', '+', "f(F2PY_EXPR_TUPLE_1) - '_F2PY_STRING_CONSTANT_1_' "
+         "+ 1.0e+5")
+    assert table.split(pattern.mult_op.named()) is None
+    # Adjacent operators do not give a split.
+    table = get_operator_table('a +-b')
+    assert table.spans(pattern.add_op.named())[1] == 0
+    assert table.split(pattern.add_op.named()) is None
+
+
+def test_operator_table_lhs(f2003_create):
+    '''Test that the table of the left-hand side of a split is derived
+    from the table of the expression.
+
+    '''
+    OPERATOR_TABLES.clear()
+    table = get_operator_table("a + f(b - c) + 'd+e'")
+    lhs = table.lhs('a + f(F2PY_EXPR_TUPLE_1)')
+    assert lhs == 'a + f(b - c)'
+    assert get_operator_table(lhs).line == 'a + f(F2PY_EXPR_TUPLE_1)'
+    # Expressions with an unclosed string are not derived from.
+    assert not get_operator_table("a + 'b").derivable
+    # Parsing a long sum only masks the expression once: the tables of
+    # all of its left-hand sides are derived.
+    OPERATOR_TABLES.clear()
+    terms = ['f(x{0}, y)'.format(index) for index in range(50)]
+    obj = Expr(' + '.join(terms))
+    assert isinstance(obj, Level_2_Expr)
+    assert str(obj) == ' + '.join(terms)
+    misses = OPERATOR_TABLES.stats()['misses']
+    for index in range(2, len(terms)):
+        _ = get_operator_table(' + '.join(terms[:index]))
+    assert OPERATOR_TABLES.stats()['misses'] == misses
@@ -0,0 +1,124 @@
+# Copyright (c) 2020 Science and Technology Facilities Council
+
+# All rights reserved.
+
+# Modifications made as part of the fparser project are distributed
+# under the following license:
+
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are
+# met:
+
+# 1. Redistributions of source code must retain the above copyright
+# notice, this list of conditions and the following disclaimer.
+
+# 2. Redistributions in binary form must reproduce the above copyright
+# notice, this list of conditions and the following disclaimer in the
+# documentation and/or other materials provided with the distribution.
+
+# 3. Neither the name of the copyright holder nor the names of its
+# contributors may be used to endorse or promote products derived from
+# this software without specific prior written permission.
+
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS
+# "AS IS" AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT
+# LIMITED TO, THE IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR
+# A PARTICULAR PURPOSE ARE DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT
+# HOLDER OR CONTRIBUTORS BE LIABLE FOR ANY DIRECT, INDIRECT, INCIDENTAL,
+# SPECIAL, EXEMPLARY, OR CONSEQUENTIAL DAMAGES (INCLUDING, BUT NOT
+# LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR SERVICES; LOSS OF USE,
+# DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER CAUSED AND ON ANY
+# THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY, OR TORT
+# (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+'''File containing unit tests for the packrat cache of Base.__new__
+in utils.py'''
+
+import pytest
+from fparser.common.readfortran import FortranStringReader
+from fparser.two import utils
+from fparser.two.utils import PACKRAT_STATS, get_packrat_cache
+
+SOURCE = '''\
+program test
+  integer :: a(10), b(10), i
+  equivalence (a(1), b(2), i)
+  do i = 1, 10
+    a(i) = b(i) * 2 + a(i) ** 2
+  end do
+  if (a(1) > b(2) .and. a(2) /= b(1)) print *, a(1), b(2)
+end program test
+'''
+
+
+@pytest.fixture(name="packrat")
+def fixture_packrat(monkeypatch):
+    '''Enables the packrat cache and resets its statistics.'''
+    monkeypatch.setattr(utils, "PACKRAT", True)
+    PACKRAT_STATS.reset()
+    yield
+    PACKRAT_STATS.reset()
+
+
+def test_packrat(f2003_create, packrat):
+    '''Test that the cache gives the same parse tree, that it saves work
+    and that the trees it gives share no nodes.
+
+    '''
+    from fparser.two.Fortran2003 import Program
+    utils.PACKRAT = False
+    expected = Program(FortranStringReader(SOURCE))
+    assert PACKRAT_STATS.hits + PACKRAT_STATS.misses == 0
+    utils.PACKRAT = True
+    result = Program(FortranStringReader(SOURCE))
+    assert repr(result) == repr(expected)
+    assert str(result) == str(expected)
+    assert PACKRAT_STATS.hits > 0
+    assert PACKRAT_STATS.misses > 0
+    assert PACKRAT_STATS.failures > 0
+    assert PACKRAT_STATS.saved_calls >= PACKRAT_STATS.hits
+    assert "hits" in PACKRAT_STATS.report()
+    assert not get_packrat_cache().active
+
+    nodes = set()
+
+    def walk(node):
+        assert id(node) not in nodes
+        nodes.add(id(node))
+        for child in getattr(node, "content", getattr(node, "items", ())):
+            if isinstance(child, utils.Base):
+                walk(child)
+    walk(result)
+
+
+def test_packrat_scope(f2003_create, packrat):
+    '''Test that the cache is only used while a statement is parsed and
+    that it remembers failed matches.
+
+    '''
+    from fparser.two.Fortran2003 import Assignment_Stmt, Name
+    cache = get_packrat_cache()
+    assert not cache.active
+    Name("a")
+    assert PACKRAT_STATS.hits + PACKRAT_STATS.misses == 0
+    cache.enter("statement")
+    try:
+        first = cache.match(Name, "a")
+        second = cache.match(Name, "a")
+        assert first is not second
+        assert repr(first) == repr(second)
+        for _ in range(2):
+            with pytest.raises(utils.NoMatchError):
+                cache.match(Assignment_Stmt, "a")
+    finally:
+        cache.exit()
+    assert PACKRAT_STATS.hits == 2
+    assert PACKRAT_STATS.misses == 2
+    assert PACKRAT_STATS.failures == 1
+    # A different statement starts with an empty cache.
+    cache.enter("another statement")
+    try:
+        cache.match(Name, "a")
+    finally:
+        cache.exit()
+    assert PACKRAT_STATS.misses == 3
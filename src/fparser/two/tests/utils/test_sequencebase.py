@@ -157,3 +157,67 @@ def test_match_repmap_spaces(f2003_create):
             "Explicit_Shape_Spec_List(',', (Explicit_Shape_Spec(None, "
             "Part_Ref(Name('n'), Section_Subscript_List(',', "
             "(Int_Literal_Constant('2', None),)))),)), None, None)))")
+
+
+def test_match_literals(f2003_create, monkeypatch):
+    '''Test that the sequencebase match method keeps runs of literal
+    constants as LiteralRuns when STREAM_LITERALS is set, giving the
+    same result as matching every item.
+
+    '''
+    from fparser.two import utils
+    from fparser.two.Fortran2003 import Data_Stmt_Value_List, Ac_Value_List
+    string = ", ".join(["1.0d0", "3*a", "x"] + [str(idx) for idx in
+                                                range(-5, 15)] +
+                       ["f(1, 2)"] + ["-2.5e-1"] * 16 + ["'s, t'"])
+    expected = Data_Stmt_Value_List(string)
+    assert isinstance(expected.items, tuple)
+    monkeypatch.setattr(utils, "STREAM_LITERALS", True)
+    result = Data_Stmt_Value_List(string)
+    items = result.items
+    assert isinstance(items, utils.LiteralSequence)
+    assert len(items) == len(expected.items) == 41
+    runs = items.runs
+    assert [len(run) for run in runs] == [20, 16]
+    assert list(runs[0].values) == list(range(-5, 15))
+    assert runs[0].values.typecode == "l"
+    assert list(runs[1].values) == [-0.25] * 16
+    assert runs[1].values.typecode == "d"
+    # The nodes of the items in runs are only matched when accessed.
+    assert str(result) == str(expected)
+    assert not runs[0]._nodes
+    assert items[3] is items[3]
+    assert list(runs[0]._nodes) == [0]
+    assert items[-2] == expected.items[-2]
+    assert str(items[-2]) == "-2.5E-1"
+    assert items[1:4] == expected.items[1:4]
+    assert repr(result) == repr(expected)
+    assert items == expected.items
+    assert result == expected
+    # Short runs are matched as before.
+    result = Data_Stmt_Value_List("1, 2, 3")
+    assert result.items == Data_Stmt_Value_List("1, 2, 3").items
+    assert isinstance(result.items, tuple)
+    # Array constructors
+    string = ", ".join(["-1.5"] * 20 + ["(i, i=1, 2)"])
+    result = Ac_Value_List(string)
+    assert isinstance(result.items, utils.LiteralSequence)
+    assert len(result.items) == 21
+    assert str(result) == ", ".join(["- 1.5"] * 20 + ["(i, i = 1, 2)"])
+    monkeypatch.setattr(utils, "STREAM_LITERALS", False)
+    assert repr(result) == repr(Ac_Value_List(string))
+
+
+def test_literal_run_to_numpy(f2003_create, monkeypatch):
+    '''Test that the values of a LiteralRun can be given as a NumPy
+    array.
+
+    '''
+    numpy = pytest.importorskip("numpy")
+    from fparser.two import utils
+    from fparser.two.Fortran2003 import Data_Stmt_Value_List
+    monkeypatch.setattr(utils, "STREAM_LITERALS", True)
+    result = Data_Stmt_Value_List(", ".join(["1.5"] * 20))
+    values = result.items.runs[0].to_numpy()
+    assert values.dtype == numpy.float64
+    assert list(values) == [1.5] * 20
@@ -70,8 +70,15 @@
 # First version created: Oct 2006
 
 import re
+import array
+import bisect
+import functools
+import json
 import logging
-from fparser.common.splitline import string_replace_map
+import threading
+import timeit
+from fparser.common.splitline import string_replace_map, get_tokens, \
+    LineCache
 from fparser.two import pattern_tools as pattern
 from fparser.common.readfortran import FortranReaderBase
 
@@ -245,6 +252,283 @@ class ComparableMixin(object):
         return self._compare(other, lambda s, o: s != o)
 
 
+class _ParseState(threading.local):
+    '''
+    The parse state belonging to the current thread. `subclasses` is
+    the table of subclasses (keyed by class name) of the parser
+    context active in the thread, or None if there is none, in which
+    case the table in Base.subclasses is used.
+
+    '''
+    subclasses = None
+    packrat = None
+    rule_frames = None
+
+
+_PARSE_STATE = _ParseState()
+
+
+def get_subclasses():
+    '''
+    :returns: the table of the subclasses of each class (keyed by \
+              class name) to be used by the current thread.
+    :rtype: dict
+
+    '''
+    subclasses = _PARSE_STATE.subclasses
+    if subclasses is None:
+        return Base.subclasses
+    return subclasses
+
+
+def first_token(string):
+    '''
+    :param str string: Fortran string.
+
+    :returns: the first token of the string as used to select the \
+              subclasses that can match it: '0' for a digit, the upper \
+              case of any other character or '' if the string is empty.
+    :rtype: str
+
+    '''
+    char = string.lstrip()[:1]
+    if char.isdigit():
+        return '0'
+    return char.upper()
+
+
+def set_subclasses(subclasses):
+    '''
+    Sets the table of subclasses to be used by the current thread.
+
+    :param subclasses: the table of the subclasses of each class \
+                       (keyed by class name) or None to use the table \
+                       in Base.subclasses.
+    :type subclasses: dict or NoneType
+
+    :returns: the table that was previously set (or None).
+    :rtype: dict or NoneType
+
+    '''
+    previous = _PARSE_STATE.subclasses
+    _PARSE_STATE.subclasses = subclasses
+    return previous
+
+
+# Whether the outcome (the object or the NoMatchError) of matching
+# each class to a string is remembered while a statement is parsed
+# (see PackratCache).
+PACKRAT = False
+
+
+class PackratStats(object):
+    '''
+    The work saved by the packrat caches (of all threads): the number
+    of matches that were looked up, of those that had to be done
+    (misses, including those that raised NoMatchError) and the number
+    of matches (Base.__new__ calls) and the time that the looked up
+    ones took when they were done.
+
+    '''
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        '''Discards the statistics recorded so far.'''
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+            self.failures = 0
+            self.saved_calls = 0
+            self.saved_time = 0.0
+
+    def record(self, hit, failed, calls, elapsed):
+        '''
+        Records a lookup.
+
+        :param bool hit: whether the outcome was remembered.
+        :param bool failed: whether the match raised NoMatchError.
+        :param int calls: the number of Base.__new__ calls of the match.
+        :param float elapsed: the time taken by the match in seconds.
+        '''
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.saved_calls += calls
+                self.saved_time += elapsed
+            else:
+                self.misses += 1
+                if failed:
+                    self.failures += 1
+
+    def report(self):
+        '''
+        :returns: a summary of the work saved.
+        :rtype: str
+        '''
+        with self._lock:
+            lookups = self.hits + self.misses
+            return ('packrat cache: {0} lookups, {1} hits ({2:.1%}), {3} '
+                    'misses ({4} no match); saved {5} matches taking '
+                    '{6:.3f}s'.format(
+                        lookups, self.hits,
+                        float(self.hits) / lookups if lookups else 0.0,
+                        self.misses, self.failures, self.saved_calls,
+                        self.saved_time))
+
+
+# The work saved by the packrat caches.
+PACKRAT_STATS = PackratStats()
+
+
+class PackratCache(object):
+    '''
+    Remembers the outcome of matching a class to a string, so that the
+    many rules that try the same class on the same text (e.g. Variable,
+    Designator or Part_Ref) only match it once. Both objects and
+    NoMatchErrors are remembered. Each thread has its own cache, which
+    is only used while a statement read from a reader is parsed and is
+    cleared when the reader moves on to another one.
+
+    Only matches that start afresh (i.e. not those of a subclass that
+    is tried as part of matching a parent class) are remembered, as
+    the outcome of the latter depends on the classes that have already
+    been tried. As a match may modify the objects it gets from another
+    one, the objects are not modified once they have been matched and
+    copies of them are returned when they are looked up again.
+
+    '''
+    def __init__(self):
+        # The statement (reader item) being parsed or None.
+        self.item = None
+        self.depth = 0
+        # The number of Base.__new__ calls while parsing the statement.
+        self.calls = 0
+        # The outcome of each (class, string), the number of
+        # Base.__new__ calls it took and its time.
+        self._entries = {}
+
+    def enter(self, item):
+        '''
+        Starts (or continues) parsing a statement.
+
+        :param item: the statement.
+        :type item: :py:class:`fparser.common.readfortran.Line`
+        '''
+        if item is not self.item:
+            self._entries.clear()
+            self.item = item
+        self.depth += 1
+
+    def exit(self):
+        '''Stops parsing the current statement.'''
+        self.depth -= 1
+
+    @property
+    def active(self):
+        '''
+        :returns: whether a statement is being parsed.
+        :rtype: bool
+        '''
+        return self.depth > 0
+
+    def match(self, cls, string):
+        '''
+        :param type cls: the class to match.
+        :param str string: the string to match.
+
+        :returns: (a copy of) the object matching the string.
+        :rtype: :py:class:`fparser.two.utils.Base`
+
+        :raises NoMatchError: if the string does not match.
+        '''
+        key = (cls, string)
+        entry = self._entries.get(key)
+        if entry is not None:
+            failed, outcome, calls, elapsed = entry
+            PACKRAT_STATS.record(True, failed, calls, elapsed)
+            if failed:
+                raise NoMatchError(outcome)
+            return _clone(outcome)
+        calls = self.calls
+        start = timeit.default_timer()
+        try:
+            # A parent_cls of [cls] is the same as none, but the match
+            # is then not looked up again.
+            outcome = cls(string, parent_cls=[cls])
+        except NoMatchError as error:
+            self._entries[key] = (True, str(error), self.calls - calls,
+                                  timeit.default_timer() - start)
+            PACKRAT_STATS.record(False, True, 0, 0.0)
+            raise
+        self._entries[key] = (False, outcome, self.calls - calls,
+                              timeit.default_timer() - start)
+        PACKRAT_STATS.record(False, False, 0, 0.0)
+        return outcome
+
+
+def get_packrat_cache():
+    '''
+    :returns: the packrat cache of the current thread.
+    :rtype: :py:class:`fparser.two.utils.PackratCache`
+    '''
+    cache = _PARSE_STATE.packrat
+    if cache is None:
+        cache = _PARSE_STATE.packrat = PackratCache()
+    return cache
+
+
+def _clone(tree):
+    '''
+    :param tree: a parse tree.
+    :type tree: :py:class:`fparser.two.utils.Base`
+
+    :returns: a copy of the parse tree that shares no nodes with it.
+    :rtype: :py:class:`fparser.two.utils.Base`
+    '''
+    copies = {}
+    # The tree is walked iteratively as it may be deep (e.g. a long
+    # expression).
+    stack = [(tree, False)]
+    while stack:
+        obj, done = stack.pop()
+        if done:
+            if isinstance(obj, Base):
+                copy = object.__new__(type(obj))
+                copy.__dict__.update(obj.__dict__)
+                for attr in ('items', 'content'):
+                    if attr in obj.__dict__:
+                        copy.__dict__[attr] = copies[id(obj.__dict__[attr])]
+            elif isinstance(obj, LiteralSequence):
+                copy = obj.copy()
+            else:
+                copy = type(obj)(copies[id(child)] for child in obj)
+            copies[id(obj)] = copy
+            continue
+        if id(obj) in copies:
+            continue
+        if isinstance(obj, Base):
+            children = [obj.__dict__[attr] for attr in ('items', 'content')
+                        if attr in obj.__dict__]
+        elif isinstance(obj, (tuple, list)):
+            children = obj
+        elif isinstance(obj, LiteralSequence):
+            children = ()
+        else:
+            copies[id(obj)] = obj
+            continue
+        copies[id(obj)] = None
+        stack.append((obj, True))
+        stack.extend((child, False) for child in children)
+    return copies[id(tree)]
+
+
+# Returned (rather than NoMatchError being raised) when a string does
+# not match a class (see Base._parse).
+NO_MATCH = object()
+
+
 class Base(ComparableMixin):
     ''' Base class for Fortran 2003 syntax rules.
 
@@ -257,7 +541,18 @@ class Base(ComparableMixin):
     # This dict of subclasses is populated dynamically by code at the end
     # of this module. That code uses the entries in the
     # 'subclass_names' list belonging to each class defined in this module.
+    # It is used unless a thread has its own table (see set_subclasses).
+    # The table also holds, keyed by (class name, first token), the
+    # subclasses that can match a string starting with that token and,
+    # keyed by (class name, None), the first tokens of the strings that
+    # the class can match, where they are known (see first_token and
+    # ParserFactory).
     subclasses = {}
+    # The tokens that a string matched by the match method of a class
+    # can start with: 'letter', 'digit', 'quote', 'sign', a single
+    # character, a keyword (e.g. 'CALL') or the name of a class (whose
+    # tokens are included), or None if they are not known.
+    first_tokens = None
 
     @show_result
     def __new__(cls, string, parent_cls=None):
@@ -270,7 +565,61 @@ class Base(ComparableMixin):
         :param parent_cls: the parent class of this object
         :type parent_cls: :py:type:`type`
         """
+        if PACKRAT and parent_cls is None and isinstance(string, str):
+            cache = _PARSE_STATE.packrat
+            if cache is not None and cache.active:
+                return cache.match(cls, string)
+        obj = cls._parse(string, parent_cls)
+        if obj is not NO_MATCH:
+            return obj
+        # If we get to here then we've failed to match the current line
+        if isinstance(string, FortranReaderBase):
+            content = False
+            for index in range(string.linecount):
+                # Check all lines up to this one for content. We
+                # should be able to only check the current line but
+                # but as the line number returned is not always
+                # correct (due to coding errors) we can not assume the
+                # line pointed to is the line where the error actually
+                # happened.
+                if string.source_lines[index].strip():
+                    content = True
+                    break
+            if not content:
+                # There are no lines in the input or all lines up to
+                # this one are empty or contain only white space. This
+                # is typically accepted by fortran compilers so we
+                # follow their lead and do not raise an exception.
+                return
+            line = string.source_lines[string.linecount-1]
+            errmsg = "at line {0}\n>>>{1}\n".format(
+                string.linecount, line)
+        else:
+            errmsg = "{0}: '{1}'".format(cls.__name__, string)
+        raise NoMatchError(errmsg)
+
+    @classmethod
+    def _parse(cls, string, parent_cls):
+        """
+        Matches a string (or the next line of a reader) to this class
+        as __new__ does but returns NO_MATCH rather than raising
+        NoMatchError when it does not match, so that the subclasses of
+        a class can be tried without an exception for each that fails.
+
+        :param string: (source of) Fortran string to parse
+        :type string: str or :py:class:`FortranReaderBase`
+        :param parent_cls: the classes already being matched or None
+        :type parent_cls: list of :py:type:`type`
+
+        :returns: the matching object, None if there is nothing to \
+                  match or NO_MATCH.
+        :rtype: :py:class:`fparser.two.utils.Base` or NoneType or object
+        """
         from fparser.common import readfortran
+        if PACKRAT:
+            cache = _PARSE_STATE.packrat
+            if cache is not None and cache.active:
+                cache.calls += 1
         if parent_cls is None:
             parent_cls = [cls]
         elif cls not in parent_cls:
@@ -289,9 +638,18 @@ class Base(ComparableMixin):
                 # We got a comment but we weren't after a comment (we handle
                 # those in Comment.__new__)
                 obj = None
+            elif PACKRAT:
+                cache = get_packrat_cache()
+                cache.enter(item)
+                try:
+                    obj = cls._parse_line(item, parent_cls)
+                except NoMatchError:
+                    obj = None
+                finally:
+                    cache.exit()
             else:
                 try:
-                    obj = item.parse_line(cls, parent_cls)
+                    obj = cls._parse_line(item, parent_cls)
                 except NoMatchError:
                     obj = None
             if obj is None:
@@ -321,45 +679,88 @@ class Base(ComparableMixin):
             return obj
         elif isinstance(result, Base):
             return result
+        elif result is NO_MATCH:
+            # The match method has ruled out the subclasses as well.
+            return result
         elif result is None:
             # Loop over the possible sub-classes of this class and
-            # check for matches
-            for subcls in Base.subclasses.get(cls.__name__, []):
+            # check for matches, skipping those that cannot match the
+            # first token of the string.
+            table = get_subclasses()
+            subclasses = None
+            if isinstance(string, str):
+                subclasses = table.get((cls.__name__, first_token(string)))
+            elif isinstance(string, FortranReaderBase):
+                item = string.get_item()
+                if item is not None:
+                    string.put_item(item)
+                    if type(item) is readfortran.Line:
+                        subclasses = table.get(
+                            (cls.__name__, first_token(item.line)))
+            if subclasses is None:
+                subclasses = table.get(cls.__name__, [])
+            for subcls in subclasses:
                 if subcls in parent_cls:  # avoid recursion 2.
                     continue
                 try:
-                    obj = subcls(string, parent_cls=parent_cls)
-                except NoMatchError as msg:
+                    if subcls.__new__ is Base.__new__:
+                        obj = subcls._parse(string, parent_cls)
+                    else:
+                        # The class has its own way of being created.
+                        obj = subcls(string, parent_cls=parent_cls)
+                except NoMatchError:
+                    # Raised by the match method of the class.
                     obj = None
-                if obj is not None:
+                if obj is not None and obj is not NO_MATCH:
                     return obj
         else:
             raise AssertionError(repr(result))
-        # If we get to here then we've failed to match the current line
-        if isinstance(string, FortranReaderBase):
-            content = False
-            for index in range(string.linecount):
-                # Check all lines up to this one for content. We
-                # should be able to only check the current line but
-                # but as the line number returned is not always
-                # correct (due to coding errors) we can not assume the
-                # line pointed to is the line where the error actually
-                # happened.
-                if string.source_lines[index].strip():
-                    content = True
-                    break
-            if not content:
-                # There are no lines in the input or all lines up to
-                # this one are empty or contain only white space. This
-                # is typically accepted by fortran compilers so we
-                # follow their lead and do not raise an exception.
-                return
-            line = string.source_lines[string.linecount-1]
-            errmsg = "at line {0}\n>>>{1}\n".format(
-                string.linecount, line)
-        else:
-            errmsg = "{0}: '{1}'".format(cls.__name__, string)
-        raise NoMatchError(errmsg)
+        return NO_MATCH
+
+    @classmethod
+    def match_or_none(cls, string):
+        """
+        Matches a string to this class as cls(string) does but returns
+        None rather than raising NoMatchError when it does not match,
+        for match methods that try a class as one of their parts.
+
+        :param str string: Fortran string to parse
+
+        :returns: the matching object or None.
+        :rtype: :py:class:`fparser.two.utils.Base` or NoneType
+        """
+        try:
+            if PACKRAT or cls.__new__ is not Base.__new__:
+                return cls(string)
+            obj = cls._parse(string, None)
+        except NoMatchError:
+            return None
+        if obj is NO_MATCH:
+            return None
+        return obj
+
+    @classmethod
+    def _parse_line(cls, item, parent_cls):
+        """
+        Matches a line to this class as item.parse_line does (i.e.
+        only once) but using _parse.
+
+        :param item: the line.
+        :type item: :py:class:`fparser.common.readfortran.Line`
+        :param parent_cls: the classes already being matched
+        :type parent_cls: list of :py:type:`type`
+
+        :returns: the matching object or None.
+        :rtype: :py:class:`fparser.two.utils.Base` or NoneType
+        """
+        if cls in item.parse_cache:
+            return item.parse_cache[cls]
+        item.parse_cache[cls] = None
+        obj = cls._parse(item.line, parent_cls)
+        if obj is NO_MATCH:
+            obj = None
+        item.parse_cache[cls] = obj
+        return obj
 
     def init(self, *items):
         self.items = items
@@ -393,6 +794,70 @@ class Base(ComparableMixin):
         reader.put_item(self.item)
 
 
+class _Dispatch(object):
+    '''
+    Selects the classes in a list (those a block is made of) that can
+    match a line, indexed by the first token of the line (see
+    first_token), so that a block does not try every class for every
+    statement. Statements with no leading keyword (e.g. assignments)
+    select only the classes that can start with any name.
+
+    :param classes: the classes.
+    :type classes: list of type
+    :param dict table: the table of subclasses holding the first \
+                       tokens of each class.
+
+    '''
+    def __init__(self, classes, table):
+        self.classes = classes
+        self._table = table
+        # The positions of the classes that can match a line starting
+        # with each token.
+        self._index = {}
+
+    def candidates(self, reader):
+        '''
+        :param reader: the reader.
+        :type reader: :py:class:`FortranReaderBase`
+
+        :returns: the positions of the classes that can match the next \
+                  line of the reader or None if any of them might.
+        :rtype: frozenset of int or NoneType
+        '''
+        from fparser.common import readfortran
+        item = reader.get_item()
+        if item is None:
+            return None
+        reader.put_item(item)
+        if type(item) is not readfortran.Line:
+            # E.g. a comment.
+            return None
+        token = first_token(item.line)
+        candidates = self._index.get(token)
+        if candidates is None:
+            candidates = self._index[token] = frozenset(
+                index for index, cls in enumerate(self.classes)
+                if token in self._table.get((cls.__name__, None), token))
+        return candidates
+
+
+def _get_dispatch(classes):
+    '''
+    :param classes: the classes a block is made of.
+    :type classes: list of type
+
+    :returns: the dispatch of the classes, which is created once for \
+              each table of subclasses.
+    :rtype: :py:class:`fparser.two.utils._Dispatch`
+    '''
+    table = get_subclasses()
+    key = (tuple(classes), 'dispatch')
+    dispatch = table.get(key)
+    if dispatch is None:
+        dispatch = table.setdefault(key, _Dispatch(classes, table))
+    return dispatch
+
+
 class BlockBase(Base):
     """
 ::
@@ -444,6 +909,9 @@ content : tuple
             add_comments_includes
         assert isinstance(reader, FortranReaderBase), repr(reader)
         content = []
+        # Record where we are in the reader so that we can backtrack
+        # in a single step if there is no match.
+        checkpoint = reader.checkpoint()
 
         if startcls is not None:
             # Deal with any preceding comments and/or includes
@@ -457,8 +925,7 @@ content : tuple
                 # Ultimately we failed to find a match for the
                 # start of the block so put back any comments that
                 # we processed along the way
-                for obj in reversed(content):
-                    obj.restore_reader(reader)
+                reader.rewind(checkpoint)
                 return
             # Store the index of the start of this block proper (i.e.
             # excluding any comments)
@@ -473,13 +940,19 @@ content : tuple
         classes = subclasses + [Comment, Include_Stmt]
         if endcls is not None:
             classes += [endcls]
-            endcls_all = tuple([endcls]+endcls.subclasses[endcls.__name__])
+            endcls_all = tuple([endcls] +
+                               get_subclasses()[endcls.__name__])
 
         # Start trying to match the various subclasses, starting from
-        # the beginning of the list (where else?)
+        # the beginning of the list (where else?) but skipping those
+        # that cannot match the next line.
         i = 0
         had_match = False
         found_end = False
+        dispatch = _get_dispatch(classes)
+        # The number of objects matched when the next line was last
+        # looked at.
+        peeked = None
         while i < len(classes):
             if enable_do_label_construct_hook:
                 try:
@@ -492,6 +965,13 @@ content : tuple
                         continue
                     else:
                         obj.restore_reader(reader)
+            if peeked != len(content):
+                # Find the classes that can match the next line.
+                peeked = len(content)
+                candidates = dispatch.candidates(reader)
+            if candidates is not None and i not in candidates:
+                i += 1
+                continue
             # Attempt to match the i'th subclass
             cls = classes[i]
             try:
@@ -581,10 +1061,10 @@ content : tuple
             # We did not get a match from any of the subclasses or
             # failed to find the endcls
             if endcls is not None:
-                for obj in reversed(content):
-                    obj.restore_reader(reader)
+                reader.rewind(checkpoint)
                 return
 
+        reader.release(checkpoint)
         if not content:
             return
         if startcls is not None and endcls is not None:
@@ -647,6 +1127,531 @@ content : tuple
             obj.restore_reader(reader)
 
 
+# Whether the value lists of DATA statements and array constructors
+# keep runs of literal constants as compact LiteralRuns, only matching
+# a value when it is accessed, rather than matching every value when
+# the statement is parsed. This saves a lot of memory (and time) for
+# generated tables with many thousands of values.
+STREAM_LITERALS = False
+
+# The shortest run of literal constants that is kept as a LiteralRun.
+_MIN_LITERAL_RUN = 16
+
+# Matches an item of a list that is a plain (signed) integer or real
+# literal constant, i.e. without a kind parameter. The second group
+# only matches an integer.
+_PLAIN_LITERAL_MATCH = re.compile(
+    r'\s*([-+]?(?:(\d+)|(?:\d+[.]\d*|[.]\d+)(?:[ed][-+]?\d+)?|'
+    r'\d+[ed][-+]?\d+))\s*\Z', re.I).match
+
+
+class RuleProfile(object):
+    '''
+    The cost of each grammar rule (class): the number of attempts to
+    match it, of those that matched and failed, the time taken
+    including (inclusive) and excluding (exclusive) that of the rules
+    tried while matching it and the number of reader items it pushed
+    back. Attempts to match a class (Base.__new__) and blocks of
+    statements (BlockBase.match, recorded for the class being matched)
+    are kept apart. The profile is only recorded while the rules are
+    instrumented (see instrument_rules()).
+    '''
+    # The keys that rows can be sorted by.
+    keys = ('exclusive', 'inclusive', 'attempts', 'successes', 'failures',
+            'pushbacks')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # The attempts, successes, inclusive and exclusive time and
+        # pushbacks of each (rule, kind).
+        self._counts = {}
+
+    def record(self, rule, kind, matched, inclusive, exclusive, pushbacks):
+        '''
+        Records an attempt to match a rule.
+
+        :param str rule: the name of the class.
+        :param str kind: 'rule' for Base.__new__ or 'block' for \
+                         BlockBase.match.
+        :param bool matched: whether the attempt matched.
+        :param float inclusive: the time taken in seconds.
+        :param float exclusive: the time taken in seconds, excluding \
+                                that of the rules tried during it.
+        :param int pushbacks: the number of reader items pushed back.
+        '''
+        with self._lock:
+            counts = self._counts.get((rule, kind))
+            if counts is None:
+                counts = self._counts[(rule, kind)] = [0, 0, 0.0, 0.0, 0]
+            counts[0] += 1
+            if matched:
+                counts[1] += 1
+            counts[2] += inclusive
+            counts[3] += exclusive
+            counts[4] += pushbacks
+
+    def reset(self):
+        '''Discards the profile recorded so far.'''
+        with self._lock:
+            self._counts.clear()
+
+    def rows(self, sort='exclusive'):
+        '''
+        :param str sort: the key to sort by (in decreasing order), one \
+                         of RuleProfile.keys.
+
+        :returns: the profile of each rule and kind.
+        :rtype: list of dict
+
+        :raises ValueError: if the sort key is not valid.
+        '''
+        if sort not in self.keys:
+            raise ValueError(
+                "'{0}' is not a valid key to sort the rule profile "
+                "by".format(sort))
+        with self._lock:
+            items = [(key, list(counts)) for key, counts in
+                     self._counts.items()]
+        rows = []
+        for (rule, kind), (attempts, successes, inclusive, exclusive,
+                           pushbacks) in items:
+            rows.append({'rule': rule, 'kind': kind, 'attempts': attempts,
+                         'successes': successes,
+                         'failures': attempts - successes,
+                         'inclusive': inclusive, 'exclusive': exclusive,
+                         'pushbacks': pushbacks})
+        rows.sort(key=lambda row: (-row[sort], row['rule'], row['kind']))
+        return rows
+
+    def table(self, sort='exclusive', limit=None):
+        '''
+        :param str sort: the key to sort by (see rows()).
+        :param int limit: the maximum number of rows or None for all.
+
+        :returns: the profile as a table.
+        :rtype: str
+        '''
+        lines = ['{0:>10} {1:>10} {2:>10} {3:>10} {4:>10} {5:>10}  {6:<5}  '
+                 '{7}'.format('attempts', 'successes', 'failures',
+                              'incl (s)', 'excl (s)', 'pushbacks', 'kind',
+                              'rule')]
+        for row in self.rows(sort)[:limit]:
+            lines.append(
+                '{attempts:10d} {successes:10d} {failures:10d} '
+                '{inclusive:10.4f} {exclusive:10.4f} {pushbacks:10d}  '
+                '{kind:<5}  {rule}'.format(**row))
+        return '\n'.join(lines)
+
+    def to_json(self, sort='exclusive', **kwargs):
+        '''
+        :param str sort: the key to sort by (see rows()).
+        :param kwargs: any arguments for json.dumps.
+
+        :returns: the profile as a JSON list of objects.
+        :rtype: str
+        '''
+        return json.dumps(self.rows(sort), **kwargs)
+
+
+# The profile of the grammar rules.
+RULE_PROFILE = RuleProfile()
+
+
+def _rule_frames():
+    '''
+    :returns: the rules being matched by the current thread, innermost \
+              last, each as a list of its name, the time taken by the \
+              rules tried while matching it and the number of reader \
+              items it has pushed back.
+    :rtype: list of list
+    '''
+    frames = _PARSE_STATE.rule_frames
+    if frames is None:
+        frames = _PARSE_STATE.rule_frames = []
+    return frames
+
+
+def _profiled(kind, method, rule, rematch=None):
+    '''
+    :param str kind: the kind of attempt (see RuleProfile.record).
+    :param method: the (unprofiled) function that matches.
+    :type method: callable
+    :param rule: returns the name of the rule from the arguments.
+    :type rule: callable
+    :param rematch: returns whether a call, from its arguments, is \
+        part of the attempt of the innermost rule being matched (given \
+        its frame) rather than an attempt of its own.
+    :type rematch: callable or NoneType
+
+    :returns: the function with its calls recorded in RULE_PROFILE.
+    :rtype: callable
+    '''
+    timer = timeit.default_timer
+
+    @functools.wraps(method)
+    def wrapper(*args, **kwargs):
+        frames = _rule_frames()
+        if rematch is not None and frames and rematch(args, frames[-1]):
+            return method(*args, **kwargs)
+        # The rule, the time taken by the rules tried during it, the
+        # items pushed back and the kind and arguments of the call.
+        frame = [rule(args, frames), 0.0, 0, kind, args]
+        frames.append(frame)
+        matched = False
+        start = timer()
+        try:
+            result = method(*args, **kwargs)
+            matched = result is not None and result is not NO_MATCH
+            return result
+        finally:
+            elapsed = timer() - start
+            frames.pop()
+            if frames:
+                frames[-1][1] += elapsed
+            RULE_PROFILE.record(frame[0], kind, matched, elapsed,
+                                elapsed - frame[1], frame[2])
+    return wrapper
+
+
+def _profiled_put_item(method):
+    '''
+    :param method: the (unprofiled) FortranReaderBase.put_item.
+    :type method: callable
+
+    :returns: the method with the items pushed back recorded for the \
+              innermost rule being matched.
+    :rtype: callable
+    '''
+    @functools.wraps(method)
+    def wrapper(self, item):
+        frames = _PARSE_STATE.rule_frames
+        if frames:
+            frames[-1][2] += 1
+        return method(self, item)
+    return wrapper
+
+
+def _line_rematch(args, frame):
+    '''
+    :returns: whether a call of Base._parse is that of a class matching \
+              the next line of a reader (see Base._parse_line) within \
+              the attempt to match the class to the reader.
+    :rtype: bool
+    '''
+    kind, frame_args = frame[3:]
+    return kind == 'rule' and frame_args[0] is args[0] and \
+        isinstance(frame_args[1], FortranReaderBase) and \
+        isinstance(args[1], str)
+
+
+def _block_rule(args, frames):
+    '''
+    :returns: the name of the class whose block BlockBase.match is \
+              matching: that of the innermost rule being matched or \
+              else of the class starting the block.
+    :rtype: str
+    '''
+    if frames:
+        return frames[-1][0]
+    startcls = args[0]
+    return startcls.__name__ if startcls else 'BlockBase'
+
+
+def instrument_rules(enable=True):
+    '''
+    Instruments the matching of the grammar rules (Base.__new__ and
+    BlockBase.match) so that it is recorded in RULE_PROFILE, or
+    restores the original methods. As with
+    :py:func:`fparser.two.pattern_tools.instrument_patterns`, the
+    methods are replaced so there is no overhead when they are not
+    instrumented. This applies to the whole process (all threads and
+    parser contexts). The methods are instrumented when a parser is
+    created with profile_rules set (see
+    :py:meth:`fparser.two.parser.ParserFactory.create`) and are only
+    restored by calling this function with enable set to False.
+
+    :param bool enable: whether to instrument the methods.
+    '''
+    parse, match, put_item = _RULE_METHODS
+    if enable:
+        Base._parse = classmethod(_profiled(
+            'rule', parse, lambda args, frames: args[0].__name__,
+            _line_rematch))
+        BlockBase.match = staticmethod(_profiled('block', match,
+                                                 _block_rule))
+        FortranReaderBase.put_item = _profiled_put_item(put_item)
+    else:
+        Base._parse = classmethod(parse)
+        BlockBase.match = staticmethod(match)
+        FortranReaderBase.put_item = put_item
+
+
+# The unprofiled methods (functions) that instrument_rules replaces.
+_RULE_METHODS = (Base.__dict__['_parse'].__func__,
+                 BlockBase.__dict__['match'].__func__,
+                 FortranReaderBase.__dict__['put_item'])
+
+
+class LiteralRun(object):
+    '''
+    A run of consecutive items of a list that are plain integer or real
+    literal constants. The values of the items are held in a typed
+    array (of C longs if they are all integers, otherwise of doubles)
+    and the node of an item is only matched, and then kept, when it is
+    accessed.
+
+    :param str line: the (masked) text of the list.
+    :param subcls: the class of the items of the list.
+    :type subcls: subclass of :py:class:`fparser.two.utils.Base`
+    '''
+    def __init__(self, line, subcls):
+        self.line = line
+        self.subcls = subcls
+        # The start and end of each item in the line.
+        self.spans = array.array('l')
+        self.values = array.array('l')
+        self._nodes = {}
+
+    def append(self, start, end, is_int):
+        '''
+        Adds an item to the run.
+
+        :param int start: the start of the item in the line.
+        :param int end: the end of the item in the line.
+        :param bool is_int: whether the item is an integer.
+        '''
+        text = self.line[start:end]
+        if is_int:
+            value = int(text)
+        else:
+            value = float(text.lower().replace('d', 'e'))
+        try:
+            self.values.append(value)
+        except (TypeError, OverflowError):
+            # A real or an integer that does not fit in a C long.
+            self.values = array.array('d', self.values)
+            self.values.append(value)
+        self.spans.append(start)
+        self.spans.append(end)
+
+    def __len__(self):
+        return len(self.values)
+
+    def text(self, index):
+        '''
+        :param int index: the index of an item in the run.
+
+        :returns: the text of the item.
+        :rtype: str
+        '''
+        return self.line[self.spans[2 * index]:self.spans[2 * index + 1]]
+
+    def __getitem__(self, index):
+        '''
+        :param int index: the index of an item in the run.
+
+        :returns: the node of the item, which is matched when it is \
+                  first accessed.
+        :rtype: :py:class:`fparser.two.utils.Base`
+        '''
+        node = self._nodes.get(index)
+        if node is None:
+            node = self._nodes.setdefault(index,
+                                          self.subcls(self.text(index)))
+        return node
+
+    def tostr(self, index):
+        '''
+        :param int index: the index of an item in the run.
+
+        :returns: the Fortran representation of the item. Its node is \
+                  not kept if it has not already been accessed.
+        :rtype: str
+        '''
+        node = self._nodes.get(index)
+        if node is None:
+            node = self.subcls(self.text(index))
+        return str(node)
+
+    def copy(self):
+        '''
+        :returns: a copy of the run that shares the values but none of \
+                  the nodes of its items.
+        :rtype: :py:class:`fparser.two.utils.LiteralRun`
+        '''
+        run = LiteralRun(self.line, self.subcls)
+        run.spans = self.spans
+        run.values = self.values
+        return run
+
+    def to_numpy(self):
+        '''
+        :returns: the values of the items as a NumPy array that shares \
+                  the memory of the typed array.
+        :rtype: :py:class:`numpy.ndarray`
+
+        :raises ImportError: if NumPy is not installed.
+        '''
+        import numpy
+        return numpy.frombuffer(self.values, dtype=self.values.typecode)
+
+
+class LiteralSequence(object):
+    '''
+    The (read-only) items of a list in which runs of literal constants
+    are held as LiteralRuns. It behaves as the tuple of the items,
+    with the node of an item in a run only being matched when it is
+    accessed.
+
+    :param parts: the items of the list that are not in a run and \
+                  the runs, in order.
+    :type parts: list of :py:class:`fparser.two.utils.Base` or \
+                 :py:class:`fparser.two.utils.LiteralRun`
+    '''
+    def __init__(self, parts):
+        self._parts = parts
+        # The index of the first item of each part.
+        self._starts = []
+        length = 0
+        for part in parts:
+            self._starts.append(length)
+            length += len(part) if isinstance(part, LiteralRun) else 1
+        self._length = length
+
+    @property
+    def runs(self):
+        '''
+        :returns: the runs of literal constants in the list.
+        :rtype: list of :py:class:`fparser.two.utils.LiteralRun`
+        '''
+        return [part for part in self._parts if isinstance(part, LiteralRun)]
+
+    def copy(self):
+        '''
+        :returns: a copy of the items that shares none of their nodes.
+        :rtype: :py:class:`fparser.two.utils.LiteralSequence`
+        '''
+        return LiteralSequence([part.copy() if isinstance(part, LiteralRun)
+                                else _clone(part) for part in self._parts])
+
+    def _locate(self, index):
+        '''
+        :returns: the part holding an item and the index of the item \
+                  in the part.
+        :rtype: (:py:class:`fparser.two.utils.Base` or \
+                 :py:class:`fparser.two.utils.LiteralRun`, int)
+
+        :raises IndexError: if the index is out of range.
+        '''
+        if index < 0:
+            index += self._length
+        if not 0 <= index < self._length:
+            raise IndexError('LiteralSequence index out of range')
+        position = bisect.bisect_right(self._starts, index) - 1
+        return self._parts[position], index - self._starts[position]
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return tuple(self[position] for position in
+                         range(*index.indices(self._length)))
+        part, index = self._locate(index)
+        if isinstance(part, LiteralRun):
+            return part[index]
+        return part
+
+    def __iter__(self):
+        for part in self._parts:
+            if isinstance(part, LiteralRun):
+                for index in range(len(part)):
+                    yield part[index]
+            else:
+                yield part
+
+    def tostrs(self):
+        '''
+        :returns: the Fortran representations of the items. The nodes \
+                  of the items in runs are not kept.
+        :rtype: generator of str
+        '''
+        for part in self._parts:
+            if isinstance(part, LiteralRun):
+                for index in range(len(part)):
+                    yield part.tostr(index)
+            else:
+                yield str(part)
+
+    def __eq__(self, other):
+        try:
+            return tuple(self) == tuple(other)
+        except TypeError:
+            return NotImplemented
+
+    def __ne__(self, other):
+        result = self.__eq__(other)
+        if result is NotImplemented:
+            return result
+        return not result
+
+    __hash__ = None
+
+    def __add__(self, other):
+        return tuple(self) + tuple(other)
+
+    def __radd__(self, other):
+        return tuple(other) + tuple(self)
+
+    def __repr__(self):
+        return repr(tuple(self))
+
+
+def _stream_literals(line, repmap, subcls):
+    '''
+    Matches the comma-separated items of a list, keeping runs of plain
+    literal constants as LiteralRuns. The other items are matched as
+    SequenceBase.match would.
+
+    :param str line: the masked list.
+    :param repmap: the map that restores the masked parts of the list.
+    :type repmap: :py:class:`fparser.common.splitline.string_replace_dict`
+    :param subcls: the class of the items.
+    :type subcls: subclass of :py:class:`fparser.two.utils.Base`
+
+    :returns: the items.
+    :rtype: tuple or :py:class:`fparser.two.utils.LiteralSequence`
+    '''
+    parts = []
+    run = LiteralRun(line, subcls)
+    end = -1
+    while end < len(line):
+        start = end + 1
+        end = line.find(',', start)
+        if end == -1:
+            end = len(line)
+        match = _PLAIN_LITERAL_MATCH(line, start, end)
+        if match:
+            run.append(match.start(1), match.end(1),
+                       match.group(2) is not None)
+            continue
+        if len(run) >= _MIN_LITERAL_RUN:
+            parts.append(run)
+            run = LiteralRun(line, subcls)
+        elif run:
+            parts.extend(subcls(run.text(index))
+                         for index in range(len(run)))
+            run = LiteralRun(line, subcls)
+        parts.append(subcls(repmap(' '.join(line[start:end].split()))))
+    if len(run) >= _MIN_LITERAL_RUN:
+        parts.append(run)
+    else:
+        parts.extend(subcls(run.text(index)) for index in range(len(run)))
+    if any(isinstance(part, LiteralRun) for part in parts):
+        return LiteralSequence(parts)
+    return tuple(parts)
+
+
 class SequenceBase(Base):
     '''
     Match one or more fparser2 rules separated by a defined separator.
@@ -655,7 +1660,7 @@ class SequenceBase(Base):
 
     '''
     @staticmethod
-    def match(separator, subcls, string):
+    def match(separator, subcls, string, literals=False):
         '''Match one or more 'subcls' fparser2 rules in the string 'string'
         separated by 'separator'.
 
@@ -665,9 +1670,13 @@ class SequenceBase(Base):
         should be matched.
         :type subcls: Subclass of :py:class:`fparser.two.utils.Base`
         :param str string: The input string to match.
+        :param bool literals: Whether runs of literal constants may be \
+        kept as LiteralRuns (when STREAM_LITERALS is set and the \
+        separator is a comma).
 
         :returns: A tuple containing 1) the separator and 2) the \
-        matched objects in a tuple, or None if there is no match.
+        matched objects in a tuple (or a LiteralSequence), or None if \
+        there is no match.
         :rtype: (str, (Subclass of \
         :py:class:`fparser.two.utils.Base`)) or NoneType
 
@@ -685,6 +1694,8 @@ class SequenceBase(Base):
                 "be a string but found '{0}'.".format(type(string)))
 
         line, repmap = string_replace_map(string)
+        if literals and STREAM_LITERALS and separator == ',':
+            return separator, _stream_literals(line, repmap, subcls)
         # Remove multiple spaces in the string. This avoids empty
         # matches when the separator is white space.
         line = ' '.join(line.split())
@@ -721,6 +1732,8 @@ class SequenceBase(Base):
             pass
         else:
             sep = ' ' + sep + ' '
+        if isinstance(self.items, LiteralSequence):
+            return sep.join(self.items.tostrs())
         return sep.join(map(str, self.items))
 
     def torepr(self):
@@ -742,6 +1755,144 @@ class SequenceBase(Base):
     #     return (self.separator, self.items)
 
 
+class OperatorTable(object):
+    '''
+    The top-level operators of an expression. The strings and
+    bracketed parts of the expression are masked (see
+    :py:func:`fparser.common.splitline.string_replace_map`) so that
+    only its top-level operators remain visible. The matches of each
+    operator pattern (i.e. of each precedence level) are found once,
+    when first asked for.
+
+    Tables are cached by expression (see get_operator_table()). When
+    an expression is split at an operator, the table of its left-hand
+    side is derived from that of the expression rather than masking
+    the left-hand side again, so a long expression is only masked once
+    however deep the recursion over its operators goes.
+
+    :param str line: the masked expression.
+    :param repmap: the map that restores the masked parts.
+    :type repmap: :py:class:`fparser.common.splitline.string_replace_dict`
+    :param bool derivable: whether the tables of the left-hand sides \
+                           of splits can be derived from this one.
+    '''
+    def __init__(self, line, repmap, derivable=True):
+        self.line = line
+        self.repmap = repmap
+        self.derivable = derivable
+        self._spans = {}
+
+    def spans(self, op_pattern):
+        '''
+        :param op_pattern: the operator pattern.
+        :type op_pattern: :py:class:`fparser.two.pattern_tools.Pattern`
+
+        :returns: the (start, end) spans of the top-level matches of \
+                  the operator pattern and the index of the first span \
+                  that is immediately followed by another (or the \
+                  number of spans if there is none).
+        :rtype: (list of (int, int), int)
+        '''
+        entry = self._spans.get(op_pattern)
+        if entry is None:
+            spans = [match.span() for match in
+                     op_pattern.get_compiled().finditer(self.line)]
+            adjacent = len(spans)
+            for index in range(len(spans) - 1):
+                if spans[index][1] == spans[index + 1][0]:
+                    adjacent = index
+                    break
+            entry = (spans, adjacent)
+            self._spans[op_pattern] = entry
+        return entry
+
+    def split(self, op_pattern, right=True, is_add=False):
+        '''
+        Splits the masked expression at the rightmost (or leftmost)
+        match of the operator pattern, in the same way as
+        :py:meth:`fparser.two.pattern_tools.Pattern.rsplit` (or
+        `lsplit`) but using the table.
+
+        :param op_pattern: the operator pattern.
+        :type op_pattern: :py:class:`fparser.two.pattern_tools.Pattern`
+        :param bool right: whether to split at the rightmost match.
+        :param bool is_add: whether a sign within a real literal \
+                            constant (e.g. 1.0e+5) should not be split at.
+
+        :returns: the (masked) left-hand side, operator and right-hand \
+                  side or None if there is no split.
+        :rtype: (str, str, str) or NoneType
+        '''
+        line = self.line
+        spans, adjacent = self.spans(op_pattern)
+        if not right:
+            if not spans:
+                return None
+            start, end = spans[0]
+            return (line[:start].strip(), line[start:end].strip(),
+                    line[end:].strip())
+        rhs = None
+        if is_add and spans:
+            first = spans[-2][1] if len(spans) > 1 else 0
+            number = line[first:].replace(' ', '')
+            if pattern.abs_real_literal_constant.match(number):
+                # The last match is the sign of an exponent.
+                spans = spans[:-1]
+                rhs = number
+        if not spans or adjacent < len(spans) - 1:
+            # No operator or two operators with nothing between them.
+            return None
+        start, end = spans[-1]
+        if rhs is None:
+            rhs = line[end:].strip()
+        return line[:start].strip(), line[start:end].strip(), rhs
+
+    def lhs(self, line):
+        '''
+        :param str line: the (masked) left-hand side of a split of \
+                         this expression.
+
+        :returns: the left-hand side with the masked parts restored. \
+                  Its table is derived from this one and cached.
+        :rtype: str
+        '''
+        string = self.repmap(line)
+        if self.derivable:
+            OPERATOR_TABLES.put(OperatorTable(line, self.repmap), string)
+        return string
+
+
+def _operator_table(string):
+    '''
+    :param str string: an expression.
+
+    :returns: the top-level operator table of the expression.
+    :rtype: :py:class:`fparser.two.utils.OperatorTable`
+    '''
+    line, repmap = string_replace_map(string)
+    # The table of a left-hand side can only be derived when masking
+    # it would give the same result as masking the whole expression.
+    # That is not so if the expression contains placeholders, escapes
+    # or a string that is not closed.
+    derivable = 'F2PY_' not in string and '\\' not in string and \
+        get_tokens(string).stopchar is None
+    return OperatorTable(line, repmap, derivable)
+
+
+# The top-level operator tables, keyed by expression.
+OPERATOR_TABLES = LineCache(_operator_table)
+
+
+def get_operator_table(string):
+    '''
+    :param str string: an expression.
+
+    :returns: the (cached) top-level operator table of the expression.
+    :rtype: :py:class:`fparser.two.utils.OperatorTable`
+    '''
+    return OPERATOR_TABLES.get(string)
+
+
 class UnaryOpBase(Base):
     """
 ::
@@ -773,26 +1924,21 @@ class BinaryOpBase(Base):
     """
     def match(lhs_cls, op_pattern, rhs_cls, string, right=True,
               exclude_op_pattern=None, is_add=False):
-        line, repmap = string_replace_map(string)
+        table = get_operator_table(string)
         if isinstance(op_pattern, str):
             if right:
-                t = line.rsplit(op_pattern, 1)
+                t = table.line.rsplit(op_pattern, 1)
             else:
-                t = line.split(op_pattern, 1)
+                t = table.line.split(op_pattern, 1)
             if len(t) != 2:
                 return
             lhs, rhs = t[0].rstrip(), t[1].lstrip()
             op = op_pattern
         else:
-            if right:
-                t = op_pattern.rsplit(line, is_add=is_add)
-            else:
-                t = op_pattern.lsplit(line)
-            if t is None or len(t) != 3:
+            t = table.split(op_pattern, right=right, is_add=is_add)
+            if t is None:
                 return
             lhs, op, rhs = t
-            lhs = lhs.rstrip()
-            rhs = rhs.lstrip()
             op = op.upper()
         if not lhs:
             return
@@ -802,13 +1948,55 @@ class BinaryOpBase(Base):
             if exclude_op_pattern.match(op):
                 return
 
-        lhs_obj = lhs_cls(repmap(lhs))
-        rhs_obj = rhs_cls(repmap(rhs))
+        lhs_obj = lhs_cls(table.lhs(lhs))
+        rhs_obj = rhs_cls(table.repmap(rhs))
         return lhs_obj, op.replace(' ', ''), rhs_obj
     match = staticmethod(match)
 
     def tostr(self):
-        return '%s %s %s' % tuple(self.items)
+        return self._render('tostr')
+
+    def torepr(self):
+        return self._render('torepr')
+
+    def _render(self, method):
+        '''
+        Renders a binary operation, as its tostr or torepr method does,
+        without recursing into operands that are binary operations
+        rendered in the same way. A long chain of operations (e.g. an
+        expression with thousands of terms, see
+        :py:mod:`fparser.two.expression`) then does not exceed the
+        recursion limit.
+
+        :param str method: the method, 'tostr' or 'torepr'.
+
+        :returns: the rendered binary operation.
+        :rtype: str
+        '''
+        base_method = getattr(BinaryOpBase, method)
+        rendered = []
+        # The pieces of text and the nodes still to be rendered.
+        stack = [(None, self)]
+        while stack:
+            text, node = stack.pop()
+            if text is not None:
+                rendered.append(text)
+            elif isinstance(node, BinaryOpBase) and \
+                    getattr(type(node), method) == base_method and \
+                    len(node.items) == 3:
+                lhs, op, rhs = node.items
+                if method == 'tostr':
+                    parts = [(None, lhs), (' %s ' % op, None), (None, rhs)]
+                else:
+                    parts = [('%s(' % type(node).__name__, None),
+                             (None, lhs), (', %r, ' % (op,), None),
+                             (None, rhs), (')', None)]
+                stack.extend(reversed(parts))
+            elif method == 'tostr':
+                rendered.append(str(node))
+            else:
+                rendered.append(repr(node))
+        return ''.join(rendered)
 
 
 class SeparatorBase(Base):
@@ -1036,32 +2224,30 @@ class CallBase(Base):
     def match(lhs_cls, rhs_cls, string, upper_lhs=False, require_rhs=False):
         if not string.endswith(')'):
             return
-        line, repmap = string_replace_map(string)
-        i = line.rfind('(')
-        if i == -1:
+        i = get_tokens(string).opening(len(string) - 1)
+        if i is None or string[i] != '(':
             return
-        lhs = line[:i].rstrip()
+        lhs = string[:i].rstrip()
         if not lhs:
             return
-        j = line.rfind(')')
-        rhs = line[i+1: j].strip()
-        if line[j+1:].lstrip():
-            return
-        lhs = repmap(lhs)
+        rhs = string[i+1:-1].strip()
         if upper_lhs:
             lhs = lhs.upper()
-        rhs = repmap(rhs)
         if isinstance(lhs_cls, str):
             if lhs_cls != lhs:
                 return
         else:
-            lhs = lhs_cls(lhs)
+            lhs = lhs_cls.match_or_none(lhs)
+            if lhs is None:
+                return
         if rhs:
             if isinstance(rhs_cls, str):
                 if rhs_cls != rhs:
                     return
             else:
-                rhs = rhs_cls(rhs)
+                rhs = rhs_cls.match_or_none(rhs)
+                if rhs is None:
+                    return
             return lhs, rhs
         elif require_rhs:
             return
@@ -1467,12 +2653,16 @@ def walk_ast(children, my_types=None, indent=0, debug=False):
     :rtype: `list` of :py:class:`fparser.two.utils.Base`
     '''
     local_list = []
-    for child in children:
+    # The tree is walked iteratively as it may be deep (e.g. a long
+    # expression).
+    stack = [(child, indent) for child in reversed(list(children))]
+    while stack:
+        child, level = stack.pop()
         if debug:
             if isinstance(child, str):
-                print(indent*"  " + "child type = ", type(child), repr(child))
+                print(level*"  " + "child type = ", type(child), repr(child))
             else:
-                print(indent*"  " + "child type = ", type(child))
+                print(level*"  " + "child type = ", type(child))
         if my_types is None or type(child) in my_types:
             local_list.append(child)
 
@@ -1481,9 +2671,13 @@ def walk_ast(children, my_types=None, indent=0, debug=False):
         # listed under .items. If a node has neither then it has no
         # children.
         if hasattr(child, "content"):
-            local_list += walk_ast(child.content, my_types, indent+1, debug)
+            grandchildren = child.content
         elif hasattr(child, "items"):
-            local_list += walk_ast(child.items, my_types, indent+1, debug)
+            grandchildren = child.items
+        else:
+            continue
+        stack.extend((grandchild, level+1)
+                     for grandchild in reversed(list(grandchildren)))
 
     return local_list
 